@@ -1,5 +1,8 @@
 #!/bin/bash
 
+# Bring the database schema to the latest version before serving
+python -m database.migrate || exit 1
+
 if [[ "$DATABASE_STREAMLIT_PATH" == "/app/data/data.db" ]]; then
     exec streamlit run app.py --server.headless true --server.port 8501
 else
@@ -3,52 +3,85 @@ from controllers.user_controller import UserController
 from controllers.attendance_controller import AttendanceController
 from controllers.caixa_controller import CaixaController
 from controllers.stock_controller import StockController
+from controllers.bulk_controller import BulkController
+from controllers.search_controller import SearchController
+from controllers.consolidated_controller import ConsolidatedController
 from views.user_view import UserView
 from views.attendance_view import AttendanceView
 from views.caixa_view import CaixaView
 from views.stock_view import StockView
-from database.path import db_path
-from utils.authentication import check_login_password
+from views.bulk_view import BulkView
+from views.search_view import SearchView
+from views.system_view import SystemView
+from views.consolidated_view import ConsolidatedView
+from database.path import store_paths
+from utils.authentication import check_login_password, has_profiling_permission
+from utils.profiler import PROFILE_ALL, page_profiler
+from utils.outbox import get_outbox
 
 
-class App:
-    # Controllers
-    user_controller = UserController(db_path)
-    attendance_controller = AttendanceController(db_path)
-    caixa_controller = CaixaController(db_path)
-    stock_controller = StockController(db_path)
+class Store:
+    """Controllers, views and pages of one store's database."""
+
+    def __init__(self, db_path):
+        # Controllers
+        self.user_controller = UserController(db_path)
+        self.attendance_controller = AttendanceController(db_path)
+        self.caixa_controller = CaixaController(db_path)
+        self.stock_controller = StockController(db_path)
+        self.bulk_controller = BulkController(db_path)
+        self.search_controller = SearchController(db_path)
+
+        # Sends the queued emails in the background
+        self.outbox = get_outbox(db_path)
 
-    # Views
-    user_view = UserView(user_controller)
-    attendance_view = AttendanceView(user_controller, attendance_controller)
-    caixa_view = CaixaView(user_controller, caixa_controller)
-    stock_view = StockView(stock_controller)
+        # Views
+        self.user_view = UserView(self.user_controller)
+        self.attendance_view = AttendanceView(self.user_controller, self.attendance_controller)
+        self.caixa_view = CaixaView(self.user_controller, self.caixa_controller)
+        self.stock_view = StockView(self.stock_controller)
+        self.bulk_view = BulkView(self.bulk_controller)
+        self.search_view = SearchView(self.search_controller)
+        self.system_view = SystemView(db_path)
 
-    actions = {
-    "Gestão de Funcionários": {
-        "Cadastrar": user_view.insert_user,
-        "Consultar": user_view.select_users,
-        "Alterar": user_view.update_user,
-        "Ativar / Desativar": user_view.updatestatus_users
-    },
-    "Controle de Ponto": {
-        "Registrar Ponto": attendance_view.create_attendance,
-        "Consultar Registros": attendance_view.get_attendances,
-        "Alterar Registros": attendance_view.change_attendance,
-        "Deletar Registros": attendance_view.delete_attendance
-    },
-    "Caixa": {
-        "Fechamento": caixa_view.save_closing_balance,
-        "Atualização": caixa_view.update_closing_balance,
-        "Relatório": caixa_view.reporting_balance
-    },
-    "Produtos": {
-        "Att. Estoque/Pedido": stock_view.update_stock_and_pending_orders,
-        "Gerenciar Pedidos": stock_view.manage_orders,
-        "Gerenciar Produtos": stock_view.crud_products,
-        "Visualizar Histórico": stock_view.show_products_history
-    }
-    }
+        self.actions = {
+        "Gestão de Funcionários": {
+            "Cadastrar": self.user_view.insert_user,
+            "Consultar": self.user_view.select_users,
+            "Alterar": self.user_view.update_user,
+            "Ativar / Desativar": self.user_view.updatestatus_users
+        },
+        "Controle de Ponto": {
+            "Registrar Ponto": self.attendance_view.create_attendance,
+            "Consultar Registros": self.attendance_view.get_attendances,
+            "Alterar Registros": self.attendance_view.change_attendance,
+            "Deletar Registros": self.attendance_view.delete_attendance
+        },
+        "Caixa": {
+            "Fechamento": self.caixa_view.save_closing_balance,
+            "Atualização": self.caixa_view.update_closing_balance,
+            "Relatório": self.caixa_view.reporting_balance
+        },
+        "Produtos": {
+            "Att. Estoque/Pedido": self.stock_view.update_stock_and_pending_orders,
+            "Gerenciar Pedidos": self.stock_view.manage_orders,
+            "Gerenciar Produtos": self.stock_view.crud_products,
+            "Visualizar Histórico": self.stock_view.show_products_history,
+            "Importar / Exportar": self.bulk_view.import_export
+        },
+        "Sistema": {
+            "Desempenho": self.system_view.performance
+        }
+        }
+
+
+class App:
+    # One Store per database of DATABASE_STORES, picked per session in the sidebar
+    stores = {store: Store(path) for store, path in store_paths.items()}
+
+    # With more than one store, reports over all of them
+    consolidated_view = ConsolidatedView(ConsolidatedController(store_paths))
+    consolidated_actions = {"Lojas": {"Relatório Consolidado": consolidated_view.reports}} if len(stores) > 1 else {}
 
     @staticmethod
     def run() -> None:
@@ -67,12 +100,31 @@ class App:
         st.sidebar.markdown("<h1><font color='#e8516f'>Sistema Avenida</font></h1>", unsafe_allow_html=True)
         st.sidebar.write('')
         
-        funcionalidade = st.sidebar.radio("Categoria",[key for key in App.actions])
+        if len(App.stores) > 1:
+            name = st.sidebar.selectbox("Loja", list(App.stores), key="store")
+            # Pages keep their state in the session, which belongs to the store it was loaded from
+            if st.session_state.setdefault("store_loaded", name) != name:
+                for key in [key for key in st.session_state if key not in ("opened_browser", "store")]:
+                    del st.session_state[key]
+                st.session_state["store_loaded"] = name
+            store = App.stores[name]
+        else:
+            store = next(iter(App.stores.values()))
+        actions = {**store.actions, **App.consolidated_actions}
+
+        funcionalidade = st.sidebar.radio("Categoria",[key for key in actions])
+        st.sidebar.write('')
+        page = st.sidebar.selectbox("Funcionalidade", [key for key in actions[funcionalidade]])
         st.sidebar.write('')
-        page = st.sidebar.selectbox("Funcionalidade", [key for key in App.actions[funcionalidade]])
+        store.search_view.sidebar()
 
         #Showing selected page                       
-        App.actions[funcionalidade][page]()
+        if PROFILE_ALL or has_profiling_permission():
+            page_key = f"{funcionalidade} > {page}"
+            page_profiler.run(page_key, actions[funcionalidade][page])
+            store.system_view.page_profile(page_key)
+        else:
+            actions[funcionalidade][page]()
 
 
 if __name__ == '__main__':
@@ -1,22 +1,28 @@
+import json
 import sqlite3
 from models.attendance import Attendance
+from controllers.timesheet import compute_timesheet
+from database.connection import get_pool
+from database.cache import get_cache
 from utils.logs import log_function_calls
-from sql.sql_reader import read_sql_query
+from utils.metrics import instrumented
+from sql.catalog import catalog
 from utils.logger import logger
-import os
-import streamlit as st
 
+@instrumented
 class AttendanceController:
     def __init__(self, db_path):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.cache = get_cache(db_path)
 
 
     @log_function_calls
     def create_attendance(self, user_id, date, type , time):
         placeholder = {"user_id":user_id, "date":date, "type":type, "time":time}
-        raw_sql = read_sql_query("sql/attendance/create_attendance.sql")
+        raw_sql = catalog["attendance.create_attendance"]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 conn.execute(raw_sql, placeholder)
             return True
         except sqlite3.IntegrityError as e:
@@ -29,9 +35,9 @@ class AttendanceController:
 
     def get_attendance_by_type_and_date(self, user_id, date, type):
         placeholder = {"user_id":user_id, "date":date, "type":type}
-        raw_sql = read_sql_query("sql/attendance/get_attendance_by_type_and_date.sql")
+        raw_sql = catalog["attendance.get_attendance_by_type_and_date"]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute(raw_sql, placeholder)
                 row = cursor.fetchone()
@@ -45,9 +51,9 @@ class AttendanceController:
     @log_function_calls
     def modify_attendance(self, user_id, date, time, type):
         placeholder = {"user_id":user_id, "date":date, "type":type, "time":time}
-        raw_sql = read_sql_query("sql/attendance/modify_attendance.sql")
+        raw_sql = catalog["attendance.modify_attendance"]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 conn.execute(raw_sql, placeholder)
             return True
         except sqlite3.Error as e:
@@ -57,10 +63,10 @@ class AttendanceController:
 
     def get_attendance_by_periods(self, start_date, end_date):
         placeholder = {"start_date":start_date, "end_date":end_date}
-        raw_sql = read_sql_query("sql/attendance/get_attendance_by_periods.sql")
+        raw_sql = catalog["attendance.get_attendance_by_periods"]
         attendances = []
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute(raw_sql, placeholder)
                 rows = cursor.fetchall()
@@ -75,12 +81,55 @@ class AttendanceController:
             return None
         
     
+    def get_attendance_report(self, ranges):
+        """Punches in the [start, end) date `ranges`, pivoted in SQL to one
+        row per day with a column per punch type and grouped by employee:
+        {user_id: DataFrame(date, entrada, entrada_almoco, saida_almoco, saida)},
+        newest day first."""
+        placeholder = {"ranges": json.dumps([[start_date, end_date] for start_date, end_date in ranges])}
+        try:
+            report = self.cache.fetch_frame(catalog["attendance.get_attendance_report"], placeholder,
+                                            dtypes={"user_id": "int64", "date": "datetime64[ns]", "entrada": "string",
+                                                    "entrada_almoco": "string", "saida_almoco": "string", "saida": "string"})
+            return {user_id: days.drop(columns="user_id") for user_id, days in report.groupby("user_id", sort=False)}
+        except sqlite3.Error as e:
+            logger.error(f"Get Attendance Report - Ranges={placeholder['ranges']} -> {str(e)}")
+            return None
+
+
+    def get_worked_hours_summary(self, start_date, end_date):
+        """Days, worked and break minutes and incomplete days per employee in
+        [start_date, end_date), from the attendance_daily rollup."""
+        placeholder = {"start_date":start_date, "end_date":end_date}
+        try:
+            return self.cache.fetch_frame(catalog["attendance.get_worked_hours_summary"], placeholder,
+                                          dtypes={"user_id": "int64", "days": "int64", "worked_minutes": "Int64",
+                                                  "break_minutes": "Int64", "incomplete_days": "int64"})
+        except sqlite3.Error as e:
+            logger.error(f"Get Worked Hours Summary by StartDate={start_date}, EndDate={end_date} -> {str(e)}")
+            return None
+
+
+    def get_timesheet(self, ranges, holidays=None):
+        """Per-day hours, overtime, night and Sunday/holiday minutes of every
+        employee in the [start, end) date `ranges`, see timesheet.compute_timesheet."""
+        placeholder = {"ranges": json.dumps([[start_date, end_date] for start_date, end_date in ranges])}
+        try:
+            punches = self.cache.fetch_frame(catalog["attendance.get_punch_minutes"], placeholder,
+                                             dtypes={"user_id": "int64", "date": "datetime64[ns]", "entrada": "float64",
+                                                     "entrada_almoco": "float64", "saida_almoco": "float64", "saida": "float64"})
+            return compute_timesheet(punches, holidays)
+        except sqlite3.Error as e:
+            logger.error(f"Get Timesheet - Ranges={placeholder['ranges']} -> {str(e)}")
+            return None
+
+
     @log_function_calls
     def delete_attendance(self, user_id, date, type):
         placeholder = {"user_id":user_id , "date":date, "type":type}
-        raw_sql = read_sql_query("sql/attendance/delete_attendance.sql")
+        raw_sql = catalog["attendance.delete_attendance"]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 conn.execute(raw_sql, placeholder)
             return True
         except sqlite3.Error as e:
@@ -0,0 +1,332 @@
+import csv
+import sqlite3
+import zipfile
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from sql.catalog import catalog
+from database.connection import get_pool
+from database.cache import get_cache
+from utils.logs import log_function_calls
+from utils.metrics import instrumented
+from utils.logger import logger
+
+# Rows read, validated and written per transaction
+CHUNK_ROWS = 500
+
+PACKAGE_TYPES = ('Fardo', 'Unidade')
+STATUSES = ('Ativo', 'Inativo')
+
+# Columns of each import; the exports write the same ones, so an exported
+# file can be edited and imported back. `product` and `supplier` take the
+# description, `product_id` and `supplier_id` the id; either one is enough.
+IMPORT_COLUMNS = {
+    "products": ("id", "description", "min_stock", "package_type", "status", "current_stock"),
+    "supplier_prices": ("supplier_id", "supplier", "product_id", "product", "current_price", "status"),
+    "stock_counts": ("product_id", "product", "current_stock"),
+}
+REQUIRED_COLUMNS = {
+    "products": ("description", "min_stock", "package_type"),
+    "supplier_prices": ("current_price",),
+    "stock_counts": ("current_stock",),
+}
+
+
+class ImportFileError(Exception):
+    pass
+
+
+def _key(description):
+    return " ".join(str(description).split()).casefold()
+
+
+def read_chunks(file, name, chunk_rows=CHUNK_ROWS):
+    """DataFrames of up to `chunk_rows` rows of a .csv or .xlsx file, every
+    value a stripped string, with `line`, the line of the row in the file.
+    The CSV delimiter (',' or ';') is taken from the header."""
+    if Path(name).suffix.lower() == '.xlsx':
+        yield from _read_xlsx_chunks(file, chunk_rows)
+        return
+
+    header = file.readline()
+    file.seek(0)
+    if isinstance(header, bytes):
+        header = header.decode('utf-8-sig', errors='replace')
+    sep = ';' if header.count(';') > header.count(',') else ','
+    line = 2
+    try:
+        for chunk in pd.read_csv(file, sep=sep, dtype=str, keep_default_na=False, chunksize=chunk_rows,
+                                 encoding='utf-8-sig', skipinitialspace=True):
+            yield _prepare(chunk, line)
+            line += len(chunk)
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ImportFileError(f"Arquivo inválido perto da linha {line}: {e}")
+
+
+def _read_xlsx_chunks(file, chunk_rows):
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    # read_only streams the rows of the first sheet instead of loading it
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+        raise ImportFileError(f"Planilha inválida: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+        chunk, line = [], 2
+        for row in rows:
+            chunk.append(['' if value is None else str(value) for value in row[:len(header)]])
+            if len(chunk) == chunk_rows:
+                yield _prepare(pd.DataFrame(chunk, columns=header), line)
+                line += len(chunk)
+                chunk = []
+        if chunk:
+            yield _prepare(pd.DataFrame(chunk, columns=header), line)
+    finally:
+        workbook.close()
+
+
+def _prepare(chunk, first_line):
+    chunk.columns = [str(column).strip().lower() for column in chunk.columns]
+    chunk = chunk.apply(lambda column: column.str.strip())
+    chunk.insert(0, "line", range(first_line, first_line + len(chunk)))
+    # Blank lines (trailing rows of a spreadsheet) are not rows
+    return chunk[chunk.drop(columns="line").ne('').any(axis=1)].reset_index(drop=True)
+
+
+class _Keys(dict):
+    """{normalized description: id} of a table, plus `ids`, every id in it.
+    With repeated descriptions the newest id wins."""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.ids = set()
+        self.add(rows)
+
+
+    def add(self, rows):
+        for id, description in rows:
+            self[_key(description)] = id
+            self.ids.add(id)
+
+
+class _Validator:
+    """Column-level checks of one chunk. Each check converts a whole column
+    and appends its message to the rows that fail it."""
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+        self.errors = pd.Series('', index=chunk.index)
+
+
+    def column(self, name):
+        return self.chunk[name] if name in self.chunk else pd.Series('', index=self.chunk.index)
+
+
+    def fail(self, mask, message):
+        self.errors[mask] += message + '; '
+
+
+    def text(self, name, max_length=100):
+        values = self.column(name)
+        self.fail(values == '', f"{name} vazio")
+        self.fail(values.str.len() > max_length, f"{name} com mais de {max_length} caracteres")
+        return values
+
+
+    def number(self, name, default=None, integer=False):
+        values = self.column(name)
+        empty = values == ''
+        # Accepts both 1234.5 and 1234,5
+        numbers = pd.to_numeric(values.str.replace(',', '.', regex=False), errors='coerce')
+        if default is not None:
+            numbers[empty] = default
+        else:
+            self.fail(empty, f"{name} vazio")
+        self.fail(~empty & numbers.isna(), f"{name} não é um número")
+        self.fail(numbers < 0, f"{name} negativo")
+        if integer:
+            self.fail(numbers.notna() & (numbers % 1 != 0), f"{name} não é inteiro")
+        return numbers
+
+
+    def choice(self, name, choices, default=None):
+        values = self.column(name).str.capitalize()
+        if default is not None:
+            values[values == ''] = default
+        self.fail(~values.isin(choices), f"{name} deve ser {' ou '.join(choices)}")
+        return values
+
+
+    def reference(self, id_name, description_name, keys, label):
+        """Ids of the rows, from `id_name` when it is one of `keys.ids`, else
+        looked up by `description_name` in `keys`."""
+        ids = pd.to_numeric(self.column(id_name), errors='coerce')
+        by_description = self.column(description_name).map(lambda description: keys.get(_key(description)))
+        ids = ids.where(ids.isin(keys.ids), pd.to_numeric(by_description))
+        self.fail(ids.isna(), f"{label} não encontrado")
+        return ids
+
+
+    def valid(self):
+        return self.errors == ''
+
+
+    def rejected(self):
+        rows = self.chunk[~self.valid()].copy()
+        rows.insert(1, "reason", self.errors[~self.valid()].str.rstrip('; '))
+        return rows
+
+
+@instrumented
+class BulkController:
+    """Bulk import (.csv/.xlsx) and export (.csv) of products, supplier
+    prices and stock counts.
+
+    Files are read CHUNK_ROWS rows at a time. Each chunk is validated column
+    by column and its valid rows are written with executemany in one
+    transaction; the others come back in the report with the reason. A
+    chunk the database refuses is rolled back and reported as a whole."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.cache = get_cache(db_path)
+
+
+    def _keys(self, sql):
+        with self.pool.connection() as conn:
+            return _Keys(conn.execute(sql))
+
+
+    def _import(self, kind, file, name, write_chunk, chunk_rows):
+        report = {"kind": kind, "rows": 0, "written": 0, "chunks": 0, "rejected": [], "error": None}
+        try:
+            for chunk in read_chunks(file, name, chunk_rows):
+                missing = [column for column in REQUIRED_COLUMNS[kind] if column not in chunk]
+                if missing:
+                    raise ImportFileError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+                report["rows"] += len(chunk)
+                report["chunks"] += 1
+                validator = _Validator(chunk)
+                try:
+                    report["written"] += write_chunk(validator)
+                except sqlite3.Error as e:
+                    logger.error(f"Bulk Import {kind} - Lines {chunk['line'].iat[0]}-{chunk['line'].iat[-1]} -> {str(e)}")
+                    validator.fail(validator.valid(), f"banco de dados: {e}")
+                report["rejected"].append(validator.rejected())
+        except (ImportFileError, ValueError, KeyError, OSError) as e:
+            logger.error(f"Bulk Import {kind} - {name} -> {str(e)}")
+            report["error"] = str(e)
+        report["rejected"] = (pd.concat(report["rejected"], ignore_index=True) if report["rejected"]
+                              else pd.DataFrame(columns=["line", "reason"]))
+        return report
+
+
+    @log_function_calls
+    def import_products(self, file, name, chunk_rows=CHUNK_ROWS):
+        """Creates or updates products. A row updates the product of its `id`
+        or, without one, the product with the same description (case and
+        spacing ignored). `current_stock` is only used for new products;
+        counts of existing ones go through import_stock_counts."""
+        keys = self._keys(catalog["bulk.get_product_keys"])
+
+        def write_chunk(validator):
+            description = validator.text("description")
+            min_stock = validator.number("min_stock", integer=True)
+            package_type = validator.choice("package_type", PACKAGE_TYPES)
+            status = validator.choice("status", STATUSES, default="Ativo")
+            current_stock = validator.number("current_stock", default=0)
+            ids = pd.to_numeric(validator.column("id"), errors='coerce')
+            ids = ids.where(ids.isin(keys.ids), pd.to_numeric(description.map(lambda value: keys.get(_key(value)))))
+            # The last row of a product repeated in the chunk wins
+            target = ('#' + ids.astype('Int64').astype(str)).where(ids.notna(), description.map(_key))
+            repeated = target.duplicated(keep='last')
+            validator.fail(repeated & validator.valid(), "produto repetido no arquivo")
+
+            rows = pd.DataFrame({"product_id": ids, "description": description, "min_stock": min_stock,
+                                 "package_type": package_type, "status": status, "current_stock": current_stock})
+            rows = rows[validator.valid()]
+            updates, inserts = rows[rows["product_id"].notna()], rows[rows["product_id"].isna()]
+            with self.pool.transaction() as conn:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+                conn.executemany(catalog["bulk.update_product"],
+                                 updates.astype({"product_id": "int64", "min_stock": "int64"}).to_dict("records"))
+                conn.executemany(catalog["bulk.insert_product"],
+                                 inserts.drop(columns="product_id").astype({"min_stock": "int64"}).to_dict("records"))
+                new = conn.execute("SELECT id, description FROM products WHERE id > ?", (last_id,)).fetchall()
+            keys.add(new)
+            return len(rows)
+
+        return self._import("products", file, name, write_chunk, chunk_rows)
+
+
+    @log_function_calls
+    def import_supplier_prices(self, file, name, chunk_rows=CHUNK_ROWS):
+        """Associates products with suppliers at `current_price`, or updates
+        the price and status of an existing association."""
+        products = self._keys(catalog["bulk.get_product_keys"])
+        suppliers = self._keys(catalog["bulk.get_supplier_keys"])
+
+        def write_chunk(validator):
+            rows = pd.DataFrame({"supplier_id": validator.reference("supplier_id", "supplier", suppliers, "fornecedor"),
+                                 "product_id": validator.reference("product_id", "product", products, "produto"),
+                                 "current_price": validator.number("current_price"),
+                                 "status": validator.choice("status", STATUSES, default="Ativo")})
+            rows = rows[validator.valid()].astype({"supplier_id": "int64", "product_id": "int64"})
+            with self.pool.transaction() as conn:
+                conn.executemany(catalog["bulk.upsert_supplier_price"], rows.to_dict("records"))
+            return len(rows)
+
+        return self._import("supplier_prices", file, name, write_chunk, chunk_rows)
+
+
+    @log_function_calls
+    def import_stock_counts(self, file, name, chunk_rows=CHUNK_ROWS):
+        """Sets the counted stock of the products in the file. Products left
+        out keep their count; products_history records the ones that changed."""
+        products = self._keys(catalog["bulk.get_product_keys"])
+        now = datetime.now()
+
+        def write_chunk(validator):
+            rows = pd.DataFrame({"product_id": validator.reference("product_id", "product", products, "produto"),
+                                 "current_stock": validator.number("current_stock")})
+            rows = rows[validator.valid()].astype({"product_id": "int64"})
+            with self.pool.transaction() as conn:
+                conn.executemany(catalog["stock.update_stock_qt"],
+                                 [dict(row, last_update_stock=now) for row in rows.to_dict("records")])
+            return len(rows)
+
+        return self._import("stock_counts", file, name, write_chunk, chunk_rows)
+
+
+    def _export(self, sql, file):
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(sql)
+                writer = csv.writer(file)
+                writer.writerow(column[0] for column in cursor.description)
+                count = 0
+                while rows := cursor.fetchmany(CHUNK_ROWS):
+                    writer.writerows(rows)
+                    count += len(rows)
+                return count
+        except sqlite3.Error as e:
+            logger.error(f"Bulk Export -> {str(e)}")
+            return None
+
+
+    def export_products(self, file):
+        """Writes every product to the text file `file` as CSV, in the columns
+        of import_products, and returns the number of rows."""
+        return self._export(catalog["bulk.export_products"], file)
+
+
+    def export_supplier_prices(self, file):
+        return self._export(catalog["bulk.export_supplier_prices"], file)
+
+
+    def export_stock_counts(self, file):
+        return self._export(catalog["bulk.export_stock_counts"], file)
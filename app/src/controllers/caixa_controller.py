@@ -1,20 +1,35 @@
 import sqlite3
 from models.balance import Balance
+from database.connection import get_pool
+from database.cache import get_cache
+from sql.catalog import catalog
 from utils.logs import log_function_calls
+from utils.metrics import instrumented
 from utils.logger import logger
+from utils.outbox import get_outbox
+from utils.sendmail import closing_balance_email
 
+# Closings per report page, about a month of two periods a day
+REPORT_PAGE_SIZE = 62
 
+
+@instrumented
 class CaixaController:
     def __init__(self, db_path):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.cache = get_cache(db_path)
 
 
     @log_function_calls
     def create_closing_balance(self, id, date, period, card_value, pix_value, money_value, observation):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value, observation) VALUES (?, ?, ?, ?, ?, ?, ?)", 
-                        (id, date, period, card_value, pix_value, money_value, observation))
+            with self.pool.transaction() as conn:
+                conn.execute(catalog["caixa.create_closing_balance"],
+                             {"user_id":id, "date":date, "period":period, "card_value":card_value,
+                              "pix_value":pix_value, "money_value":money_value, "observation":observation})
+                email = closing_balance_email(date, card_value, pix_value, money_value, observation)
+                get_outbox(self.db_path).enqueue(conn, "closing_balance", *email)
             return True
         except sqlite3.IntegrityError as e:
             logger.error(f"Save Balance Twice or More - Date {date} -> {str(e)}")
@@ -27,12 +42,9 @@ class CaixaController:
     @log_function_calls
     def update_closing_balance(self, date, period, money_value, observation):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                            UPDATE balance 
-                            SET money_value = ?, observation = ? 
-                            WHERE date = ? and period = ? """, 
-                            (money_value, observation, date, period))
+            with self.pool.transaction() as conn:
+                conn.execute(catalog["caixa.update_closing_balance"],
+                             {"money_value":money_value, "observation":observation, "date":date, "period":period})
             return True 
         except sqlite3.Error as e:
             logger.error(f"Update Balance - Date {date} -> {str(e)}")
@@ -41,15 +53,9 @@ class CaixaController:
 
     def get_closing_values(self, date, period):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""SELECT 
-                                    u.complete_name, 
-                                    money_value,
-                                    b.observation 
-                                    FROM balance b 
-                               LEFT JOIN users u on u.numero_identificacao = b.user_id 
-                               WHERE date = ? AND period = ?""", (date, period))
+                cursor.execute(catalog["caixa.get_closing_values"], {"date":date, "period":period})
                 row = cursor.fetchone()
                 cursor.close()
             return Balance(user_name=row[0], money_value=row[1], observation=row[2]) if not row is None else None
@@ -63,18 +69,9 @@ class CaixaController:
     def get_reporting_balance(self, date):
         balances = []
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""SELECT 	
-                                    date,
-                                    card_value,
-                                    money_value,
-                                    pix_value,
-                                    (card_value + pix_value + money_value) as total,
-                                    SUM(money_value) OVER (ORDER BY DATE ASC) as 'AccDinheiro'
-                                FROM balance b
-                                WHERE date >= ?
-                                ORDER BY date DESC""", (date,))
+                cursor.execute(catalog["caixa.get_reporting_balance"], {"date":date})
                 rows = cursor.fetchall()
             for row in rows:
                 balance = dict(zip([column[0] for column in cursor.description], row))
@@ -84,4 +81,31 @@ class CaixaController:
         except sqlite3.Error as e:
             logger.error(f"Get Reporting Balance - Selected Date {date} -> {str(e)}")
             return None
-        
\ No newline at end of file
+
+
+    @log_function_calls
+    def get_reporting_balance_page(self, date, after=None, limit=REPORT_PAGE_SIZE):
+        """Up to `limit` rows of get_reporting_balance after the (date, period)
+        key `after`, the last row of the previous page; None starts from the
+        newest closing."""
+        after_date, after_period = after or ("9999-12-31", "")
+        try:
+            return self.cache.fetch_frame(catalog["caixa.get_reporting_balance_page"],
+                                          {"date":date, "after_date":after_date, "after_period":after_period, "limit":limit},
+                                          dtypes={"date": "object", "period": "object", "card_value": "float64", "pix_value": "float64",
+                                                  "money_value": "float64", "total": "float64", "AccDinheiro": "float64"})
+        except sqlite3.Error as e:
+            logger.error(f"Get Reporting Balance Page - Selected Date {date}, After {after} -> {str(e)}")
+            return None
+
+
+    def get_balance_totals(self, start_date, end_date):
+        """Card, PIX and cash totals and number of closings in [start_date,
+        end_date), plus acc_money, the running cash total at the end of it.
+        Served from the balance_daily/balance_monthly rollups."""
+        try:
+            rows = self.cache.fetchall(catalog["caixa.get_balance_totals"], {"start_date":start_date, "end_date":end_date})
+            return dict(zip(("card_value", "pix_value", "money_value", "total", "closings", "acc_money"), rows[0]))
+        except sqlite3.Error as e:
+            logger.error(f"Get Balance Totals - Start Date {start_date}, End Date {end_date} -> {str(e)}")
+            return None
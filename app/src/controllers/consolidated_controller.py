@@ -0,0 +1,144 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from database.connection import get_pool
+from utils.metrics import instrumented, metrics
+from utils.logger import logger
+
+# Seconds a consolidated report waits for the slowest store before leaving it out
+STORE_REPORT_TIMEOUT = float(os.getenv("STORE_REPORT_TIMEOUT", "30"))
+
+
+# Run in the worker processes, one call per store. Controllers are kept per
+# database file, so each worker reuses its connection pools and query caches.
+_controllers = {}
+
+
+def _controller(cls, path):
+    if (cls, path) not in _controllers:
+        _controllers[(cls, path)] = cls(path)
+    return _controllers[(cls, path)]
+
+
+def _reporting_balance(path, date):
+    from controllers.caixa_controller import CaixaController
+    rows = _controller(CaixaController, path).get_reporting_balance(date)
+    return None if rows is None else pd.DataFrame(rows, columns=["date", "card_value", "money_value", "pix_value",
+                                                                 "total", "AccDinheiro"])
+
+
+def _attendance_totals(path, start_date, end_date):
+    from controllers.attendance_controller import AttendanceController
+    from controllers.user_controller import UserController
+    summary = _controller(AttendanceController, path).get_worked_hours_summary(start_date, end_date)
+    if summary is None:
+        return None
+    employees = _controller(UserController, path).employees
+    summary.insert(1, "complete_name", [getattr(employees.get(user_id), "complete_name", None)
+                                        for user_id in summary["user_id"]])
+    return summary
+
+
+def _stock_valuation(path):
+    from controllers.stock_controller import StockController
+    return _controller(StockController, path).get_stock_valuation()
+
+
+def _init_worker():
+    # The main process owns metrics_snapshots and the .prom file
+    metrics.disable_snapshots()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers):
+    # Spawned, not forked: the app process has pool, cache and outbox threads
+    # whose locks a forked child could inherit held
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker)
+        return _executor
+
+
+def _reset_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@instrumented
+class ConsolidatedController:
+    """Reports over every store database, one worker process per store.
+
+    Each report returns the frames of all stores concatenated with a `store`
+    column. A store that fails or takes longer than STORE_REPORT_TIMEOUT is
+    left out, logged and listed in `frame.attrs["missing_stores"]`; the
+    others don't wait for it."""
+
+    def __init__(self, stores, timeout=STORE_REPORT_TIMEOUT):
+        # Its own metrics go to the process-wide database (database.path.db_path)
+        self.pool = get_pool()
+        self.stores = dict(stores)
+        self.timeout = timeout
+        # One worker per store: they mostly wait on SQLite, and a store
+        # queued behind another one would be waiting for it
+        self.workers = max(1, len(self.stores))
+
+
+    def _fan_out(self, report, *args):
+        executor = _get_executor(self.workers)
+        try:
+            futures = {executor.submit(report, path, *args): store for store, path in self.stores.items()}
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            executor = _get_executor(self.workers)
+            futures = {executor.submit(report, path, *args): store for store, path in self.stores.items()}
+        done, pending = wait(futures, timeout=self.timeout)
+        if pending:
+            # A running task can't be cancelled; the next report gets fresh
+            # workers instead of queueing behind the hung one
+            _reset_executor(executor)
+
+        frames, missing = [], []
+        for future, store in futures.items():
+            if future not in done:
+                logger.error(f"Consolidated {report.__name__} - Store {store} -> no answer in {self.timeout} s")
+            elif future.exception() is not None:
+                if isinstance(future.exception(), BrokenProcessPool):
+                    _reset_executor(executor)
+                logger.error(f"Consolidated {report.__name__} - Store {store} -> {str(future.exception())}")
+            elif future.result() is not None:
+                frames.append(future.result().assign(store=store))
+                continue
+            missing.append(store)
+
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if not frame.empty:
+            frame = frame[["store", *frame.columns.drop("store")]]
+        frame.attrs["missing_stores"] = missing
+        return frame
+
+
+    def get_reporting_balance(self, date):
+        """CaixaController.get_reporting_balance of every store since `date`."""
+        return self._fan_out(_reporting_balance, date)
+
+
+    def get_attendance_totals(self, start_date, end_date):
+        """Worked hours summary of every employee of every store in
+        [start_date, end_date), with their names."""
+        return self._fan_out(_attendance_totals, start_date, end_date)
+
+
+    def get_stock_valuation(self):
+        """StockController.get_stock_valuation of every store."""
+        return self._fan_out(_stock_valuation)
@@ -0,0 +1,73 @@
+import threading
+from sql.catalog import catalog
+from database.cache import get_cache
+from models.user import Employee
+
+
+class EmployeeDirectory:
+    """Every employee, indexed by id, status and role.
+
+    Loaded once per QueryCache.version() of users, so insert_employee,
+    update_employee, update_employees_status and commits from other
+    connections reload it, and reruns in between don't touch SQLite."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._employees = []
+        self._by_id = {}
+        self._by_status = {}
+        self._by_role = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+
+    def _load(self):
+        with self._lock:
+            version = self.cache.version(("users",))
+            if version != self._version:
+                rows = self._fetch()
+                employees = [Employee(*row) for row in rows]
+                by_status, by_role = {}, {}
+                for employee in employees:
+                    by_status.setdefault(employee.status, []).append(employee)
+                    by_role.setdefault(employee.role, []).append(employee)
+                self._employees, self._by_id = employees, {employee.numero_identificacao: employee for employee in employees}
+                self._by_status, self._by_role = by_status, by_role
+                self._version = version
+            return self
+
+
+    def _fetch(self):
+        with self.cache.pool.connection() as conn:
+            return conn.execute(catalog["user.get_employees"]).fetchall()
+
+
+    def all(self):
+        """Every employee, by id."""
+        return list(self._load()._employees)
+
+
+    def get(self, user_id):
+        return self._load()._by_id.get(user_id)
+
+
+    def active(self):
+        return list(self._load()._by_status.get("Ativo", ()))
+
+
+    def by_role(self, role, status="Ativo"):
+        """Employees of `role`, only the ones in `status` unless it is None."""
+        employees = self._load()._by_role.get(role, ())
+        return [employee for employee in employees if status is None or employee.status == status]
+
+
+_directories = {}
+_directories_lock = threading.Lock()
+
+
+def get_employee_directory(path=None):
+    cache = get_cache(path)
+    with _directories_lock:
+        if cache.pool.path not in _directories:
+            _directories[cache.pool.path] = EmployeeDirectory(cache)
+        return _directories[cache.pool.path]
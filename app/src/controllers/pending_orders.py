@@ -0,0 +1,58 @@
+import json
+import threading
+from datetime import datetime
+from sql.catalog import catalog
+from database.cache import get_cache
+from models.order import OrderItem, PendingOrder
+
+
+class PendingOrders:
+    """Pending orders with their items, kept between reruns.
+
+    Refreshed on the query cache's version of the tables it reads: when
+    orders change only the new pending orders are loaded (the others are
+    dropped), when products or suppliers change, or another connection
+    commits, everything is reloaded."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.orders = {}
+        self._orders_version = None
+        self._labels_version = None
+        self._lock = threading.Lock()
+
+
+    def get(self):
+        with self._lock:
+            labels_version = self.cache.version(("products", "suppliers"))
+            orders_version = self.cache.version(("orders", "orders_items"))
+            if labels_version != self._labels_version:
+                self.orders = {}
+            if labels_version != self._labels_version or orders_version != self._orders_version:
+                self._refresh()
+                self._labels_version, self._orders_version = labels_version, orders_version
+            return list(self.orders.values())
+
+
+    def _refresh(self):
+        pending = [order_id for (order_id,) in self.cache.fetchall(catalog["stock.get_pending_order_ids"])]
+        orders = {order_id: self.orders[order_id] for order_id in pending if order_id in self.orders}
+        missing = [order_id for order_id in pending if order_id not in orders]
+        if missing:
+            rows = self.cache.fetchall(catalog["stock.get_pending_orders"], {"order_ids": json.dumps(missing)})
+            for order_id, order_date, supplier_id, supplier, total, items in rows:
+                orders[order_id] = PendingOrder(order_id, datetime.fromisoformat(order_date), supplier_id, supplier,
+                                                total, [OrderItem(*item) for item in json.loads(items)])
+        self.orders = {order_id: orders[order_id] for order_id in pending if order_id in orders}
+
+
+_read_models = {}
+_read_models_lock = threading.Lock()
+
+
+def get_pending_orders(path=None):
+    cache = get_cache(path)
+    with _read_models_lock:
+        if cache.pool.path not in _read_models:
+            _read_models[cache.pool.path] = PendingOrders(cache)
+        return _read_models[cache.pool.path]
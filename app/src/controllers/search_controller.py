@@ -0,0 +1,41 @@
+import json
+import re
+import sqlite3
+from database.connection import get_pool
+from database.cache import get_cache
+from sql.catalog import catalog
+from utils.metrics import instrumented
+from utils.logger import logger
+
+# What search_index holds (database/migrations/0013_search_index.sql)
+SEARCH_KINDS = ("products", "suppliers", "users", "balance")
+SEARCH_LIMIT = 20
+
+
+def match_expression(query):
+    """Turns free text into an FTS5 query where every word must match as a
+    prefix. Quoting keeps FTS5 operators out of user input."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+@instrumented
+class SearchController:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.cache = get_cache(db_path)
+
+
+    def search(self, query, kinds=SEARCH_KINDS, limit=SEARCH_LIMIT):
+        """Best matches as (kind, ref_id, title, snippet), accents and case
+        ignored, each word matched as a prefix."""
+        expression = match_expression(query)
+        if not expression:
+            return []
+        try:
+            return self.cache.fetchall(catalog["search.search"],
+                                       {"query": expression, "kinds": json.dumps(list(kinds)), "limit": limit})
+        except sqlite3.Error as e:
+            logger.error(f"Search - {query} -> {str(e)}")
+            return None
@@ -1,26 +1,39 @@
+import json
 import sqlite3
-from datetime import datetime
-from sql.sql_reader import read_sql_query
+from datetime import datetime, timezone
+import pandas as pd
+from sql.catalog import catalog
+from database.connection import get_pool
+from database.cache import get_cache
+from controllers.pending_orders import get_pending_orders
 from utils.logs import log_function_calls
+from utils.metrics import instrumented
 from utils.logger import logger
 
+# Stock changes per page of the history browser
+HISTORY_PAGE_SIZE = 50
 
+
+@instrumented
 class StockController:
     def __init__(self, db_path):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.cache = get_cache(db_path)
+        self.pending_orders = get_pending_orders(db_path)
 
 
+    @log_function_calls
     def create_product(self, description, current_stock, min_stock, pack_type, suppliers):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("INSERT INTO products (description, current_stock_in_units, min_stock, package_type) VALUES (?, ?, ?, ?)",
-                               (description, current_stock, min_stock, pack_type))
+                cursor.execute(catalog["stock.create_product"],
+                               {"description":description, "current_stock":current_stock,
+                                "min_stock":min_stock, "package_type":pack_type})
                 lastrowid = cursor.lastrowid
-
-                for supplier_id in suppliers:
-                    cursor.execute("INSERT INTO suppliers_products (supplier_id, product_id) VALUES (?, ?)",
-                               (supplier_id, lastrowid))
+                cursor.executemany(catalog["stock.create_product_supplier"],
+                                   [{"supplier_id":supplier_id, "product_id":lastrowid} for supplier_id in suppliers])
                 cursor.close()
                 return True
         except sqlite3.Error as e:
@@ -30,47 +43,49 @@ class StockController:
 
     @log_function_calls
     def create_order(self, order_items: list) -> bool:
-        now = datetime.now()
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("INSERT INTO orders (order_date, supplier_id) VALUES (?, ?)",
-                                (now, order_items[0][0]))
-                lastrowid = cursor.lastrowid
-
-                for item in order_items:
-                    product_id, quantity, price = item[1], item[2], item[3]
-                    cursor.execute("INSERT INTO orders_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)",
-                                (lastrowid, product_id, quantity, price))
-                cursor.close()
+            with self.pool.transaction() as conn:
+                self._insert_orders(conn, order_items, datetime.now())
                 return True
         except sqlite3.Error as e:
-            logger.error(f"Create New Order - Order Id {lastrowid} -> {str(e)}")
+            logger.error(f"Create New Order - Supplier Id {order_items[0][0]} -> {str(e)}")
+            return None
+
+
+    @log_function_calls
+    def create_orders(self, basket: list):
+        """Creates one order per supplier of `basket`, a list of
+        (supplier_id, product_id, quantity, unit_price), all in one
+        transaction. Returns the new order ids in supplier order."""
+        try:
+            with self.pool.transaction() as conn:
+                return self._insert_orders(conn, basket, datetime.now())
+        except sqlite3.Error as e:
+            logger.error(f"Create Orders - Suppliers {sorted({item[0] for item in basket})} -> {str(e)}")
             return None
 
 
+    @staticmethod
+    def _insert_orders(conn, order_items, now):
+        cursor = conn.cursor()
+        order_ids = {}
+        for supplier_id, *_ in order_items:
+            if supplier_id not in order_ids:
+                cursor.execute(catalog["stock.create_order"], {"order_date":now, "supplier_id":supplier_id})
+                order_ids[supplier_id] = cursor.lastrowid
+        cursor.executemany(catalog["stock.create_order_item"],
+                           [{"order_id":order_ids[supplier_id], "product_id":product_id,
+                             "quantity":quantity, "unit_price":price}
+                            for supplier_id, product_id, quantity, price in order_items])
+        cursor.close()
+        return list(order_ids.values())
+
+
     def get_stock_product_association(self, selected_product_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                                SELECT 
-                                    s.id AS supplier_id,
-                                    s.description,
-                                    sp.current_price,
-                                    CASE WHEN sp.status = 'Ativo' THEN 1 ELSE 0 END AS Status
-                                FROM 
-                                    suppliers s 
-                                CROSS JOIN 
-                                    products p 
-                                LEFT JOIN 
-                                    suppliers_products sp  
-                                ON  sp.supplier_id = s.id AND sp.product_id = p.id 
-                                WHERE p.id = ?""",
-                                (selected_product_id,))
-                prod_supp_associ = cursor.fetchall()
-                cursor.close()  
-                return prod_supp_associ
+            return self.cache.fetch_frame(catalog["stock.get_stock_product_association"], {"product_id":selected_product_id},
+                                          dtypes={"supplier_id": "int64", "description": "object",
+                                                  "current_price": "float64", "Status": "bool"})
         except sqlite3.Error as e:
             logger.error(f"Get Product-Supp Association -> Product Id {selected_product_id} -> {str(e)}")
             return None
@@ -82,19 +97,17 @@ class StockController:
         current_price = update_dataframe["Preco Atual"].values.tolist()
         new_status = update_dataframe["Status"].values.tolist()
 
-        rows_to_update = [(current_price, supplier_id, selected_product_id) 
+        rows_to_update = [{"current_price":current_price, "supplier_id":supplier_id, "product_id":selected_product_id}
                            for current_price, supplier_id, status 
                            in zip(current_price, supplier_ids, new_status) if not status]
-        rows_to_insert_replace = [(current_price, supplier_id, selected_product_id) 
+        rows_to_insert_replace = [{"current_price":current_price, "supplier_id":supplier_id, "product_id":selected_product_id}
                            for current_price, supplier_id, status 
                            in zip(current_price, supplier_ids, new_status) if status]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.executemany("UPDATE suppliers_products SET status = 'Inativo', current_price = ? WHERE supplier_id = ? AND product_id = ?", 
-                                    rows_to_update)
-                cursor.executemany("INSERT OR REPLACE INTO suppliers_products (current_price, supplier_id, product_id, status) VALUES (?, ?, ?, 'Ativo')", 
-                                    rows_to_insert_replace)
+                cursor.executemany(catalog["stock.deactivate_product_supplier"], rows_to_update)
+                cursor.executemany(catalog["stock.activate_product_supplier"], rows_to_insert_replace)
                 cursor.close()  
                 return True
         except sqlite3.Error as e:
@@ -107,12 +120,12 @@ class StockController:
         product_current_stock = update_dataframe["Estoque Atual"].values.tolist()
         product_ids = update_dataframe["ID"].values.tolist()
         now = datetime.now()
-        data = [(updated_stock, now, id) for updated_stock, id in zip(product_current_stock, product_ids)]
+        data = [{"current_stock":updated_stock, "last_update_stock":now, "product_id":id}
+                for updated_stock, id in zip(product_current_stock, product_ids)]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.executemany("UPDATE products SET current_stock_in_units = ?, last_update_stock = ?  WHERE id = ?", 
-                        (data))
+                cursor.executemany(catalog["stock.update_stock_qt"], data)
                 cursor.close()
                 return True
         except sqlite3.IntegrityError as e:
@@ -125,12 +138,9 @@ class StockController:
 
     def get_product_info(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, description, current_stock_in_units, package_type, last_update_stock FROM products")
-                product_info = cursor.fetchall()
-                cursor.close()  
-            return product_info
+            return self.cache.fetch_frame(catalog["stock.get_product_info"],
+                                          dtypes={"id": "int64", "description": "string", "current_stock_in_units": "Int64",
+                                                  "package_type": "string", "last_update_stock": "datetime64[ns]"})
         except sqlite3.Error as e:
             logger.error(f"Get Product Info -> {str(e)}")
             return None
@@ -142,16 +152,15 @@ class StockController:
         products_min_stock = update_dataframe["Estoque Minimo"].values.tolist()
         products_status= update_dataframe["Status"].values.tolist()
         products_ids = update_dataframe["Id"].values.tolist()
-        data = [(desc, min_stock, status, id) for desc, min_stock, status, id in zip(
-                                                                                        products_description, 
-                                                                                        products_min_stock,
-                                                                                        products_status,
-                                                                                        products_ids)]
+        data = [{"description":desc, "min_stock":min_stock, "status":status, "product_id":id}
+                for desc, min_stock, status, id in zip(products_description,
+                                                       products_min_stock,
+                                                       products_status,
+                                                       products_ids)]
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.executemany("UPDATE products SET description = ?, min_stock = ?, status = ? WHERE id = ?", 
-                        (data))
+                cursor.executemany(catalog["stock.update_product_info"], data)
                 cursor.close()
                 return True
         except sqlite3.Error as e:
@@ -161,17 +170,8 @@ class StockController:
 
     def get_product_update_info(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""SELECT 
-                                        id,
-                                        description,
-                                        min_stock, 
-                                        status
-                                  FROM products""")
-                product_info = cursor.fetchall()
-                cursor.close()  
-                return product_info
+            return self.cache.fetch_frame(catalog["stock.get_product_update_info"],
+                                          dtypes={"id": "int64", "description": "object", "min_stock": "float64", "status": "object"})
         except sqlite3.Error as e:
             logger.error(f"Get All Product Info -> {str(e)}")
             return None
@@ -179,12 +179,7 @@ class StockController:
 
     def get_suppliers_info(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, description FROM suppliers")
-                suppplier_info = cursor.fetchall()
-                cursor.close()  
-                return suppplier_info
+            return self.cache.fetchall(catalog["stock.get_suppliers_info"])
         except sqlite3.Error as e:
             logger.error(f"Get Suppliers Info -> {str(e)}")
             return None
@@ -192,17 +187,7 @@ class StockController:
 
     def get_suppliers_products_info(self, product_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""SELECT
-                                        s.id,
-                                        s.description
-                                        FROM suppliers_products sp
-                                        INNER JOIN suppliers s ON s.id  = sp.supplier_id 
-                                        WHERE sp.product_id = ?""", (product_id,))
-                result = cursor.fetchall()
-                cursor.close()  
-                return result
+            return self.cache.fetchall(catalog["stock.get_suppliers_products_info"], {"product_id":product_id})
         except sqlite3.Error as e:
             logger.error(f"Get Suppliers-Product Info -> {str(e)}")
             return None
@@ -211,11 +196,10 @@ class StockController:
     @log_function_calls
     def update_order_status(self, order_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 now = datetime.now()
                 cursor = conn.cursor()
-                cursor.execute("UPDATE orders SET status = 'Entregue', delivery_date = ?, last_update = ?  WHERE id = ? ", 
-                        (now, now, order_id))
+                cursor.execute(catalog["stock.update_order_status"], {"now":now, "order_id":order_id})
                 cursor.close()
                 return True
         except sqlite3.Error as e:
@@ -226,10 +210,9 @@ class StockController:
     @log_function_calls
     def cancel_order(self, order_id):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("UPDATE orders SET status = 'Cancelado' WHERE id = ? ", 
-                        (order_id,))
+                cursor.execute(catalog["stock.cancel_order"], {"order_id":order_id})
                 cursor.close()
                 return True
         except sqlite3.Error as e:
@@ -237,53 +220,111 @@ class StockController:
             return None
         
 
-    def get_pending_orders_items(self):
+    def get_pending_orders(self):
+        """Pending orders, oldest first, each with its items (models.order)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""SELECT DISTINCT 
-                                        oi.order_id,
-                                        o.order_date,
-                                        s.description supp_desc,
-                                        p.description prod_desc
-                                        FROM orders o
-                                        INNER JOIN orders_items oi ON o.id  = oi.order_id 
-                                        INNER JOIN suppliers s ON o.supplier_id = s.id  
-                                        INNER JOIN products p  ON oi.product_id  = p.id 
-                                        where o.status  = "Pendente"
-                               """)
-                result = cursor.fetchall()
-                cursor.close()  
-                return result
+            return self.pending_orders.get()
         except sqlite3.Error as e:
-            logger.error(f"Get Orders Items-> {str(e)}")
+            logger.error(f"Get Pending Orders -> {str(e)}")
             return None
 
 
     @log_function_calls
     def calculate_recommended_orders_items(self):
-        raw_sql = read_sql_query("sql/stock/get_lowest_current_price.sql")
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(raw_sql)
-                data = cursor.fetchall()
-                cursor.close()  
-                return data
+            return self.cache.fetch_frame(catalog["stock.get_lowest_current_price"],
+                                          dtypes={"prod_id": "int64", "prod_desc": "string", "supplier_id": "int64",
+                                                  "supp_desc": "string", "order_date": "datetime64[ns]",
+                                                  "unit_price": "float64", "current_price": "float64"})
         except sqlite3.Error as e:
             logger.error(f"Calculate Recommended Orders -> {str(e)}")
             return None
         
     
+    def get_stock_valuation(self):
+        """Stock of every active product valued at its last order price."""
+        try:
+            return self.cache.fetch_frame(catalog["stock.get_stock_valuation"],
+                                          dtypes={"id": "int64", "description": "string", "current_stock_in_units": "float64",
+                                                  "unit_price": "float64", "stock_value": "float64"})
+        except sqlite3.Error as e:
+            logger.error(f"Get Stock Valuation -> {str(e)}")
+            return None
+
+
     @log_function_calls
-    def get_product_history(self):
+    def get_product_history(self, product_id=None, start_date=None, end_date=None, min_change=0,
+                            after=None, limit=HISTORY_PAGE_SIZE):
+        """Up to `limit` stock changes, newest first, of one product or all of
+        them, counted in [start_date, end_date) and changing the count by at
+        least `min_change`, after the (valid_from, id, history_id) key `after`
+        of the last row of the previous page; None starts from the newest
+        change."""
+        after_from, after_id, after_rowid = after or ("9999-12-31", 0, 0)
+        params = {"start_date":start_date or "0000-01-01", "end_date":end_date or "9999-12-31",
+                  "min_change":min_change, "after_from":after_from, "after_id":after_id,
+                  "after_rowid":after_rowid, "limit":limit}
+        if product_id is None:
+            sql = catalog["stock.get_product_history_page"]
+        else:
+            sql = catalog["stock.get_product_history_page_by_product"]
+            params["product_id"] = product_id
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, description, stock_in_units, valid_to FROM products_history")
-                data = cursor.fetchall()
-                cursor.close()  
-                return data
+            return self.cache.fetch_frame(sql, params,
+                                          dtypes={"id": "int64", "description": "string", "stock_in_units": "Int64",
+                                                  "previous_stock": "Int64", "change": "Int64",
+                                                  "valid_from": "object", "valid_to": "object", "history_id": "int64"})
+        except sqlite3.Error as e:
+            logger.error(f"Get Products History - Product {product_id}, After {after} -> {str(e)}")
+            return None
+
+
+    def get_product_history_sparklines(self, product_ids, start_date, end_date):
+        """Per product of `product_ids`: the stock at the end of each day, week
+        or month (by the length of the range) of [start_date, end_date) that
+        had a change, as a list for a sparkline, its minimum, maximum and
+        last value and the number of changes in the range."""
+        days = (datetime.fromisoformat(end_date) - datetime.fromisoformat(start_date)).days
+        bucket = '%Y-%m-%d' if days <= 62 else '%Y-%W' if days <= 2 * 366 else '%Y-%m'
+        try:
+            buckets = self.cache.fetch_frame(catalog["stock.get_product_history_sparklines"],
+                                             {"product_ids":json.dumps([int(id) for id in product_ids]), "bucket":bucket,
+                                              "start_date":start_date, "end_date":end_date},
+                                             dtypes={"id": "int64", "bucket": "object", "stock_in_units": "float64",
+                                                     "last_change": "object", "changes": "int64"})
+        except sqlite3.Error as e:
+            logger.error(f"Get Products History Sparklines -> {str(e)}")
+            return None
+        stock = buckets.groupby("id", sort=False)["stock_in_units"]
+        return pd.DataFrame({"series": stock.agg(list), "min": stock.min(), "max": stock.max(), "last": stock.last(),
+                             "changes": buckets.groupby("id", sort=False)["changes"].sum()}).reset_index()
+
+
+    def stock_as_of(self, timestamp):
+        """Stock of every product at `timestamp`, a datetime (naive ones are
+        local time, like last_update_stock) or a UTC 'YYYY-MM-DD HH:MM:SS'
+        string, with the interval of products_history it comes from."""
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            return self.cache.fetch_frame(catalog["stock.get_stock_as_of"], {"at":timestamp},
+                                          dtypes={"id": "int64", "description": "string", "stock_in_units": "Int64",
+                                                  "valid_from": "datetime64[ns]", "valid_to": "datetime64[ns]"})
+        except sqlite3.Error as e:
+            logger.error(f"Get Stock As Of {timestamp} -> {str(e)}")
+            return None
+
+
+    @log_function_calls
+    def compact_stock_history(self):
+        """Merges consecutive intervals of a product with the same count into
+        one and drops empty ones. Returns the number of rows removed."""
+        try:
+            with self.pool.transaction() as conn:
+                removed = conn.execute(catalog["stock.delete_empty_products_history"]).rowcount
+                conn.execute(catalog["stock.merge_products_history"])
+                removed += conn.execute(catalog["stock.delete_merged_products_history"]).rowcount
+                return removed
         except sqlite3.Error as e:
-            logger.error(f"Get Products History -> {str(e)}")
+            logger.error(f"Compact Stock History -> {str(e)}")
             return None
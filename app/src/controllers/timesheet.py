@@ -0,0 +1,102 @@
+"""Vectorized timesheet rules.
+
+Every function works on whole columns: one array element per employee and
+day, punch times in minutes since midnight and NaN for a missing punch. A day
+is Entrada, Entrada Almoço (lunch starts), Saída Almoço (lunch ends), Saída.
+"""
+from datetime import date, timedelta
+import numpy as np
+
+WORKDAY_MINUTES = 8 * 60
+# Overtime up to this many minutes a day is paid at 50%, the rest at 100%
+OVERTIME_50_MINUTES = 2 * 60
+# Urban night work (CLT art. 73): 22:00 to 05:00
+NIGHT_START = 22 * 60
+NIGHT_END = 5 * 60
+
+PUNCH_COLUMNS = ("entrada", "entrada_almoco", "saida_almoco", "saida")
+FIXED_HOLIDAYS = ("01-01", "04-21", "05-01", "09-07", "10-12", "11-02", "11-15", "11-20", "12-25")
+
+
+def easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def brazilian_holidays(years):
+    """National holidays of `years`: the fixed ones plus Sexta-feira Santa."""
+    holidays = [f"{year}-{month_day}" for year in years for month_day in FIXED_HOLIDAYS]
+    holidays += [(easter(year) - timedelta(days=2)).isoformat() for year in years]
+    return np.array(sorted(holidays), dtype="datetime64[D]")
+
+
+def _overlap(start, end, window_start, window_end):
+    return np.clip(np.minimum(end, window_end) - np.maximum(start, window_start), 0, None)
+
+
+def _night(start, end):
+    return _overlap(start, end, 0, NIGHT_END) + _overlap(start, end, NIGHT_START, 24 * 60)
+
+
+def compute_timesheet(punches, holidays=None):
+    """Per-day timesheet of `punches`, a frame with user_id, date
+    (datetime64) and the PUNCH_COLUMNS in minutes.
+
+    Worked time only counts on days that can be closed: all four punches, or
+    Entrada and Saída without lunch punches. Other days are flagged by the
+    missing_* masks and count zero. Work on Sundays and `holidays` (default:
+    brazilian_holidays of the period) goes to sunday_holiday_minutes instead
+    of the overtime buckets."""
+    entrada, entrada_almoco, saida_almoco, saida = (punches[column].to_numpy(dtype="float64") for column in PUNCH_COLUMNS)
+    missing = {column: np.isnan(values) for column, values in zip(PUNCH_COLUMNS, (entrada, entrada_almoco, saida_almoco, saida))}
+    complete = ~(missing["entrada"] | missing["entrada_almoco"] | missing["saida_almoco"] | missing["saida"])
+    no_lunch = ~missing["entrada"] & ~missing["saida"] & missing["entrada_almoco"] & missing["saida_almoco"]
+
+    # Two work segments per day; without lunch the first one runs to Saída
+    first_end = np.where(complete, entrada_almoco, saida)
+    second_start = np.where(complete, saida_almoco, saida)
+    closed = complete | no_lunch
+    entrada, first_end, second_start, saida = (np.where(closed, values, 0) for values in (entrada, first_end, second_start, saida))
+
+    worked = np.clip(first_end - entrada, 0, None) + np.clip(saida - second_start, 0, None)
+    night = _night(entrada, first_end) + _night(second_start, saida)
+
+    days = punches["date"].to_numpy(dtype="datetime64[D]")
+    if holidays is None:
+        years = range(days.min().astype(object).year, days.max().astype(object).year + 1) if len(days) else ()
+        holidays = brazilian_holidays(years)
+    # 1970-01-01 was a Thursday, so Monday is 0 and Sunday 6
+    sunday = (days.astype("int64") + 3) % 7 == 6
+    rest_day = sunday | np.isin(days, np.asarray(holidays, dtype="datetime64[D]"))
+
+    overtime = np.where(rest_day, 0, np.clip(worked - WORKDAY_MINUTES, 0, None))
+    overtime_50 = np.minimum(overtime, OVERTIME_50_MINUTES)
+
+    timesheet = punches[["user_id", "date", *PUNCH_COLUMNS]].copy()
+    timesheet["worked_minutes"] = worked.astype("int64")
+    timesheet["regular_minutes"] = np.where(rest_day, 0, worked - overtime).astype("int64")
+    timesheet["overtime_50_minutes"] = overtime_50.astype("int64")
+    timesheet["overtime_100_minutes"] = (overtime - overtime_50).astype("int64")
+    timesheet["night_minutes"] = night.astype("int64")
+    timesheet["sunday_holiday_minutes"] = np.where(rest_day, worked, 0).astype("int64")
+    for column in PUNCH_COLUMNS:
+        timesheet[f"missing_{column}"] = missing[column]
+    timesheet["is_closed"] = closed
+    return timesheet
+
+
+def summarize(timesheet):
+    """Period totals per employee of a `compute_timesheet` frame."""
+    minutes = [column for column in timesheet.columns if column.endswith("_minutes")]
+    totals = timesheet.groupby("user_id", sort=True)[minutes].sum()
+    totals["days"] = timesheet.groupby("user_id", sort=True).size()
+    totals["open_days"] = (~timesheet["is_closed"]).groupby(timesheet["user_id"], sort=True).sum()
+    return totals.reset_index()
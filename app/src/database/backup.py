@@ -0,0 +1,366 @@
+"""Online, incremental and compressed backups of the SQLite database.
+
+    python -m database.backup snapshot --target s3://bucket/bakery
+    python -m database.backup list --target /backups
+    python -m database.backup restore --target /backups --at 2024-05-01T03:00:00 --output restored.db
+
+A snapshot copies the live database with the sqlite3 backup API, a few pages
+at a time, so writers are only blocked between steps. Each page of the copy
+is zlib-compressed on its own, and the pages the previous snapshot doesn't
+have are appended to pack objects of about PACK_BYTES, named after the
+SHA-256 of their content. The manifest lists every page in order as its
+SHA-256, pack and byte range, so a snapshot reuses the packed pages of the
+previous one and uploads only what changed:
+
+    packs/abcdef....pack                    compressed pages, back to back
+    manifests/20240501T030000Z-000.json.z   compressed JSON manifest
+
+Manifest names sort by the time of the snapshot; the counter after it keeps
+two snapshots taken in the same second apart. A restore reads each pack it
+needs with one ranged GET, RESTORE_THREADS at a time, so a full restore costs
+about one request per PACK_BYTES of compressed pages instead of one per page.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from database.path import db_path, store_paths
+from utils.logger import logger
+
+# New pages are uploaded in packs of about this many compressed bytes. Pages
+# are deduplicated one by one, so a snapshot stores only the pages written
+# since the previous one, while a restore needs one request per pack.
+PACK_BYTES = 8 * 1024 * 1024
+RESTORE_THREADS = 8
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+MANIFEST_TIME = '%Y%m%dT%H%M%SZ'
+
+
+class BackupError(Exception):
+    pass
+
+
+class LocalTarget:
+    """Backup target on a local (or mounted) directory."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+
+    def put(self, key, data):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+    def get(self, key, start=0, end=None):
+        """Bytes [start, end) of `key`, the whole object by default."""
+        try:
+            with open(self.root / key, 'rb') as file:
+                file.seek(start)
+                return file.read() if end is None else file.read(end - start)
+        except FileNotFoundError:
+            raise BackupError(f"Missing {key} in {self.root}")
+
+
+    def list(self, prefix):
+        base = self.root / prefix
+        if not base.exists():
+            return []
+        return sorted(path.relative_to(self.root).as_posix() for path in base.rglob('*')
+                      if path.is_file() and not path.name.endswith('.tmp'))
+
+
+class S3Target:
+    """Backup target on an S3 bucket, under `prefix`. Needs boto3 and the
+    usual AWS_* environment variables."""
+
+    def __init__(self, bucket, prefix=''):
+        import boto3
+        self.client = boto3.client('s3')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+
+    def get(self, key, start=0, end=None):
+        byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=byte_range)['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            raise BackupError(f"Missing {key} in s3://{self.bucket}/{self.prefix}")
+
+
+    def list(self, prefix):
+        keys = []
+        start = len(self._key(''))
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            keys.extend(item['Key'][start:] for item in page.get('Contents', ()))
+        return sorted(keys)
+
+
+def open_target(url):
+    """`s3://bucket/prefix` or a local directory."""
+    if url.startswith('s3://'):
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        return S3Target(bucket, prefix)
+    return LocalTarget(url.removeprefix('file://'))
+
+
+def store_targets(url):
+    """{store: target} of every store of database.path.store_paths, each under
+    `url`/<store>. A single store keeps its snapshots at `url` itself."""
+    if len(store_paths) == 1:
+        return {store: open_target(url) for store in store_paths}
+    return {store: open_target(f"{url.rstrip('/')}/{store}") for store in store_paths}
+
+
+def _as_utc(moment):
+    # Naive datetimes are taken as UTC, like the manifest names
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _manifest_name(target, created_at):
+    stamp = f"manifests/{created_at.strftime(MANIFEST_TIME)}-"
+    taken = sum(name.startswith(stamp) for name in manifests(target))
+    return f"{stamp}{taken:03d}.json.z"
+
+
+def _copy(source, destination, pages_per_step, sleep):
+    src = sqlite3.connect(source, uri=True)
+    dst = sqlite3.connect(destination)
+    try:
+        src.backup(dst, pages=pages_per_step, sleep=sleep)
+    finally:
+        dst.close()
+        src.close()
+
+
+class _Packer:
+    """Collects compressed pages and uploads them as one pack once it holds
+    `pack_bytes`. Page entries get their pack key when it is uploaded."""
+
+    def __init__(self, target, pack_bytes):
+        self.target = target
+        self.pack_bytes = pack_bytes
+        self.packs = 0
+        self.stored_bytes = 0
+        self._data = bytearray()
+        self._entries = []
+
+
+    def add(self, digest, compressed):
+        entry = [digest, None, len(self._data), len(self._data) + len(compressed)]
+        self._data += compressed
+        self._entries.append(entry)
+        if len(self._data) >= self.pack_bytes:
+            self.flush()
+        return entry
+
+
+    def flush(self):
+        if not self._data:
+            return
+        key = f"packs/{hashlib.sha256(self._data).hexdigest()}.pack"
+        self.target.put(key, bytes(self._data))
+        for entry in self._entries:
+            entry[1] = key
+        self.packs += 1
+        self.stored_bytes += len(self._data)
+        self._data, self._entries = bytearray(), []
+
+
+def snapshot(target, path=None, pack_bytes=PACK_BYTES, pages_per_step=PAGES_PER_STEP, sleep=STEP_SLEEP, now=None):
+    """Stores a consistent snapshot of the database at `path` in `target`,
+    named after `now` (default: now), and returns its manifest with
+    `new_pages`, `new_packs` and `stored_bytes` for what this run uploaded."""
+    started = time.perf_counter()
+    created_at = _as_utc(now or datetime.now(timezone.utc))
+    try:
+        known = {entry[0]: entry for entry in find_manifest(target)["pages"]}
+    except BackupError:
+        known = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, 'snapshot.db')
+        _copy(path or db_path, copy, pages_per_step, sleep)
+        conn = sqlite3.connect(copy)
+        try:
+            user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            conn.close()
+
+        pages, new_pages, size = [], 0, 0
+        packer = _Packer(target, pack_bytes)
+        whole = hashlib.sha256()
+        with open(copy, 'rb') as file:
+            while data := file.read(page_size):
+                whole.update(data)
+                size += len(data)
+                digest = hashlib.sha256(data).hexdigest()
+                if digest not in known:
+                    known[digest] = packer.add(digest, zlib.compress(data, 6))
+                    new_pages += 1
+                pages.append(known[digest])
+        packer.flush()
+
+    manifest = {"name": _manifest_name(target, created_at),
+                "created_at": created_at.isoformat(timespec='seconds'),
+                "size": size,
+                "sha256": whole.hexdigest(),
+                "page_size": page_size,
+                "user_version": user_version,
+                "pages": pages}
+    # The manifest goes last: a snapshot interrupted before it never shows up
+    encoded = zlib.compress(json.dumps(manifest).encode('utf-8'), 6)
+    target.put(manifest["name"], encoded)
+    manifest.update(new_pages=new_pages, new_packs=packer.packs, stored_bytes=packer.stored_bytes + len(encoded),
+                    duration_ms=round((time.perf_counter() - started) * 1000, 1))
+    return manifest
+
+
+def manifests(target):
+    """Names of the snapshots in `target`, oldest first."""
+    return [key for key in target.list('manifests/') if key.endswith('.json.z')]
+
+
+def find_manifest(target, at=None):
+    """The latest snapshot taken at or before `at` (an aware or UTC datetime),
+    or the latest one."""
+    names = manifests(target)
+    if at is not None:
+        names = [name for name in names if name < f"manifests/{_as_utc(at).strftime(MANIFEST_TIME)}~"]
+    if not names:
+        raise BackupError(f"No snapshot at or before {at}" if at else "No snapshots in target")
+    return json.loads(zlib.decompress(target.get(names[-1])))
+
+
+def _restore_pack(target, key, pages, page_size, file, lock):
+    # One ranged read covering every page of the snapshot in this pack
+    start = min(entry[2] for _, entry in pages)
+    end = max(entry[3] for _, entry in pages)
+    data = target.get(key, start, end)
+    for index, (digest, _, offset, stop) in pages:
+        page = zlib.decompress(data[offset - start:stop - start])
+        if hashlib.sha256(page).hexdigest() != digest:
+            raise BackupError(f"Page {index} ({digest}) in {key} is corrupt")
+        with lock:
+            file.seek(index * page_size)
+            file.write(page)
+
+
+def restore(target, output, at=None, threads=RESTORE_THREADS):
+    """Rebuilds the snapshot `find_manifest(target, at)` at `output` and
+    returns its manifest. Packs are read `threads` at a time. Every page,
+    the whole file and PRAGMA integrity_check are verified before `output`
+    is replaced."""
+    manifest = find_manifest(target, at)
+    page_size = manifest["page_size"]
+    by_key = defaultdict(list)
+    for index, entry in enumerate(manifest["pages"]):
+        by_key[entry[1]].append((index, entry))
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + '.restoring')
+    try:
+        lock = threading.Lock()
+        with open(tmp, 'wb') as file:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                for future in [executor.submit(_restore_pack, target, key, pages, page_size, file, lock)
+                               for key, pages in by_key.items()]:
+                    future.result()
+            file.truncate(manifest["size"])
+        whole = hashlib.sha256()
+        with open(tmp, 'rb') as file:
+            while data := file.read(1024 * 1024):
+                whole.update(data)
+        if whole.hexdigest() != manifest["sha256"]:
+            raise BackupError(f"{manifest['name']} restored to a different file")
+        conn = sqlite3.connect(tmp)
+        try:
+            check = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if check != 'ok':
+            raise BackupError(f"{manifest['name']} failed integrity_check: {check}")
+        os.replace(tmp, output)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots and restores of the app database")
+    parser.add_argument("command", choices=("snapshot", "list", "restore", "verify"))
+    parser.add_argument("--target", default=os.getenv("BACKUP_TARGET"), required=os.getenv("BACKUP_TARGET") is None,
+                        help="s3://bucket/prefix or a directory (default: $BACKUP_TARGET)")
+    parser.add_argument("--at", type=datetime.fromisoformat, help="restore the last snapshot at or before this UTC time")
+    parser.add_argument("--output", help="file to restore into")
+    parser.add_argument("--store", choices=list(store_paths), help="store database to snapshot (default: $DATABASE_STREAMLIT_PATH)")
+    parser.add_argument("--all-stores", action="store_true", help="snapshot every store, each under <target>/<store>")
+    args = parser.parse_args()
+    target = open_target(args.target)
+
+    if args.command == "snapshot" and args.all_stores:
+        failed = []
+        for store, store_target in store_targets(args.target).items():
+            try:
+                manifest = snapshot(store_target, store_paths[store])
+                print(f"{store}: {manifest['name']}: {manifest['size']} bytes, {manifest['new_pages']} new pages "
+                      f"({manifest['stored_bytes']} bytes stored) in {manifest['duration_ms']} ms")
+            except (BackupError, sqlite3.Error, OSError) as e:
+                # One store failing doesn't keep the others from their backup
+                logger.error(f"Backup snapshot - Store {store} -> {str(e)}")
+                print(f"Backup snapshot of {store} failed: {e}")
+                failed.append(store)
+        sys.exit(1 if failed else 0)
+
+    try:
+        if args.command == "snapshot":
+            manifest = snapshot(target, store_paths.get(args.store))
+            print(f"{manifest['name']}: {manifest['size']} bytes, {len(manifest['pages'])} pages, "
+                  f"{manifest['new_pages']} new in {manifest['new_packs']} packs ({manifest['stored_bytes']} bytes stored) "
+                  f"in {manifest['duration_ms']} ms")
+        elif args.command == "list":
+            for name in manifests(target):
+                print(name)
+        elif args.command == "restore":
+            if not args.output:
+                parser.error("restore needs --output")
+            manifest = restore(target, args.output, args.at)
+            print(f"Restored {manifest['name']} to {args.output}")
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                manifest = restore(target, os.path.join(tmp, 'verify.db'), args.at)
+            print(f"{manifest['name']} verified")
+    except (BackupError, sqlite3.Error, OSError, zlib.error) as e:
+        logger.error(f"Backup {args.command} -> {str(e)}")
+        print(f"Backup {args.command} failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+from database.columnar import to_frame
+from database.connection import get_pool
+
+
+def _freeze(params):
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value) + sum(sys.getsizeof(row) + sum(sys.getsizeof(item) for item in row) for row in value)
+
+
+class QueryCache:
+    """LRU cache of query results keyed by (sql, params).
+
+    Each entry remembers the tables its query reads. Writes made through
+    `@log_function_calls` drop the entries of the tables they touch, and any
+    change of PRAGMA data_version made by another connection or process drops
+    everything."""
+
+    def __init__(self, pool, max_bytes=32 * 1024 * 1024):
+        self.pool = pool
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._tables = {}
+        self._generation = 0
+        # Bumped per table by invalidate() and for every table by _clear(), see version()
+        self._table_versions = {}
+        self._epoch = 0
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._data_version = None
+
+
+    def _data_version_changed(self):
+        # data_version of a connection only moves when *other* connections
+        # commit, so a dedicated connection sees every writer, local or not.
+        if self._watcher is None:
+            # The first pooled connection switches the file to WAL, which
+            # would read as a change if the watcher were opened before it.
+            with self.pool.connection():
+                pass
+            self._watcher = sqlite3.connect(self.pool.path, uri=True, check_same_thread=False)
+        version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        return changed
+
+
+    def _tables_read(self, conn, sql, params):
+        if sql not in self._tables:
+            tables = set()
+
+            def authorizer(action, table, column, database, source):
+                if action == sqlite3.SQLITE_READ and table:
+                    tables.add(table)
+                return sqlite3.SQLITE_OK
+
+            conn.set_authorizer(authorizer)
+            try:
+                conn.execute(f"EXPLAIN {sql}", params)
+            finally:
+                conn.set_authorizer(None)
+            self._tables[sql] = frozenset(tables)
+        return self._tables[sql]
+
+
+    def _fetch(self, key, sql, params, build):
+        with self._lock:
+            if self._data_version_changed():
+                self._clear()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        with self.pool.connection() as conn:
+            tables = self._tables_read(conn, sql, params)
+            value = build(conn.execute(sql, params))
+
+        with self._lock:
+            # A write landed while the query ran, the rows may be stale already
+            if generation == self._generation:
+                self._store(key, value, tables)
+        return value
+
+
+    def fetchall(self, sql, params=()):
+        return list(self._fetch((sql, _freeze(params)), sql, params, lambda cursor: cursor.fetchall()))
+
+
+    def fetch_frame(self, sql, params=(), columns=None, dtypes=None):
+        """Same as fetchall, as a typed DataFrame built by `to_frame`. Every
+        call gets its own copy, views are free to add or change columns."""
+        key = (sql, _freeze(params), tuple(columns or ()), _freeze(dtypes or {}))
+        frame = self._fetch(key, sql, params, lambda cursor: to_frame(cursor, columns, dtypes))
+        return frame.copy()
+
+
+    def _store(self, key, value, tables):
+        size = _size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[2]
+        self._entries[key] = (value, tables, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+
+    def invalidate(self, tables):
+        """Drops the entries that read any of `tables`. Called after a local
+        write, so the data_version bump it caused is taken as already seen."""
+        tables = set(tables)
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                self._table_versions[table] = self._table_versions.get(table, 0) + 1
+            for key in [key for key, (_, read, _) in self._entries.items() if read & tables]:
+                self._bytes -= self._entries.pop(key)[2]
+                self.invalidations += 1
+            self._data_version_changed()
+
+
+    def _clear(self):
+        self._generation += 1
+        self._epoch += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+
+    def version(self, tables):
+        """A value that changes whenever cached reads of `tables` would be
+        dropped: a local write to one of them, or a commit from another
+        connection. Lets read models kept outside the cache refresh on the
+        same signal."""
+        with self._lock:
+            if self._data_version_changed():
+                self._clear()
+            return (self._epoch, tuple(self._table_versions.get(table, 0) for table in tables))
+
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "entries": len(self._entries),
+                    "bytes": self._bytes,
+                    "evictions": self.evictions,
+                    "invalidations": self.invalidations}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path=None):
+    """Returns the process-wide result cache of a database file."""
+    pool = get_pool(path)
+    with _caches_lock:
+        if pool.path not in _caches:
+            _caches[pool.path] = QueryCache(pool)
+        return _caches[pool.path]
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import pandas_dtype
+
+
+def _column(values, dtype):
+    if dtype is None:
+        # Inferred as nullable Int64/Float64/boolean or Arrow-compatible string
+        return pd.array(values)
+    dtype = pandas_dtype(dtype)
+    if dtype.kind == "M":
+        return pd.to_datetime(pd.Index(values), format="ISO8601").as_unit("ns")
+    if isinstance(dtype, np.dtype):
+        return np.array(values, dtype=dtype)
+    return pd.array(values, dtype=dtype)
+
+
+def to_frame(cursor, columns=None, dtypes=None):
+    """Builds a DataFrame column by column from an executed cursor.
+
+    `columns` renames the result columns, in order, and defaults to the names
+    in the query. `dtypes` maps a column name to its dtype: NumPy names such as
+    "int64", "float64" (NULL becomes NaN) or "object", pandas ones such as
+    "Int64" or "string" for nullable columns, and "datetime64[ns]" for ISO
+    dates. Columns without a dtype are inferred.
+
+    Frames that go back to the database through `st.data_editor` should stick
+    to NumPy dtypes: sqlite3 can't bind pd.NA."""
+    columns = list(columns or (description[0] for description in cursor.description))
+    dtypes = dtypes or {}
+    rows = cursor.fetchall()
+    values = zip(*rows) if rows else [()] * len(columns)
+    # No columns= here: with it pandas routes the dict through an object
+    # Series and copies every array element by element
+    return pd.DataFrame({name: _column(column, dtypes.get(name)) for name, column in zip(columns, values)}, copy=False)
@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from database.path import db_path
+
+
+class ConnectionPool:
+    """Keeps idle SQLite connections around so every controller call
+    reuses an already tuned connection instead of paying sqlite3.connect."""
+
+    pragmas = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    }
+
+    def __init__(self, path, max_idle=4, cached_statements=256):
+        self.path = path
+        self.max_idle = max_idle
+        self.cached_statements = cached_statements
+        self.hits = 0
+        self.misses = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+
+    def _open(self):
+        conn = sqlite3.connect(self.path,
+                               timeout=self.pragmas["busy_timeout"] / 1000,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False,
+                               uri=True)
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+        return self._open()
+
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the current thread. Nested calls on
+        the same thread get the connection that is already checked out."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn, self._local.depth = conn, 1
+        try:
+            yield conn
+        finally:
+            self._local.conn, self._local.depth = None, 0
+            self._release(conn)
+
+
+    @contextmanager
+    def transaction(self):
+        """Commits when the block succeeds and rolls back when it raises,
+        same as `with sqlite3.connect(...)`. Only the outermost transaction
+        block commits, even when it runs inside a plain `connection()` block."""
+        with self.connection() as conn:
+            depth = getattr(self._local, "transactions", 0)
+            self._local.transactions = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                if not depth:
+                    conn.rollback()
+                raise
+            else:
+                if not depth:
+                    conn.commit()
+            finally:
+                self._local.transactions = depth
+
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "idle": len(self._idle),
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Returns the process-wide pool for a database file."""
+    path = path or db_path
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
@@ -0,0 +1,100 @@
+import sqlite3
+import sys
+from pathlib import Path
+from database.path import db_path, store_name, store_paths
+from sql.catalog import catalog
+from utils.logger import logger
+
+DATABASE_DIR = Path(__file__).resolve().parent
+MIGRATIONS_DIR = DATABASE_DIR / "migrations"
+SCHEMA_FILE = DATABASE_DIR / "schema.sql"
+
+# user_version a brand new database is at right after schema.sql
+SCHEMA_VERSION = 3
+
+
+def _has_table(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def _column_default(conn, table, column):
+    for _, name, _, _, default, _ in conn.execute(f"PRAGMA table_info({table})"):
+        if name == column:
+            return default
+    return None
+
+
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+# Migrations 0001-0003 were the features/ scripts applied by hand before this
+# runner existed. A database still at user_version 0 may already have them, so
+# they are only stamped when their change is found in the schema.
+legacy_probes = {
+    1: lambda conn: _column_default(conn, "suppliers_products", "current_price") == "0",
+    2: lambda conn: _has_column(conn, "balance", "period"),
+    3: lambda conn: _has_table(conn, "products_history"),
+}
+
+
+def migrations():
+    return sorted((int(path.name.split("_", 1)[0]), path) for path in MIGRATIONS_DIR.glob("*.sql"))
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _apply(conn, script, version):
+    try:
+        conn.executescript(f"BEGIN;\n{script}\n;PRAGMA user_version = {version};\nCOMMIT;")
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def migrate(path=None):
+    """Brings the database to the latest migration and returns the list of
+    versions applied. A missing or empty database is created from schema.sql."""
+    conn = sqlite3.connect(path or db_path, isolation_level=None, uri=True)
+    applied = []
+    try:
+        version = current_version(conn)
+        legacy = version == 0 and _has_table(conn, "users")
+        if version == 0 and not legacy:
+            _apply(conn, SCHEMA_FILE.read_text(encoding="utf-8"), SCHEMA_VERSION)
+            version = SCHEMA_VERSION
+            applied.append(version)
+
+        for number, migration in migrations():
+            if number <= version:
+                continue
+            if legacy and number in legacy_probes and legacy_probes[number](conn):
+                _apply(conn, "", number)
+            else:
+                _apply(conn, migration.read_text(encoding="utf-8"), number)
+                applied.append(number)
+            version = number
+
+        conn.execute("PRAGMA optimize")
+        for name, error in catalog.check(conn).items():
+            logger.error(f"SQL Catalog - {name} -> {error}")
+        return applied
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    # Every store database, see database.path.store_paths, and db_path, which
+    # holds the process-wide tables (metrics snapshots) when it isn't a store
+    for path in dict.fromkeys([*store_paths.values(), db_path]):
+        store = store_name(path)
+        try:
+            applied = migrate(path)
+        except sqlite3.Error as e:
+            logger.error(f"Migrate Database - Store {store} -> {str(e)}")
+            print(f"Migration of {store} failed: {e}")
+            sys.exit(1)
+        print(f"{store}: database at version {migrations()[-1][0]}, applied: {applied or 'none'}")
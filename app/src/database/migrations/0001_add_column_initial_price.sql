@@ -1,5 +1,3 @@
-BEGIN TRANSACTION;
-
 CREATE TABLE suppliers_products_new (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     supplier_id INTEGER NOT NULL,
@@ -21,5 +19,3 @@ FROM suppliers_products;
 DROP TABLE suppliers_products;
 
 ALTER TABLE suppliers_products_new RENAME TO suppliers_products;
-
-COMMIT;
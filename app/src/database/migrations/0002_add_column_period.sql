@@ -1,5 +1,3 @@
-BEGIN TRANSACTION;
-
 -- Add the new column
 ALTER TABLE balance ADD COLUMN period TEXT;
 
@@ -28,5 +26,3 @@ DROP TABLE balance;
 
 -- Rename the new table to the original table name
 ALTER TABLE balance_new RENAME TO balance;
-
-COMMIT;
@@ -0,0 +1,42 @@
+-- Indexes for the controller queries. Each block shows EXPLAIN QUERY PLAN of the
+-- query it serves, before and after the index (orders plans measured with 50k orders).
+--
+-- Not needed:
+--   attendance (user_id, type, date) -> get_attendance_by_type_and_date, modify_attendance
+--   and delete_attendance already use sqlite_autoindex_attendance_1 from UNIQUE (user_id, type, date).
+--   balance (date, period) -> get_closing_values and update_closing_balance already use
+--   sqlite_autoindex_balance_1 from UNIQUE (date, period).
+
+
+-- sql/attendance/get_attendance_by_periods.sql (WHERE date BETWEEN :start_date AND :end_date)
+--   before: SCAN attendance
+--   after:  SEARCH attendance USING COVERING INDEX idx_attendance_date (date>? AND date<?)
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date, user_id, type, time);
+
+
+-- sql/caixa/get_reporting_balance.sql (WHERE date >= :date)
+--   before: SEARCH b USING INDEX sqlite_autoindex_balance_1 (date>?)
+--   after:  SEARCH b USING COVERING INDEX idx_balance_date_values (date>?)
+CREATE INDEX IF NOT EXISTS idx_balance_date_values ON balance (date, period, card_value, pix_value, money_value);
+
+
+-- sql/stock/get_pending_orders_items.sql and the pending_orders CTE of
+-- sql/stock/get_lowest_current_price.sql (WHERE o.status = 'Pendente')
+--   before: SCAN oi / SEARCH o USING INTEGER PRIMARY KEY (rowid=?)
+--   after:  SCAN o USING INDEX idx_orders_pending
+--           SEARCH oi USING COVERING INDEX idx_orders_items_order_product (order_id=?)
+CREATE INDEX IF NOT EXISTS idx_orders_pending ON orders (id, supplier_id, order_date) WHERE status = 'Pendente';
+CREATE INDEX IF NOT EXISTS idx_orders_items_order_product ON orders_items (order_id, product_id);
+
+
+-- sql/stock/get_lowest_current_price.sql (LEFT JOIN orders_items oi ON must_buy.id = oi.product_id)
+--   before: SEARCH oi USING AUTOMATIC COVERING INDEX (product_id=?) LEFT-JOIN
+--   after:  SEARCH oi USING COVERING INDEX idx_orders_items_product_order (product_id=?) LEFT-JOIN
+CREATE INDEX IF NOT EXISTS idx_orders_items_product_order ON orders_items (product_id, order_id, unit_price);
+
+
+-- trg_products_history_update, fired by sql/stock/update_stock_qt.sql
+-- (UPDATE products_history ... WHERE id = OLD.id AND valid_to IS NULL)
+--   before: SCAN products_history
+--   after:  SEARCH products_history USING INDEX idx_products_history_id_valid_to (id=? AND valid_to=?)
+CREATE INDEX IF NOT EXISTS idx_products_history_id_valid_to ON products_history (id, valid_to);
@@ -0,0 +1,4 @@
+-- Audit rows are written after the controller call returns, so they can tell
+-- how long it took and whether it worked ('Sucesso' / 'Erro').
+ALTER TABLE logs ADD COLUMN duration_ms REAL;
+ALTER TABLE logs ADD COLUMN status TEXT;
@@ -0,0 +1,16 @@
+-- Periodic copies of the in-memory controller metrics (utils/metrics.py).
+-- Counters are cumulative since the process started.
+CREATE TABLE metrics_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken_at TEXT,
+    controller TEXT,
+    method TEXT,
+    calls INTEGER,
+    errors INTEGER,
+    rows_returned INTEGER,
+    p50_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL
+);
+
+CREATE INDEX idx_metrics_snapshots_method ON metrics_snapshots (method, id);
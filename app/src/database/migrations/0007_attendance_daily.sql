@@ -0,0 +1,89 @@
+-- Worked time per employee and day, kept in step with the raw punches.
+--
+-- attendance_daily_view computes a day from its punches. The triggers below
+-- re-materialize only the (user_id, date) touched by a write; the WHERE on
+-- the grouping columns is pushed down into the view, so each trigger reads
+-- just that day:
+--   SEARCH attendance USING COVERING INDEX idx_attendance_date (date=? AND user_id=?)
+--
+-- A day is Entrada, Entrada Almoço (lunch starts), Saída Almoço (lunch ends)
+-- and Saída.
+-- worked_minutes: (Entrada Almoço - Entrada) + (Saída - Saída Almoço) on a
+-- complete day, Saída - Entrada on a day without lunch punches, else NULL.
+-- break_minutes: Saída Almoço - Entrada Almoço when both exist.
+
+CREATE TABLE attendance_daily (
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    entrada INTEGER,
+    saida_almoco INTEGER,
+    entrada_almoco INTEGER,
+    saida INTEGER,
+    worked_minutes INTEGER,
+    break_minutes INTEGER,
+    punches INTEGER NOT NULL,
+    is_complete INTEGER NOT NULL,
+    missing_lunch INTEGER NOT NULL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+
+-- Payroll reads a month for every employee
+CREATE INDEX idx_attendance_daily_date ON attendance_daily (date, user_id, worked_minutes, break_minutes, is_complete);
+
+CREATE VIEW attendance_daily_view AS
+WITH minutes AS (
+    SELECT
+        user_id,
+        date,
+        MAX(CASE WHEN type = 'Entrada' THEN CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER) END) AS entrada,
+        MAX(CASE WHEN type = 'Saída Almoço' THEN CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER) END) AS saida_almoco,
+        MAX(CASE WHEN type = 'Entrada Almoço' THEN CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER) END) AS entrada_almoco,
+        MAX(CASE WHEN type = 'Saída' THEN CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER) END) AS saida,
+        COUNT(*) AS punches
+    FROM attendance
+    GROUP BY user_id, date
+)
+SELECT
+    user_id,
+    date,
+    entrada,
+    saida_almoco,
+    entrada_almoco,
+    saida,
+    CASE
+        WHEN entrada IS NOT NULL AND saida_almoco IS NOT NULL AND entrada_almoco IS NOT NULL AND saida IS NOT NULL
+            THEN (entrada_almoco - entrada) + (saida - saida_almoco)
+        WHEN entrada IS NOT NULL AND saida IS NOT NULL AND saida_almoco IS NULL AND entrada_almoco IS NULL
+            THEN saida - entrada
+    END AS worked_minutes,
+    saida_almoco - entrada_almoco AS break_minutes,
+    punches,
+    entrada IS NOT NULL AND saida_almoco IS NOT NULL AND entrada_almoco IS NOT NULL AND saida IS NOT NULL AS is_complete,
+    saida_almoco IS NULL OR entrada_almoco IS NULL AS missing_lunch
+FROM minutes;
+
+INSERT INTO attendance_daily SELECT * FROM attendance_daily_view;
+
+CREATE TRIGGER trg_attendance_daily_insert
+AFTER INSERT ON attendance
+BEGIN
+    INSERT OR REPLACE INTO attendance_daily
+    SELECT * FROM attendance_daily_view WHERE user_id = NEW.user_id AND date = NEW.date;
+END;
+
+CREATE TRIGGER trg_attendance_daily_update
+AFTER UPDATE OF user_id, date, type, time ON attendance
+BEGIN
+    DELETE FROM attendance_daily WHERE user_id = OLD.user_id AND date = OLD.date;
+    INSERT OR REPLACE INTO attendance_daily
+    SELECT * FROM attendance_daily_view
+    WHERE (user_id = OLD.user_id AND date = OLD.date) OR (user_id = NEW.user_id AND date = NEW.date);
+END;
+
+CREATE TRIGGER trg_attendance_daily_delete
+AFTER DELETE ON attendance
+BEGIN
+    DELETE FROM attendance_daily WHERE user_id = OLD.user_id AND date = OLD.date;
+    INSERT INTO attendance_daily
+    SELECT * FROM attendance_daily_view WHERE user_id = OLD.user_id AND date = OLD.date;
+END;
@@ -0,0 +1,152 @@
+-- Daily and monthly cash-closing totals, kept in step with balance.
+--
+-- acc_money is the running cash total: every money_value closed up to and
+-- including that day (or month). Cash taken in over any range is then
+-- acc_money at its last day minus acc_money before its first day, two seeks on
+-- the primary key instead of a SUM() OVER window across every closing.
+--
+-- The triggers treat an update as removing OLD and adding NEW. A closing only
+-- shifts acc_money of the days/months after it, so today's closing touches a
+-- single row of each table.
+
+CREATE TABLE balance_daily (
+    date TEXT PRIMARY KEY,
+    card_value REAL NOT NULL,
+    pix_value REAL NOT NULL,
+    money_value REAL NOT NULL,
+    closings INTEGER NOT NULL,
+    acc_money REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE balance_monthly (
+    month TEXT PRIMARY KEY,
+    card_value REAL NOT NULL,
+    pix_value REAL NOT NULL,
+    money_value REAL NOT NULL,
+    closings INTEGER NOT NULL,
+    acc_money REAL NOT NULL
+) WITHOUT ROWID;
+
+INSERT INTO balance_daily
+SELECT
+    date,
+    SUM(COALESCE(card_value, 0)),
+    SUM(COALESCE(pix_value, 0)),
+    SUM(COALESCE(money_value, 0)),
+    COUNT(*),
+    SUM(SUM(COALESCE(money_value, 0))) OVER (ORDER BY date)
+FROM balance
+WHERE date IS NOT NULL
+GROUP BY date;
+
+INSERT INTO balance_monthly
+SELECT
+    substr(date, 1, 7),
+    SUM(card_value),
+    SUM(pix_value),
+    SUM(money_value),
+    SUM(closings),
+    SUM(SUM(money_value)) OVER (ORDER BY substr(date, 1, 7))
+FROM balance_daily
+GROUP BY substr(date, 1, 7);
+
+CREATE TRIGGER trg_balance_rollups_insert
+AFTER INSERT ON balance
+WHEN NEW.date IS NOT NULL
+BEGIN
+    INSERT INTO balance_daily
+    VALUES (NEW.date, COALESCE(NEW.card_value, 0), COALESCE(NEW.pix_value, 0), COALESCE(NEW.money_value, 0), 1,
+            COALESCE((SELECT acc_money FROM balance_daily WHERE date < NEW.date ORDER BY date DESC LIMIT 1), 0)
+            + COALESCE(NEW.money_value, 0))
+    ON CONFLICT (date) DO UPDATE SET
+        card_value = card_value + excluded.card_value,
+        pix_value = pix_value + excluded.pix_value,
+        money_value = money_value + excluded.money_value,
+        closings = closings + 1,
+        acc_money = acc_money + excluded.money_value;
+    UPDATE balance_daily SET acc_money = acc_money + COALESCE(NEW.money_value, 0) WHERE date > NEW.date;
+
+    INSERT INTO balance_monthly
+    VALUES (substr(NEW.date, 1, 7), COALESCE(NEW.card_value, 0), COALESCE(NEW.pix_value, 0), COALESCE(NEW.money_value, 0), 1,
+            COALESCE((SELECT acc_money FROM balance_monthly WHERE month < substr(NEW.date, 1, 7) ORDER BY month DESC LIMIT 1), 0)
+            + COALESCE(NEW.money_value, 0))
+    ON CONFLICT (month) DO UPDATE SET
+        card_value = card_value + excluded.card_value,
+        pix_value = pix_value + excluded.pix_value,
+        money_value = money_value + excluded.money_value,
+        closings = closings + 1,
+        acc_money = acc_money + excluded.money_value;
+    UPDATE balance_monthly SET acc_money = acc_money + COALESCE(NEW.money_value, 0) WHERE month > substr(NEW.date, 1, 7);
+END;
+
+CREATE TRIGGER trg_balance_rollups_remove
+AFTER DELETE ON balance
+WHEN OLD.date IS NOT NULL
+BEGIN
+    UPDATE balance_daily SET
+        card_value = card_value - COALESCE(OLD.card_value, 0),
+        pix_value = pix_value - COALESCE(OLD.pix_value, 0),
+        money_value = money_value - COALESCE(OLD.money_value, 0),
+        closings = closings - 1
+    WHERE date = OLD.date;
+    UPDATE balance_daily SET acc_money = acc_money - COALESCE(OLD.money_value, 0) WHERE date >= OLD.date;
+    DELETE FROM balance_daily WHERE date = OLD.date AND closings = 0;
+
+    UPDATE balance_monthly SET
+        card_value = card_value - COALESCE(OLD.card_value, 0),
+        pix_value = pix_value - COALESCE(OLD.pix_value, 0),
+        money_value = money_value - COALESCE(OLD.money_value, 0),
+        closings = closings - 1
+    WHERE month = substr(OLD.date, 1, 7);
+    UPDATE balance_monthly SET acc_money = acc_money - COALESCE(OLD.money_value, 0) WHERE month >= substr(OLD.date, 1, 7);
+    DELETE FROM balance_monthly WHERE month = substr(OLD.date, 1, 7) AND closings = 0;
+END;
+
+-- update_closing_balance: the same two steps, OLD out then NEW in
+CREATE TRIGGER trg_balance_rollups_update
+AFTER UPDATE OF date, card_value, pix_value, money_value ON balance
+BEGIN
+    UPDATE balance_daily SET
+        card_value = card_value - COALESCE(OLD.card_value, 0),
+        pix_value = pix_value - COALESCE(OLD.pix_value, 0),
+        money_value = money_value - COALESCE(OLD.money_value, 0),
+        closings = closings - 1
+    WHERE date = OLD.date;
+    UPDATE balance_daily SET acc_money = acc_money - COALESCE(OLD.money_value, 0) WHERE date >= OLD.date;
+    DELETE FROM balance_daily WHERE date = OLD.date AND closings = 0;
+
+    UPDATE balance_monthly SET
+        card_value = card_value - COALESCE(OLD.card_value, 0),
+        pix_value = pix_value - COALESCE(OLD.pix_value, 0),
+        money_value = money_value - COALESCE(OLD.money_value, 0),
+        closings = closings - 1
+    WHERE month = substr(OLD.date, 1, 7);
+    UPDATE balance_monthly SET acc_money = acc_money - COALESCE(OLD.money_value, 0) WHERE month >= substr(OLD.date, 1, 7);
+    DELETE FROM balance_monthly WHERE month = substr(OLD.date, 1, 7) AND closings = 0;
+
+    INSERT INTO balance_daily
+    SELECT NEW.date, COALESCE(NEW.card_value, 0), COALESCE(NEW.pix_value, 0), COALESCE(NEW.money_value, 0), 1,
+           COALESCE((SELECT acc_money FROM balance_daily WHERE date < NEW.date ORDER BY date DESC LIMIT 1), 0)
+           + COALESCE(NEW.money_value, 0)
+    WHERE NEW.date IS NOT NULL
+    ON CONFLICT (date) DO UPDATE SET
+        card_value = card_value + excluded.card_value,
+        pix_value = pix_value + excluded.pix_value,
+        money_value = money_value + excluded.money_value,
+        closings = closings + 1,
+        acc_money = acc_money + excluded.money_value;
+    UPDATE balance_daily SET acc_money = acc_money + COALESCE(NEW.money_value, 0) WHERE date > NEW.date;
+
+    INSERT INTO balance_monthly
+    SELECT substr(NEW.date, 1, 7), COALESCE(NEW.card_value, 0), COALESCE(NEW.pix_value, 0), COALESCE(NEW.money_value, 0), 1,
+           COALESCE((SELECT acc_money FROM balance_monthly WHERE month < substr(NEW.date, 1, 7) ORDER BY month DESC LIMIT 1), 0)
+           + COALESCE(NEW.money_value, 0)
+    WHERE NEW.date IS NOT NULL
+    ON CONFLICT (month) DO UPDATE SET
+        card_value = card_value + excluded.card_value,
+        pix_value = pix_value + excluded.pix_value,
+        money_value = money_value + excluded.money_value,
+        closings = closings + 1,
+        acc_money = acc_money + excluded.money_value;
+    UPDATE balance_monthly SET acc_money = acc_money + COALESCE(NEW.money_value, 0) WHERE month > substr(NEW.date, 1, 7);
+END;
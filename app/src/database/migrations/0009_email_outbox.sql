@@ -0,0 +1,21 @@
+-- Emails waiting to be sent by the outbox worker (utils/outbox.py).
+-- A row is written in the same transaction as the change it reports, so a
+-- closing is never saved without its email, and the SMTP round trip happens
+-- later on the worker thread.
+--
+-- status: pending -> sent, or failed after max_attempts. next_attempt_at
+-- (UTC) holds the digest window for new rows and the backoff after errors.
+CREATE TABLE email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    next_attempt_at TEXT NOT NULL,
+    sent_at TEXT,
+    last_error TEXT
+);
+
+CREATE INDEX idx_email_outbox_pending ON email_outbox (next_attempt_at, id) WHERE status = 'pending';
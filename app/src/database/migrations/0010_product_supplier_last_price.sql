@@ -0,0 +1,88 @@
+-- Last order of each product from each supplier, for the purchase
+-- recommendations (sql/stock/get_lowest_current_price.sql).
+--
+-- last_order_date/last_unit_price: the latest order that wasn't cancelled.
+-- last_delivery_date: the latest delivered one. pending_orders: orders still
+-- 'Pendente'. A pair whose orders were all cancelled has no row.
+--
+-- Items added by create_order are folded in by an upsert. A status change
+-- (update_order_status, cancel_order) recomputes the pairs of that order,
+-- each from the orders of one product:
+--   SEARCH i USING COVERING INDEX idx_orders_items_product_order (product_id=?)
+
+CREATE TABLE product_supplier_last_price (
+    product_id INTEGER NOT NULL,
+    supplier_id INTEGER NOT NULL,
+    last_order_date TEXT NOT NULL,
+    last_unit_price REAL NOT NULL,
+    last_delivery_date TEXT,
+    pending_orders INTEGER NOT NULL,
+    PRIMARY KEY (product_id, supplier_id)
+) WITHOUT ROWID;
+
+-- The recommendation joins the active suppliers of a product
+--   before: SCAN sp
+--   after:  SEARCH sp USING COVERING INDEX idx_suppliers_products_product (product_id=? AND status=?)
+CREATE INDEX IF NOT EXISTS idx_suppliers_products_product ON suppliers_products (product_id, status, current_price, supplier_id);
+
+INSERT INTO product_supplier_last_price
+SELECT product_id, supplier_id, order_date, unit_price, last_delivery_date, pending_orders
+FROM (
+    SELECT
+        oi.product_id,
+        o.supplier_id,
+        o.order_date,
+        oi.unit_price,
+        MAX(CASE WHEN o.status = 'Entregue' THEN o.delivery_date END) OVER pair AS last_delivery_date,
+        SUM(o.status = 'Pendente') OVER pair AS pending_orders,
+        ROW_NUMBER() OVER (pair ORDER BY o.order_date DESC, o.id DESC) AS rn
+    FROM orders_items oi
+    JOIN orders o ON o.id = oi.order_id
+    WHERE o.status != 'Cancelado'
+    WINDOW pair AS (PARTITION BY oi.product_id, o.supplier_id)
+)
+WHERE rn = 1;
+
+CREATE TRIGGER trg_product_supplier_last_price_item
+AFTER INSERT ON orders_items
+BEGIN
+    INSERT INTO product_supplier_last_price
+    SELECT NEW.product_id, o.supplier_id, o.order_date, NEW.unit_price,
+           CASE WHEN o.status = 'Entregue' THEN o.delivery_date END, o.status = 'Pendente'
+    FROM orders o
+    WHERE o.id = NEW.order_id AND o.status != 'Cancelado'
+    ON CONFLICT (product_id, supplier_id) DO UPDATE SET
+        last_unit_price = CASE WHEN excluded.last_order_date >= last_order_date THEN excluded.last_unit_price ELSE last_unit_price END,
+        last_order_date = MAX(last_order_date, excluded.last_order_date),
+        last_delivery_date = COALESCE(MAX(last_delivery_date, excluded.last_delivery_date), last_delivery_date, excluded.last_delivery_date),
+        pending_orders = pending_orders + excluded.pending_orders;
+END;
+
+CREATE TRIGGER trg_product_supplier_last_price_order
+AFTER UPDATE OF status, order_date, delivery_date, supplier_id ON orders
+BEGIN
+    DELETE FROM product_supplier_last_price
+    WHERE supplier_id IN (OLD.supplier_id, NEW.supplier_id)
+    AND product_id IN (SELECT product_id FROM orders_items WHERE order_id = OLD.id);
+
+    INSERT OR REPLACE INTO product_supplier_last_price
+    SELECT product_id, supplier_id, last_order_date, last_unit_price, last_delivery_date, pending_orders
+    FROM (
+        SELECT
+            oi.product_id,
+            s.supplier_id,
+            (SELECT o.order_date FROM orders_items i JOIN orders o ON o.id = i.order_id
+             WHERE i.product_id = oi.product_id AND o.supplier_id = s.supplier_id AND o.status != 'Cancelado'
+             ORDER BY o.order_date DESC, o.id DESC LIMIT 1) AS last_order_date,
+            (SELECT i.unit_price FROM orders_items i JOIN orders o ON o.id = i.order_id
+             WHERE i.product_id = oi.product_id AND o.supplier_id = s.supplier_id AND o.status != 'Cancelado'
+             ORDER BY o.order_date DESC, o.id DESC LIMIT 1) AS last_unit_price,
+            (SELECT MAX(o.delivery_date) FROM orders_items i JOIN orders o ON o.id = i.order_id
+             WHERE i.product_id = oi.product_id AND o.supplier_id = s.supplier_id AND o.status = 'Entregue') AS last_delivery_date,
+            (SELECT COUNT(*) FROM orders_items i JOIN orders o ON o.id = i.order_id
+             WHERE i.product_id = oi.product_id AND o.supplier_id = s.supplier_id AND o.status = 'Pendente') AS pending_orders
+        FROM orders_items oi, (SELECT OLD.supplier_id AS supplier_id UNION SELECT NEW.supplier_id) s
+        WHERE oi.order_id = OLD.id
+    )
+    WHERE last_order_date IS NOT NULL;
+END;
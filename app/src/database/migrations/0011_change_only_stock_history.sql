@@ -0,0 +1,85 @@
+-- products_history only records real changes of the stock count.
+--
+-- update_stock_qt saves the whole grid, so the old trigger closed and
+-- reopened the interval of every product on every count, unchanged or not.
+-- The WHEN clause skips those; the UPDATE of the open interval uses
+-- idx_products_history_id_valid_to (0004):
+--   SEARCH products_history USING INDEX idx_products_history_id_valid_to (id=? AND valid_to=?)
+DROP TRIGGER IF EXISTS trg_products_history_update;
+
+CREATE TRIGGER trg_products_history_update
+AFTER UPDATE OF current_stock_in_units ON products
+FOR EACH ROW
+WHEN NEW.current_stock_in_units IS NOT OLD.current_stock_in_units
+BEGIN
+    -- Mark the previous record in products_history as no longer valid
+    UPDATE products_history
+    SET valid_to = CURRENT_TIMESTAMP
+    WHERE id = OLD.id AND valid_to IS NULL;
+
+    -- Insert the new historical record
+    INSERT INTO products_history (id, description, stock_in_units, valid_from, valid_to)
+    VALUES (NEW.id, NEW.description, NEW.current_stock_in_units, CURRENT_TIMESTAMP, NULL);
+END;
+
+-- A new product opens its first interval, so stock_as_of knows it from the start
+CREATE TRIGGER trg_products_history_insert
+AFTER INSERT ON products
+FOR EACH ROW
+BEGIN
+    INSERT INTO products_history (id, description, stock_in_units, valid_from, valid_to)
+    VALUES (NEW.id, NEW.description, NEW.current_stock_in_units, CURRENT_TIMESTAMP, NULL);
+END;
+
+INSERT INTO products_history (id, description, stock_in_units, valid_from, valid_to)
+SELECT p.id, p.description, p.current_stock_in_units, CURRENT_TIMESTAMP, NULL
+FROM products p
+WHERE NOT EXISTS (SELECT 1 FROM products_history h WHERE h.id = p.id AND h.valid_to IS NULL);
+
+-- sql/stock/get_stock_as_of.sql (the last interval of each product starting at or before :at)
+--   before: SCAN products_history
+--   after:  SEARCH products_history USING INDEX idx_products_history_id_valid_from (id=? AND valid_from<?)
+CREATE INDEX IF NOT EXISTS idx_products_history_id_valid_from ON products_history (id, valid_from);
+
+-- The rows the old trigger wrote for unchanged counts are merged once here,
+-- the same way StockController.compact_stock_history does
+-- (sql/stock/delete_empty_products_history.sql, merge_products_history.sql and
+-- delete_merged_products_history.sql).
+DELETE FROM products_history WHERE valid_to = valid_from;
+
+WITH changes AS (
+    SELECT rowid AS row_id, id, valid_from, valid_to,
+           ROW_NUMBER() OVER w = 1 OR LAG(stock_in_units) OVER w IS NOT stock_in_units
+               OR LAG(description) OVER w IS NOT description AS starts_run
+    FROM products_history
+    WINDOW w AS (PARTITION BY id ORDER BY valid_from, rowid)
+),
+runs AS (
+    SELECT row_id, id, valid_to, starts_run,
+           SUM(starts_run) OVER (PARTITION BY id ORDER BY valid_from, row_id) AS run
+    FROM changes
+),
+merged AS (
+    SELECT MAX(CASE WHEN starts_run THEN row_id END) AS row_id,
+           CASE WHEN COUNT(valid_to) < COUNT(*) THEN NULL ELSE MAX(valid_to) END AS valid_to
+    FROM runs
+    GROUP BY id, run
+    HAVING COUNT(*) > 1
+)
+UPDATE products_history
+SET valid_to = merged.valid_to
+FROM merged
+WHERE products_history.rowid = merged.row_id;
+
+DELETE FROM products_history
+WHERE rowid IN (
+    SELECT row_id
+    FROM (
+        SELECT rowid AS row_id,
+               ROW_NUMBER() OVER w = 1 OR LAG(stock_in_units) OVER w IS NOT stock_in_units
+                   OR LAG(description) OVER w IS NOT description AS starts_run
+        FROM products_history
+        WINDOW w AS (PARTITION BY id ORDER BY valid_from, rowid)
+    )
+    WHERE NOT starts_run
+);
@@ -0,0 +1,4 @@
+-- sql/stock/get_product_history_page.sql (every product, newest change first, keyset by (valid_from, id))
+--   before: SCAN h / USE TEMP B-TREE FOR ORDER BY
+--   after:  SEARCH h USING INDEX idx_products_history_valid_from (valid_from>? AND valid_from<?)
+CREATE INDEX IF NOT EXISTS idx_products_history_valid_from ON products_history (valid_from, id);
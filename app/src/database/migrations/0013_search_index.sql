@@ -0,0 +1,119 @@
+-- Full-text search over products, suppliers, employees and closing notes
+-- (sql/search/search.sql).
+--
+-- One FTS5 table holds every kind. Its rowid is the source id times 4 plus
+-- the kind (0 products, 1 suppliers, 2 users, 3 balance), so the triggers
+-- below find the row of a source without an index of their own.
+-- remove_diacritics 2 folds accents, so "acucar" finds "AÇUCAR"; prefix
+-- indexes of 2 and 3 characters keep "fa*" or "far*" from scanning the
+-- whole term list.
+CREATE VIRTUAL TABLE search_index USING fts5(
+    kind UNINDEXED,
+    ref_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER trg_search_products_insert
+AFTER INSERT ON products
+BEGIN
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.id * 4, 'products', NEW.id, NEW.description, NEW.package_type);
+END;
+
+CREATE TRIGGER trg_search_products_update
+AFTER UPDATE OF description, package_type ON products
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 4;
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.id * 4, 'products', NEW.id, NEW.description, NEW.package_type);
+END;
+
+CREATE TRIGGER trg_search_products_delete
+AFTER DELETE ON products
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 4;
+END;
+
+CREATE TRIGGER trg_search_suppliers_insert
+AFTER INSERT ON suppliers
+BEGIN
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.id * 4 + 1, 'suppliers', NEW.id, NEW.description, NULL);
+END;
+
+CREATE TRIGGER trg_search_suppliers_update
+AFTER UPDATE OF description ON suppliers
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.id * 4 + 1, 'suppliers', NEW.id, NEW.description, NULL);
+END;
+
+CREATE TRIGGER trg_search_suppliers_delete
+AFTER DELETE ON suppliers
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+END;
+
+CREATE TRIGGER trg_search_users_insert
+AFTER INSERT ON users
+BEGIN
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.numero_identificacao * 4 + 2, 'users', NEW.numero_identificacao, NEW.complete_name,
+            COALESCE(NEW.role || ' • ' || NEW.observation, NEW.role, NEW.observation));
+END;
+
+CREATE TRIGGER trg_search_users_update
+AFTER UPDATE OF numero_identificacao, complete_name, role, observation ON users
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.numero_identificacao * 4 + 2;
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.numero_identificacao * 4 + 2, 'users', NEW.numero_identificacao, NEW.complete_name,
+            COALESCE(NEW.role || ' • ' || NEW.observation, NEW.role, NEW.observation));
+END;
+
+CREATE TRIGGER trg_search_users_delete
+AFTER DELETE ON users
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.numero_identificacao * 4 + 2;
+END;
+
+-- Closings are only indexed when they have a note
+CREATE TRIGGER trg_search_balance_insert
+AFTER INSERT ON balance
+WHEN trim(NEW.observation) <> ''
+BEGIN
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    VALUES (NEW.id * 4 + 3, 'balance', NEW.id, NEW.date, NEW.observation);
+END;
+
+CREATE TRIGGER trg_search_balance_update
+AFTER UPDATE OF date, observation ON balance
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3;
+    INSERT INTO search_index (rowid, kind, ref_id, title, body)
+    SELECT NEW.id * 4 + 3, 'balance', NEW.id, NEW.date, NEW.observation
+    WHERE trim(NEW.observation) <> '';
+END;
+
+CREATE TRIGGER trg_search_balance_delete
+AFTER DELETE ON balance
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 4 + 3;
+END;
+
+INSERT INTO search_index (rowid, kind, ref_id, title, body)
+SELECT id * 4, 'products', id, description, package_type FROM products;
+
+INSERT INTO search_index (rowid, kind, ref_id, title, body)
+SELECT id * 4 + 1, 'suppliers', id, description, NULL FROM suppliers;
+
+INSERT INTO search_index (rowid, kind, ref_id, title, body)
+SELECT numero_identificacao * 4 + 2, 'users', numero_identificacao, complete_name, COALESCE(role || ' • ' || observation, role, observation)
+FROM users;
+
+INSERT INTO search_index (rowid, kind, ref_id, title, body)
+SELECT id * 4 + 3, 'balance', id, date, observation FROM balance WHERE trim(observation) <> '';
@@ -0,0 +1,6 @@
+-- Metrics are kept per store (utils/metrics.py); the snapshots of every store
+-- go to the process-wide database, so they say which store they belong to.
+ALTER TABLE metrics_snapshots ADD COLUMN store TEXT;
+
+DROP INDEX idx_metrics_snapshots_method;
+CREATE INDEX idx_metrics_snapshots_method ON metrics_snapshots (method, store, id);
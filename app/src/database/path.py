@@ -1,3 +1,30 @@
 import os
 
-db_path = os.getenv("DATABASE_STREAMLIT_PATH")
+
+def parse_stores(value):
+    """`Centro=/app/data/centro.db;Aldeota=/app/data/aldeota.db` as
+    {store: path}, in the order given."""
+    stores = {}
+    for entry in filter(None, (entry.strip() for entry in (value or "").split(";"))):
+        name, separator, path = entry.partition("=")
+        if not separator or not name.strip() or not path.strip():
+            raise ValueError(f"DATABASE_STORES entry {entry!r} is not store=path")
+        stores[name.strip()] = path.strip()
+    return stores
+
+
+# One SQLite file per store. Without DATABASE_STORES the database of
+# DATABASE_STREAMLIT_PATH is the only store, so single-store deployments keep
+# working as they are; with it, process-wide data (metrics snapshots, scripts
+# run without a path) goes to DATABASE_STREAMLIT_PATH or the first store.
+store_paths = parse_stores(os.getenv("DATABASE_STORES")) or {"Principal": os.getenv("DATABASE_STREAMLIT_PATH")}
+db_path = os.getenv("DATABASE_STREAMLIT_PATH") or next(iter(store_paths.values()))
+
+
+def store_name(path):
+    """Name of the store whose database is at `path`, or the path itself for
+    a database outside DATABASE_STORES."""
+    for name, store_path in store_paths.items():
+        if store_path == path:
+            return name
+    return path
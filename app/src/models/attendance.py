@@ -1,4 +1,6 @@
 class Attendance:
+    __slots__ = ("user_id", "date", "type", "time")
+
     def __init__(self, user_id, date, type, time):
         self.user_id = user_id
         self.date = date
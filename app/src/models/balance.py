@@ -1,4 +1,6 @@
 class Balance:
+    __slots__ = ("user_name", "date", "card_value", "pix_value", "money_value", "observation")
+
     def __init__(self, user_name, money_value, observation, date=None, card_value=None, pix_value=None):
             self.user_name = user_name
             self.date = date
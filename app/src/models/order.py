@@ -0,0 +1,21 @@
+class OrderItem:
+    __slots__ = ("product_id", "product", "quantity", "unit_price", "total_price")
+
+    def __init__(self, product_id, product, quantity, unit_price, total_price):
+        self.product_id = product_id
+        self.product = product
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.total_price = total_price
+
+
+class PendingOrder:
+    __slots__ = ("id", "order_date", "supplier_id", "supplier", "total", "items")
+
+    def __init__(self, id, order_date, supplier_id, supplier, total, items):
+        self.id = id
+        self.order_date = order_date
+        self.supplier_id = supplier_id
+        self.supplier = supplier
+        self.total = total
+        self.items = items
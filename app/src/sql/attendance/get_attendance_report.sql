@@ -0,0 +1,20 @@
+-- One row per employee and day with a column per punch type.
+-- :ranges is a JSON array of [start, end) date pairs, e.g.
+-- [["2024-01-01", "2024-02-01"], ["2024-03-01", "2024-04-01"]]
+WITH ranges AS (
+    SELECT
+        json_extract(value, '$[0]') AS start_date,
+        json_extract(value, '$[1]') AS end_date
+    FROM json_each(:ranges)
+)
+SELECT
+    a.user_id,
+    a.date,
+    MAX(CASE WHEN a.type = 'Entrada' THEN a.time END) AS entrada,
+    MAX(CASE WHEN a.type = 'Entrada Almoço' THEN a.time END) AS entrada_almoco,
+    MAX(CASE WHEN a.type = 'Saída Almoço' THEN a.time END) AS saida_almoco,
+    MAX(CASE WHEN a.type = 'Saída' THEN a.time END) AS saida
+FROM ranges r
+JOIN attendance a ON a.date >= r.start_date AND a.date < r.end_date
+GROUP BY a.user_id, a.date
+ORDER BY a.user_id, a.date DESC
@@ -0,0 +1,18 @@
+-- Punch times in minutes since midnight per employee and day, for the
+-- timesheet engine. :ranges works as in get_attendance_report.
+WITH ranges AS (
+    SELECT
+        json_extract(value, '$[0]') AS start_date,
+        json_extract(value, '$[1]') AS end_date
+    FROM json_each(:ranges)
+)
+SELECT
+    d.user_id,
+    d.date,
+    d.entrada,
+    d.entrada_almoco,
+    d.saida_almoco,
+    d.saida
+FROM ranges r
+JOIN attendance_daily d ON d.date >= r.start_date AND d.date < r.end_date
+ORDER BY d.user_id, d.date DESC
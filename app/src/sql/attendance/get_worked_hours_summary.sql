@@ -0,0 +1,12 @@
+-- Payroll summary per employee over [start_date, end_date), read from the
+-- attendance_daily rollup through idx_attendance_daily_date.
+SELECT
+    user_id,
+    COUNT(*) AS days,
+    SUM(worked_minutes) AS worked_minutes,
+    SUM(break_minutes) AS break_minutes,
+    SUM(NOT is_complete) AS incomplete_days
+FROM attendance_daily
+WHERE date >= :start_date AND date < :end_date
+GROUP BY user_id
+ORDER BY user_id
@@ -0,0 +1,9 @@
+SELECT
+    id,
+    description,
+    min_stock,
+    package_type,
+    status,
+    current_stock_in_units AS current_stock
+FROM products
+ORDER BY id
@@ -0,0 +1,8 @@
+SELECT
+    id AS product_id,
+    description AS product,
+    current_stock_in_units AS current_stock,
+    last_update_stock
+FROM products
+WHERE status = 'Ativo'
+ORDER BY id
@@ -0,0 +1,11 @@
+SELECT
+    sp.supplier_id,
+    s.description AS supplier,
+    sp.product_id,
+    p.description AS product,
+    COALESCE(sp.current_price, 0) AS current_price,
+    sp.status
+FROM suppliers_products sp
+INNER JOIN suppliers s ON s.id = sp.supplier_id
+INNER JOIN products p ON p.id = sp.product_id
+ORDER BY sp.supplier_id, sp.product_id
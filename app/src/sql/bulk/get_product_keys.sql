@@ -0,0 +1 @@
+SELECT id, description FROM products ORDER BY id
@@ -0,0 +1 @@
+SELECT id, description FROM suppliers ORDER BY id
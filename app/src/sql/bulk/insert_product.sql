@@ -0,0 +1,2 @@
+INSERT INTO products (description, current_stock_in_units, min_stock, package_type, status)
+VALUES (:description, :current_stock, :min_stock, :package_type, :status);
@@ -0,0 +1,7 @@
+-- The stock of an existing product only changes through a stock count
+UPDATE products
+SET description = :description,
+    min_stock = :min_stock,
+    package_type = :package_type,
+    status = :status
+WHERE id = :product_id;
@@ -0,0 +1,6 @@
+-- initial_price is the price of the first import, current_price the latest
+INSERT INTO suppliers_products (supplier_id, product_id, initial_price, current_price, status)
+VALUES (:supplier_id, :product_id, :current_price, :current_price, :status)
+ON CONFLICT (supplier_id, product_id) DO UPDATE SET
+    current_price = excluded.current_price,
+    status = excluded.status;
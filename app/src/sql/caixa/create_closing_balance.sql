@@ -0,0 +1,2 @@
+INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value, observation) 
+VALUES (:user_id, :date, :period, :card_value, :pix_value, :money_value, :observation);
\ No newline at end of file
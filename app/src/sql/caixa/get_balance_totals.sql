@@ -0,0 +1,30 @@
+-- Totals of the closings in [:start_date, :end_date). Whole months come from
+-- balance_monthly and only the days of the partial first and last months
+-- from balance_daily, so a year costs at most 12 month rows and 60 day rows.
+-- acc_money is the running cash total at the end of the range.
+WITH bounds AS (
+    SELECT
+        date(:start_date, '-1 day', 'start of month', '+1 month') AS full_start,
+        date(:end_date, 'start of month') AS full_end
+),
+parts AS (
+    SELECT m.card_value, m.pix_value, m.money_value, m.closings
+    FROM bounds, balance_monthly m
+    WHERE m.month >= substr(full_start, 1, 7) AND m.month < substr(full_end, 1, 7)
+    UNION ALL
+    SELECT d.card_value, d.pix_value, d.money_value, d.closings
+    FROM bounds, balance_daily d
+    WHERE d.date >= :start_date AND d.date < MIN(full_start, :end_date)
+    UNION ALL
+    SELECT d.card_value, d.pix_value, d.money_value, d.closings
+    FROM bounds, balance_daily d
+    WHERE d.date >= MAX(full_start, full_end) AND d.date < :end_date
+)
+SELECT
+    COALESCE(SUM(card_value), 0) AS card_value,
+    COALESCE(SUM(pix_value), 0) AS pix_value,
+    COALESCE(SUM(money_value), 0) AS money_value,
+    COALESCE(SUM(card_value + pix_value + money_value), 0) AS total,
+    COALESCE(SUM(closings), 0) AS closings,
+    COALESCE((SELECT acc_money FROM balance_daily WHERE date < :end_date ORDER BY date DESC LIMIT 1), 0) AS acc_money
+FROM parts
@@ -0,0 +1,8 @@
+SELECT 
+    u.complete_name, 
+    b.money_value,
+    b.observation 
+FROM balance b 
+LEFT JOIN users u ON u.numero_identificacao = b.user_id 
+WHERE b.date = :date 
+AND b.period = :period
\ No newline at end of file
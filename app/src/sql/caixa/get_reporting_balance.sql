@@ -0,0 +1,18 @@
+-- AccDinheiro is the cash accumulated since :date: the running total of each
+-- day in balance_daily minus the checkpoint, its value on the last day
+-- before :date.
+WITH checkpoint AS (
+    SELECT COALESCE((SELECT acc_money FROM balance_daily WHERE date < :date ORDER BY date DESC LIMIT 1), 0) AS acc_money
+)
+SELECT 
+    b.date,
+    b.card_value,
+    b.money_value,
+    b.pix_value,
+    (b.card_value + b.pix_value + b.money_value) AS total,
+    d.acc_money - c.acc_money AS AccDinheiro
+FROM balance b
+JOIN balance_daily d ON d.date = b.date
+CROSS JOIN checkpoint c
+WHERE b.date >= :date
+ORDER BY b.date DESC
@@ -0,0 +1,22 @@
+-- One page of get_reporting_balance, newest first. Pages are keyed by the
+-- (date, period) of the last row of the previous page, so each one is a
+-- backward range scan on sqlite_autoindex_balance_1 that stops after :limit
+-- rows however far back :date goes. The first page passes '9999-12-31'.
+WITH checkpoint AS (
+    SELECT COALESCE((SELECT acc_money FROM balance_daily WHERE date < :date ORDER BY date DESC LIMIT 1), 0) AS acc_money
+)
+SELECT
+    b.date,
+    b.period,
+    b.card_value,
+    b.pix_value,
+    b.money_value,
+    (b.card_value + b.pix_value + b.money_value) AS total,
+    d.acc_money - c.acc_money AS AccDinheiro
+FROM balance b
+JOIN balance_daily d ON d.date = b.date
+CROSS JOIN checkpoint c
+WHERE b.date >= :date
+AND (b.date, b.period) < (:after_date, :after_period)
+ORDER BY b.date DESC, b.period DESC
+LIMIT :limit
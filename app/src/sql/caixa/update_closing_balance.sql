@@ -0,0 +1,5 @@
+UPDATE balance 
+SET money_value = :money_value, 
+    observation = :observation 
+WHERE date = :date 
+AND period = :period;
\ No newline at end of file
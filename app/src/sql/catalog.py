@@ -0,0 +1,100 @@
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+SQL_DIR = Path(__file__).resolve().parent
+
+# Literals and comments are stripped before looking for :params, so
+# strftime formats such as '%H:%M' are not taken as parameters.
+_literals_and_comments = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.S)
+_named_param = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+def query_params(sql):
+    return frozenset(_named_param.findall(_literals_and_comments.sub(" ", sql)))
+
+
+class SqlCatalog:
+    """Named queries loaded once from the .sql files under sql/.
+    `catalog["attendance.create_attendance"]` maps to sql/attendance/create_attendance.sql"""
+
+    def __init__(self, root=SQL_DIR, hot_reload=False):
+        self.root = Path(root)
+        self.hot_reload = hot_reload
+        self._queries = {}
+        self._params = {}
+        self._mtimes = {}
+        self._lock = threading.Lock()
+        self.load()
+
+
+    def _name(self, path):
+        return ".".join(path.relative_to(self.root).with_suffix("").parts)
+
+
+    def _path(self, name):
+        return self.root.joinpath(*name.split(".")).with_suffix(".sql")
+
+
+    def _load_file(self, path):
+        sql = path.read_text(encoding="utf-8").strip()
+        if not sqlite3.complete_statement(sql if sql.endswith(";") else sql + ";"):
+            raise SyntaxError(f"Incomplete SQL statement in {path}")
+        name = self._name(path)
+        self._queries[name] = sql
+        self._params[name] = query_params(sql)
+        self._mtimes[name] = path.stat().st_mtime_ns
+
+
+    def load(self):
+        with self._lock:
+            for path in sorted(self.root.rglob("*.sql")):
+                self._load_file(path)
+
+
+    def _reload_if_changed(self, name):
+        path = self._path(name)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtimes.get(name):
+            with self._lock:
+                self._load_file(path)
+
+
+    def __getitem__(self, name):
+        if self.hot_reload:
+            self._reload_if_changed(name)
+        return self._queries[name]
+
+
+    def __contains__(self, name):
+        return name in self._queries
+
+
+    def names(self):
+        return sorted(self._queries)
+
+
+    def params(self, name):
+        self[name]
+        return self._params[name]
+
+
+    def check(self, conn):
+        """Prepares every query against `conn` with all of its :params bound,
+        so a typo, a missing column or a parameter the parser did not see
+        fails at startup instead of on the first click."""
+        errors = {}
+        for name in self.names():
+            try:
+                conn.execute(f"EXPLAIN {self._queries[name]}", dict.fromkeys(self._params[name]))
+            except sqlite3.Error as e:
+                errors[name] = str(e)
+        return errors
+
+
+catalog = SqlCatalog(hot_reload=os.getenv("SQL_CATALOG_HOT_RELOAD") == "1")
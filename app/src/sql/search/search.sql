@@ -0,0 +1,13 @@
+-- Best matches of :query (an FTS5 expression) among :kinds (a JSON array), with
+-- the matched terms in **bold**:
+--   SCAN search_index VIRTUAL TABLE INDEX 0:M
+SELECT
+    kind,
+    ref_id,
+    highlight(search_index, 2, '**', '**') AS title,
+    snippet(search_index, 3, '**', '**', '…', 12) AS snippet
+FROM search_index
+WHERE search_index MATCH :query
+AND kind IN (SELECT value FROM json_each(:kinds))
+ORDER BY rank
+LIMIT :limit
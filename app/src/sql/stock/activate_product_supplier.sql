@@ -0,0 +1,2 @@
+INSERT OR REPLACE INTO suppliers_products (current_price, supplier_id, product_id, status) 
+VALUES (:current_price, :supplier_id, :product_id, 'Ativo');
\ No newline at end of file
@@ -0,0 +1,3 @@
+UPDATE orders 
+SET status = 'Cancelado' 
+WHERE id = :order_id;
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO orders (order_date, supplier_id) 
+VALUES (:order_date, :supplier_id);
\ No newline at end of file
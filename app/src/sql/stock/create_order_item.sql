@@ -0,0 +1,2 @@
+INSERT INTO orders_items (order_id, product_id, quantity, unit_price) 
+VALUES (:order_id, :product_id, :quantity, :unit_price);
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO products (description, current_stock_in_units, min_stock, package_type) 
+VALUES (:description, :current_stock, :min_stock, :package_type);
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO suppliers_products (supplier_id, product_id) 
+VALUES (:supplier_id, :product_id);
\ No newline at end of file
@@ -0,0 +1,5 @@
+UPDATE suppliers_products 
+SET status = 'Inativo', 
+    current_price = :current_price 
+WHERE supplier_id = :supplier_id 
+AND product_id = :product_id;
\ No newline at end of file
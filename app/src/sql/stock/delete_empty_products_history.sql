@@ -0,0 +1,2 @@
+-- Intervals that closed the moment they opened (several counts saved in the same second)
+DELETE FROM products_history WHERE valid_to = valid_from;
@@ -0,0 +1,13 @@
+-- The rest of each run, after merge_products_history.sql stretched its first interval.
+DELETE FROM products_history
+WHERE rowid IN (
+    SELECT row_id
+    FROM (
+        SELECT rowid AS row_id,
+               ROW_NUMBER() OVER w = 1 OR LAG(stock_in_units) OVER w IS NOT stock_in_units
+                   OR LAG(description) OVER w IS NOT description AS starts_run
+        FROM products_history
+        WINDOW w AS (PARTITION BY id ORDER BY valid_from, rowid)
+    )
+    WHERE NOT starts_run
+);
@@ -1,70 +1,42 @@
-WITH pending_orders AS (
-    SELECT DISTINCT oi.product_id
-    FROM orders_items oi
-    JOIN orders o ON oi.order_id = o.id
-    WHERE o.status = 'Pendente'
-),
-
-entregue_orders AS (
-    SELECT DISTINCT oi.product_id
-    FROM orders_items oi
-    JOIN orders o ON oi.order_id = o.id
-    WHERE o.status = 'Entregue'
-),
-
-latest_delivery_dates AS (
-    SELECT oi.product_id, MAX(o.delivery_date) AS max_delivery_date
-    FROM orders_items oi
-    JOIN orders o ON oi.order_id = o.id
-    WHERE o.status = 'Entregue'
-    GROUP BY oi.product_id
-),
-
-necessary_products_to_buy AS (
-    SELECT DISTINCT p.id
+-- Products to buy and the cheapest active supplier of each, with the last
+-- order from that supplier. Pending orders and deliveries per product come
+-- from product_supplier_last_price, so no order history is scanned:
+--   SCAN p
+--   SEARCH sp USING COVERING INDEX idx_suppliers_products_product (product_id=? AND status=?)
+--   SEARCH l USING PRIMARY KEY (product_id=? AND supplier_id=?) LEFT-JOIN
+WITH necessary_products_to_buy AS (
+    SELECT p.id, p.description
     FROM products p
-    LEFT JOIN pending_orders po ON p.id = po.product_id
-    LEFT JOIN entregue_orders eo ON p.id = eo.product_id
-    LEFT JOIN latest_delivery_dates ldd ON p.id = ldd.product_id
-    WHERE 
+    WHERE p.status = 'Ativo'
+        AND p.current_stock_in_units < p.min_stock
         -- Exclude products with pending orders
-        po.product_id IS NULL
-        
-        -- Include products where current stock is less than min_stock 
-        -- and max delivery date is less than max last update stock date.
-        -- Also, include cases where the product was never delivered.
-        AND (p.current_stock_in_units < p.min_stock) 
-        AND (ldd.product_id IS NULL OR ldd.max_delivery_date < (SELECT MAX(last_update_stock) FROM products))
-
-        -- Only include active products
-        AND p.status = 'Ativo'
+        AND NOT EXISTS (SELECT 1 FROM product_supplier_last_price l WHERE l.product_id = p.id AND l.pending_orders > 0)
+        -- Include products never delivered or last delivered before the last stock count.
+        -- MAX(last_update_stock) is the same for all products, the stock is counted at once.
+        AND COALESCE((SELECT MAX(l.last_delivery_date) FROM product_supplier_last_price l WHERE l.product_id = p.id), '')
+            < (SELECT MAX(last_update_stock) FROM products)
 ),
 
 latest_order_and_price AS (
-    SELECT 
+    SELECT
         must_buy.id AS prod_id,
-        p.description AS prod_desc,
-        sp.supplier_id AS supplier_id,
+        must_buy.description AS prod_desc,
+        sp.supplier_id,
         s.description AS supp_desc,
-        FIRST_VALUE(o.order_date) OVER (PARTITION BY must_buy.id, sp.supplier_id ORDER BY o.order_date DESC) AS order_date,
-        FIRST_VALUE(oi.unit_price) OVER (PARTITION BY must_buy.id, sp.supplier_id ORDER BY o.order_date DESC) AS unit_price,
+        l.last_order_date AS order_date,
+        l.last_unit_price AS unit_price,
         sp.current_price,
-        ROW_NUMBER() OVER (PARTITION BY must_buy.id ORDER BY sp.current_price ASC) AS rn
+        ROW_NUMBER() OVER (PARTITION BY must_buy.id ORDER BY sp.current_price ASC, sp.supplier_id ASC) AS rn
     FROM necessary_products_to_buy must_buy
-    LEFT JOIN orders_items oi 
-        ON must_buy.id = oi.product_id
-    LEFT JOIN orders o 
-        ON oi.order_id = o.id
-    INNER JOIN suppliers_products sp 
-        ON sp.product_id = must_buy.id
+    INNER JOIN suppliers_products sp
+        ON sp.product_id = must_buy.id AND sp.status = 'Ativo'
     INNER JOIN suppliers s
-        ON s.id = sp.supplier_id 
-    INNER JOIN products p 
-        ON p.id = must_buy.id
-    WHERE sp.status = 'Ativo'
+        ON s.id = sp.supplier_id
+    LEFT JOIN product_supplier_last_price l
+        ON l.product_id = must_buy.id AND l.supplier_id = sp.supplier_id
 )
 
-SELECT 
+SELECT
     prod_id,
     prod_desc,
     supplier_id,
@@ -73,4 +45,4 @@ SELECT
     unit_price,
     current_price
 FROM latest_order_and_price
-WHERE rn = 1;
\ No newline at end of file
+WHERE rn = 1;
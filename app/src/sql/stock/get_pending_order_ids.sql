@@ -0,0 +1,2 @@
+--   SCAN orders USING COVERING INDEX idx_orders_pending
+SELECT id FROM orders WHERE status = 'Pendente' ORDER BY id
@@ -0,0 +1,19 @@
+-- Pending orders of :order_ids (a JSON array), one row per order with its
+-- items nested as a JSON array of [product_id, product, quantity, unit_price, total_price]:
+--   SEARCH o USING COVERING INDEX idx_orders_pending (id=?)
+--   SEARCH oi USING INDEX idx_orders_items_order_product (order_id=?)
+SELECT
+    o.id,
+    o.order_date,
+    o.supplier_id,
+    s.description AS supplier,
+    SUM(oi.total_price) AS total,
+    json_group_array(json_array(oi.product_id, p.description, oi.quantity, oi.unit_price, oi.total_price)) AS items
+FROM orders o
+INNER JOIN orders_items oi ON oi.order_id = o.id
+INNER JOIN suppliers s ON s.id = o.supplier_id
+INNER JOIN products p ON p.id = oi.product_id
+WHERE o.status = 'Pendente'
+AND o.id IN (SELECT value FROM json_each(:order_ids))
+GROUP BY o.id
+ORDER BY o.id
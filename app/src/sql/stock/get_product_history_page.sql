@@ -0,0 +1,33 @@
+-- One page of stock changes of every product in [:start_date, :end_date),
+-- newest first, with the count each one replaced. Pages are keyed by the
+-- (valid_from, id, rowid) of the last row of the previous page; valid_from
+-- has one-second resolution, so the rowid (the last column of every index)
+-- tells apart two changes of a product in the same second. The first page
+-- passes '9999-12-31'. Changes smaller than :min_change are skipped.
+--   SEARCH h USING INDEX idx_products_history_valid_from (valid_from>? AND valid_from<?)
+--   SEARCH p USING INDEX idx_products_history_id_valid_to (id=? AND valid_to=?)
+SELECT
+    id,
+    description,
+    stock_in_units,
+    previous_stock,
+    stock_in_units - previous_stock AS change,
+    valid_from,
+    valid_to,
+    history_id
+FROM (
+    SELECT
+        h.id,
+        h.description,
+        h.stock_in_units,
+        h.valid_from,
+        h.valid_to,
+        h.rowid AS history_id,
+        (SELECT p.stock_in_units FROM products_history p WHERE p.id = h.id AND p.valid_to = h.valid_from) AS previous_stock
+    FROM products_history h
+    WHERE h.valid_from >= :start_date AND h.valid_from < :end_date
+    AND (h.valid_from, h.id, h.rowid) < (:after_from, :after_id, :after_rowid)
+)
+WHERE :min_change <= 0 OR ABS(stock_in_units - previous_stock) >= :min_change
+ORDER BY valid_from DESC, id DESC, history_id DESC
+LIMIT :limit
@@ -0,0 +1,29 @@
+-- get_product_history_page.sql for a single product, :product_id:
+--   SEARCH h USING INDEX idx_products_history_id_valid_from (id=? AND valid_from>? AND valid_from<?)
+--   SEARCH p USING INDEX idx_products_history_id_valid_to (id=? AND valid_to=?)
+SELECT
+    id,
+    description,
+    stock_in_units,
+    previous_stock,
+    stock_in_units - previous_stock AS change,
+    valid_from,
+    valid_to,
+    history_id
+FROM (
+    SELECT
+        h.id,
+        h.description,
+        h.stock_in_units,
+        h.valid_from,
+        h.valid_to,
+        h.rowid AS history_id,
+        (SELECT p.stock_in_units FROM products_history p WHERE p.id = h.id AND p.valid_to = h.valid_from) AS previous_stock
+    FROM products_history h
+    WHERE h.id = :product_id
+    AND h.valid_from >= :start_date AND h.valid_from < :end_date
+    AND (h.valid_from, h.id, h.rowid) < (:after_from, :after_id, :after_rowid)
+)
+WHERE :min_change <= 0 OR ABS(stock_in_units - previous_stock) >= :min_change
+ORDER BY valid_from DESC, id DESC, history_id DESC
+LIMIT :limit
@@ -0,0 +1,18 @@
+-- Stock of the products in :product_ids (a JSON array) at the end of each
+-- :bucket (a strftime format: '%Y-%m-%d', '%Y-%W' or '%Y-%m') of
+-- [:start_date, :end_date), and how many changes fell in it. The interval
+-- open at :start_date counts for the first bucket, so a product that did not
+-- change in the range still has its level.
+--   SEARCH products_history USING INDEX idx_products_history_id_valid_from (id=? AND valid_from<?)
+SELECT
+    id,
+    strftime(:bucket, MAX(valid_from, :start_date)) AS bucket,
+    stock_in_units,
+    MAX(valid_from) AS last_change,
+    SUM(valid_from >= :start_date) AS changes
+FROM products_history
+WHERE id IN (SELECT value FROM json_each(:product_ids))
+AND valid_from < :end_date
+AND (valid_to > :start_date OR valid_to IS NULL)
+GROUP BY id, bucket
+ORDER BY id, bucket
@@ -0,0 +1,7 @@
+SELECT 
+    id, 
+    description, 
+    current_stock_in_units, 
+    package_type, 
+    last_update_stock 
+FROM products
\ No newline at end of file
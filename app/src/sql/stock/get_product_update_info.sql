@@ -0,0 +1,6 @@
+SELECT 
+    id,
+    description,
+    min_stock, 
+    status
+FROM products
\ No newline at end of file
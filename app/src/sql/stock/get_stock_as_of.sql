@@ -0,0 +1,21 @@
+-- Stock of every product at :at (UTC, 'YYYY-MM-DD HH:MM:SS' like CURRENT_TIMESTAMP):
+-- the last interval of each product that started at or before :at, if it was
+-- still open then. Products without a count before :at are left out.
+--   SCAN p
+--   SEARCH products_history USING INDEX idx_products_history_id_valid_from (id=? AND valid_from<?)
+--   SEARCH h USING INTEGER PRIMARY KEY (rowid=?)
+SELECT
+    p.id,
+    h.description,
+    h.stock_in_units,
+    h.valid_from,
+    h.valid_to
+FROM products p
+INNER JOIN products_history h
+    ON h.rowid = (SELECT rowid
+                  FROM products_history
+                  WHERE id = p.id AND valid_from <= :at
+                  ORDER BY valid_from DESC
+                  LIMIT 1)
+WHERE h.valid_to IS NULL OR h.valid_to > :at
+ORDER BY p.id;
@@ -0,0 +1,10 @@
+SELECT 
+    s.id AS supplier_id,
+    s.description,
+    sp.current_price,
+    CASE WHEN sp.status = 'Ativo' THEN 1 ELSE 0 END AS Status
+FROM suppliers s 
+CROSS JOIN products p 
+LEFT JOIN suppliers_products sp  
+    ON sp.supplier_id = s.id AND sp.product_id = p.id 
+WHERE p.id = :product_id
\ No newline at end of file
@@ -0,0 +1,26 @@
+-- Value of the stock of each active product at the price of its last order
+-- that wasn't cancelled, or the lowest active supplier price when it was
+-- never ordered:
+--   SEARCH product_supplier_last_price USING PRIMARY KEY (product_id=?)
+--   SEARCH sp USING COVERING INDEX idx_suppliers_products_product (product_id=? AND status=?)
+WITH priced AS MATERIALIZED (
+    SELECT
+        p.id,
+        p.description,
+        p.current_stock_in_units,
+        COALESCE(
+            (SELECT l.last_unit_price FROM product_supplier_last_price l
+             WHERE l.product_id = p.id ORDER BY l.last_order_date DESC LIMIT 1),
+            (SELECT MIN(sp.current_price) FROM suppliers_products sp WHERE sp.product_id = p.id AND sp.status = 'Ativo')
+        ) AS unit_price
+    FROM products p
+    WHERE p.status = 'Ativo'
+)
+SELECT
+    id,
+    description,
+    current_stock_in_units,
+    unit_price,
+    current_stock_in_units * unit_price AS stock_value
+FROM priced
+ORDER BY id
@@ -0,0 +1,4 @@
+SELECT 
+    id, 
+    description 
+FROM suppliers
\ No newline at end of file
@@ -0,0 +1,6 @@
+SELECT
+    s.id,
+    s.description
+FROM suppliers_products sp
+INNER JOIN suppliers s ON s.id = sp.supplier_id 
+WHERE sp.product_id = :product_id
\ No newline at end of file
@@ -0,0 +1,25 @@
+-- Runs of consecutive intervals of a product with the same count (and description)
+-- become their first interval, stretched to the end of the last one.
+WITH changes AS (
+    SELECT rowid AS row_id, id, valid_from, valid_to,
+           ROW_NUMBER() OVER w = 1 OR LAG(stock_in_units) OVER w IS NOT stock_in_units
+               OR LAG(description) OVER w IS NOT description AS starts_run
+    FROM products_history
+    WINDOW w AS (PARTITION BY id ORDER BY valid_from, rowid)
+),
+runs AS (
+    SELECT row_id, id, valid_to, starts_run,
+           SUM(starts_run) OVER (PARTITION BY id ORDER BY valid_from, row_id) AS run
+    FROM changes
+),
+merged AS (
+    SELECT MAX(CASE WHEN starts_run THEN row_id END) AS row_id,
+           CASE WHEN COUNT(valid_to) < COUNT(*) THEN NULL ELSE MAX(valid_to) END AS valid_to
+    FROM runs
+    GROUP BY id, run
+    HAVING COUNT(*) > 1
+)
+UPDATE products_history
+SET valid_to = merged.valid_to
+FROM merged
+WHERE products_history.rowid = merged.row_id;
@@ -0,0 +1,5 @@
+UPDATE orders 
+SET status = 'Entregue', 
+    delivery_date = :now, 
+    last_update = :now 
+WHERE id = :order_id;
\ No newline at end of file
@@ -0,0 +1,5 @@
+UPDATE products 
+SET description = :description, 
+    min_stock = :min_stock, 
+    status = :status 
+WHERE id = :product_id;
\ No newline at end of file
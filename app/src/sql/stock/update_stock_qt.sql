@@ -0,0 +1,4 @@
+UPDATE products 
+SET current_stock_in_units = :current_stock, 
+    last_update_stock = :last_update_stock 
+WHERE id = :product_id;
\ No newline at end of file
@@ -0,0 +1,11 @@
+SELECT
+    numero_identificacao,
+    complete_name,
+    date_nascimento,
+    date_admissao,
+    role,
+    telephone_number,
+    observation,
+    status
+FROM users
+WHERE numero_identificacao = :user_id
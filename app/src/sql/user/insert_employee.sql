@@ -0,0 +1,2 @@
+INSERT INTO users (numero_identificacao, complete_name, date_nascimento, date_admissao, role, telephone_number, observation) 
+VALUES (:numero_identificacao, :complete_name, :date_nascimento, :date_admissao, :role, :telephone_number, :observation);
\ No newline at end of file
@@ -0,0 +1,3 @@
+UPDATE users 
+SET status = :status 
+WHERE numero_identificacao = :user_id;
\ No newline at end of file
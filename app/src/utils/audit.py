@@ -0,0 +1,129 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+from database.cache import get_cache
+from database.connection import get_pool
+from utils.logger import logger
+
+SPILL_FILE = '../logs/audit_spill.jsonl'
+
+INSERT_LOG = """INSERT INTO logs (function_type, action, log_date, log_time, duration_ms, status)
+                VALUES (?, ?, ?, ?, ?, ?)"""
+
+
+class AuditQueue:
+    """Write-behind queue for the `logs` table.
+
+    Controller calls only enqueue their row. A daemon thread writes the rows
+    in one transaction every `flush_interval` seconds or as soon as
+    `max_batch` rows are waiting. Rows that can't be written because the
+    database is locked go to `spill_file` and are retried on the next flush."""
+
+    def __init__(self, pool, flush_interval=0.5, max_batch=200, spill_file=SPILL_FILE):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.spill_file = spill_file
+        self.written = 0
+        self.spilled = 0
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+        self._thread.start()
+
+
+    def put(self, function_type, action, log_date, log_time, duration_ms, status):
+        self._queue.put((function_type, action, log_date, log_time, duration_ms, status))
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            rows = self._take(timeout=self.flush_interval)
+            if rows:
+                self._write(rows)
+
+
+    def _take(self, timeout):
+        # Blocks for the first row only, then takes whatever is already waiting
+        rows = []
+        try:
+            rows.append(self._queue.get(timeout=timeout))
+            while len(rows) < self.max_batch:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+
+    def _read_spill(self):
+        if not os.path.exists(self.spill_file):
+            return []
+        with open(self.spill_file, encoding='utf-8') as file:
+            return [tuple(json.loads(line)) for line in file if line.strip()]
+
+
+    def _spill(self, rows):
+        with open(self.spill_file, 'a', encoding='utf-8') as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.spilled += len(rows)
+
+
+    def _write(self, rows):
+        with self._flush_lock:
+            spilled = self._read_spill()
+            try:
+                with self.pool.transaction() as conn:
+                    conn.executemany(INSERT_LOG, spilled + rows)
+            except sqlite3.OperationalError as e:
+                # Locked or busy past busy_timeout: keep the rows for later
+                self._spill(rows)
+                logger.error(f"Audit Logs - spilled {len(rows)} rows -> {str(e)}")
+                return
+            except sqlite3.Error as e:
+                logger.error(f"Audit Logs - dropped {len(rows)} rows -> {str(e)}")
+                return
+            if spilled:
+                os.remove(self.spill_file)
+            self.written += len(spilled) + len(rows)
+            get_cache(self.pool.path).invalidate(('logs',))
+
+
+    def flush(self):
+        """Writes every row queued so far, from the calling thread."""
+        while True:
+            rows = self._take(timeout=0)
+            if not rows:
+                return
+            self._write(rows)
+
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+
+    def stats(self):
+        return {"pending": self._queue.qsize(),
+                "written": self.written,
+                "spilled": self.spilled}
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_audit_queue(path=None):
+    """Returns the process-wide audit queue of a database file. Rows still
+    queued at interpreter exit are flushed then."""
+    pool = get_pool(path)
+    with _queues_lock:
+        if pool.path not in _queues:
+            _queues[pool.path] = AuditQueue(pool)
+            atexit.register(_queues[pool.path].close)
+        return _queues[pool.path]
@@ -7,6 +7,12 @@ def has_default_permission(password):
 def has_balance_update_permission(password):
     return password == st.secrets['update_closing_balance_permission']
 
+def has_profiling_permission():
+    """`?profile=<profiling_permission>` in the URL turns on the page profiler."""
+    token = st.experimental_get_query_params().get("profile", [""])[0]
+    expected = st.secrets.get("profiling_permission", "")
+    return token != '' and expected != '' and hmac.compare_digest(token, expected)
+
 def check_login_password():
     """Returns `True` if the user had a correct password."""
 
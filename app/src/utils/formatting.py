@@ -1,6 +1,6 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
-from datetime import datetime
 
 
 def brazilian_date(df, columns):
@@ -8,75 +8,72 @@ def brazilian_date(df, columns):
         df[column] = pd.to_datetime(df[column]).dt.strftime('%d-%m-%Y')
     return df
 
-def print_balance_html_table(data) -> str:
-  html = """<!DOCTYPE html><html><head>
-  <style>
-    table {
+def hours_minutes(df, columns):
+    for column in columns:
+        missing = df[column].isna()
+        hours, minutes = divmod(df[column].fillna(0).astype('int64'), 60)
+        df[column] = (hours.astype(str).str.zfill(2) + ':' + minutes.astype(str).str.zfill(2)).mask(missing, '')
+    return df
+
+BALANCE_TABLE_STYLE = """<style>
+    table.balance {
         width: 100%;
         border-collapse: collapse;
+        table-layout: fixed;
+        margin: 0;
     }
-    th, td {
+    table.balance th, table.balance td {
         border: 1px solid #ddd;
         padding: 8px;
         text-align: center;
         width: 16.66%;
     }
-    td {
+    table.balance td {
         background-color: transparent;
-        text-align: center;
     }
-    th.date, th.type1, th.type2, th.type3, th.total {
-        width: auto;
+    table.balance th {
+        color: #fff;
     }
-    th {
-        color: #fff;  
-    }
-    th.type1 {
+    table.balance th.type1 {
         background-color: #7700ff;
     }
-    th.type2 {
+    table.balance th.type2 {
         background-color: #08B9C9;
     }
-    th.type3 {
+    table.balance th.type3 {
         background-color: #FF9C00;
     }
-    th.AccDinheiro {
+    table.balance th.AccDinheiro {
         background-color: #EC3D44;
     }
-    th.date, th.total {
+    table.balance th.date, table.balance th.total {
         background-color: transparent;
-        width: 20%;
     }
-    td.total, td.AccDinheiro {
+    table.balance td.total, table.balance td.AccDinheiro {
         font-size: 18px;
         font-weight: bold;
     }
-</style>
-</head>
-<body>
-    <table>
-      <tr>
-        <th class="date">Data</th>
-        <th class="type1">Cartão</th>
-        <th class="type2">PIX</th>
-        <th class="type3">Dinheiro</th>
-        <th class="total">Total</th>
-        <th class="AccDinheiro">💵 Acumulado</th>
-      </tr>"""
-  for i in range(len(data)):
-    casted_total = str(data[i]['total']).replace('.' , ',')
-    casted_acc_dinheiro = str(data[i]['AccDinheiro']).replace('.' , ',')
-    portuguese_date = datetime.strftime(datetime.strptime(str(data[i]['date']), '%Y-%m-%d'), '%d-%m-%Y')
+</style>"""
+
+BALANCE_TABLE_HEADER = """<tr>
+<th class="date">Data</th><th class="type1">Cartão</th><th class="type2">PIX</th>
+<th class="type3">Dinheiro</th><th class="total">Total</th><th class="AccDinheiro">💵 Acumulado</th>
+</tr>"""
+
+BALANCE_ROW = ('<tr><td class="date">{}</td><td class="type1">{}</td><td class="type2">{}</td>'
+               '<td class="type3">{}</td><td class="total">{}</td><td class="AccDinheiro">{}</td></tr>')
+
 
-    html += f"""<tr>
-              <td class="date">{portuguese_date}</td>
-              <td class="type1">{data[i]['card_value']}</td>
-              <td class="type2">{data[i]['pix_value']}</td>
-              <td class="type3">{data[i]['money_value']}</td>
-              <td class="total">{casted_total}</td>
-              <td class="AccDinheiro">{casted_acc_dinheiro}</td>
-            </tr>"""
-  # Closing HTML tags
-  html += "</table></body></html>"
+def brazilian_decimal(values):
+    text = np.char.replace(np.char.mod('%.2f', values.to_numpy(dtype='float64')), '.', ',')
+    return np.where(values.isna().to_numpy(), '', text)
 
-  return html
\ No newline at end of file
+def print_balance_html_table(page, header=True) -> str:
+  """HTML table of a get_reporting_balance_page frame. Dates and values are
+  formatted a column at a time and the rows joined once; pages after the
+  first go without `header` so they read as one table."""
+  dates = page['date'].str
+  columns = (dates[8:10] + '-' + dates[5:7] + '-' + dates[:4],
+             *(brazilian_decimal(page[column]) for column in ('card_value', 'pix_value', 'money_value', 'total', 'AccDinheiro')))
+  rows = ''.join(map(BALANCE_ROW.format, *columns))
+  return f'<table class="balance">{BALANCE_TABLE_HEADER if header else ""}{rows}</table>'
@@ -1,8 +1,7 @@
-import sqlite3
+import time
 from datetime import datetime
-from database.path import db_path
 from pytz import timezone
-from utils.logger import logger
+from utils.audit import get_audit_queue
 
 
 mapping_controller_functions = {
@@ -17,34 +16,78 @@ mapping_controller_functions = {
     'create_closing_balance':('Caixa', 'Fechamento Caixa'),
     'update_closing_balance':('Caixa', 'Atualizar Fechamento'),
     'get_reporting_balance':('Caixa', 'Puxar Relatório'),
+    'get_reporting_balance_page':('Caixa', 'Puxar Relatório'),
 
     'create_order':('Estoque', 'Solicitar Pedido'),
+    'create_orders':('Estoque', 'Solicitar Pedidos'),
     'update_stock_product_association':('Estoque', 'Atualizar Assoc. Prod-For'),
     'update_stock_qt':('Estoque', 'Atualizar Qt. Estoque'),
     'update_product_info':('Estoque', 'Atualizar Prod. Info'),
     'update_order_status':('Estoque', 'Atualizar Status do Pedido'),
     'cancel_order':('Estoque', 'Cancelar Pedido'),
+    'create_product':('Estoque', 'Cadastrar Produto'),
     'calculate_recommended_orders_items':('Estoque', 'Mostrar Produtos Recomendados'),
-    'get_product_history':('Estoque', 'Get Product History')
+    'get_product_history':('Estoque', 'Get Product History'),
+    'compact_stock_history':('Estoque', 'Compactar Histórico'),
+
+    'import_products':('Estoque', 'Importar Produtos'),
+    'import_supplier_prices':('Estoque', 'Importar Preços'),
+    'import_stock_counts':('Estoque', 'Importar Contagem'),
  
      }
 
+# Tables written by each decorated function. Cached reads of these tables are
+# dropped as soon as the function returns.
+written_tables = {
+    'insert_employee': ('users', 'search_index'),
+    'update_employee': ('users', 'search_index'),
+    'update_employees_status': ('users',),
+
+    'create_attendance': ('attendance', 'attendance_daily'),
+    'modify_attendance': ('attendance', 'attendance_daily'),
+    'delete_attendance': ('attendance', 'attendance_daily'),
+
+    'create_closing_balance': ('balance', 'balance_daily', 'balance_monthly', 'email_outbox', 'search_index'),
+    'update_closing_balance': ('balance', 'balance_daily', 'balance_monthly', 'search_index'),
+
+    'create_product': ('products', 'suppliers_products', 'products_history', 'search_index'),
+    'create_order': ('orders', 'orders_items', 'product_supplier_last_price'),
+    'create_orders': ('orders', 'orders_items', 'product_supplier_last_price'),
+    'update_stock_product_association': ('suppliers_products',),
+    'update_stock_qt': ('products', 'products_history'),
+    'update_product_info': ('products', 'search_index'),
+    'update_order_status': ('orders', 'product_supplier_last_price'),
+    'cancel_order': ('orders', 'product_supplier_last_price'),
+    'compact_stock_history': ('products_history',),
+
+    'import_products': ('products', 'products_history', 'search_index'),
+    'import_supplier_prices': ('suppliers_products',),
+    'import_stock_counts': ('products', 'products_history'),
+}
+
+
+def call_succeeded(result):
+    # Controllers report failures by returning None or the exception
+    return result is not None and not isinstance(result, Exception)
+
 
 def log_function_calls(func):
     def wrapper(*args,**kwargs):    
         log_call = kwargs.pop('log_call', False)
-        if log_call:
-            function_type = mapping_controller_functions.get(str(func.__name__))[0]
-            action = mapping_controller_functions.get(str(func.__name__))[1]
-
-            log_date = datetime.now().strftime('%Y-%m-%d')
-            log_time = datetime.now(timezone('America/Sao_Paulo')).strftime("%H:%M")
-            try:
-                with sqlite3.connect(db_path) as conn:
-                    conn.execute("""INSERT INTO logs (function_type, action, log_date, log_time) 
-                                VALUES (?, ?, ?, ?)""",
-                        (function_type, action, log_date, log_time))
-            except sqlite3.Error as e:
-                logger.error(f"Create Logs [{function_type} - {action}]:-> {str(e)}")
-        return func(*args)
+        controller = args[0]
+        result = None
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+            return result
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            if func.__name__ in written_tables:
+                controller.cache.invalidate(written_tables[func.__name__])
+            if log_call:
+                function_type, action = mapping_controller_functions.get(str(func.__name__))
+                log_date = datetime.now().strftime('%Y-%m-%d')
+                log_time = datetime.now(timezone('America/Sao_Paulo')).strftime("%H:%M")
+                get_audit_queue(controller.pool.path).put(function_type, action, log_date, log_time, duration_ms,
+                                                          'Sucesso' if call_succeeded(result) else 'Erro')
     return wrapper
@@ -0,0 +1,218 @@
+import bisect
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import pandas as pd
+from database.cache import get_cache
+from database.connection import get_pool
+from database.path import store_name
+from utils.logger import logger
+from utils.logs import call_succeeded, mapping_controller_functions
+
+PROM_FILE = os.getenv("METRICS_PROM_FILE", '../logs/metrics.prom')
+SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "60"))
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+INSERT_SNAPSHOT = """INSERT INTO metrics_snapshots (taken_at, store, controller, method, calls, errors,
+                     rows_returned, p50_ms, p95_ms, p99_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+def _rows(result):
+    if isinstance(result, (list, tuple, dict, pd.DataFrame)):
+        return len(result)
+    return 0 if result is None or isinstance(result, (bool, Exception)) else 1
+
+
+class Series:
+    """Cumulative counters and latency histogram of one controller method
+    on one store."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+
+    def add(self, ms, ok, rows):
+        self.calls += 1
+        self.errors += not ok
+        self.rows += rows
+        self.total_ms += ms
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+
+    def quantile(self, q):
+        """Estimated from the buckets, interpolating inside the bucket the
+        same way Prometheus' histogram_quantile does."""
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            if seen + count >= rank and count:
+                lower = BUCKETS_MS[i - 1] if i else 0.0
+                upper = BUCKETS_MS[i] if i < len(BUCKETS_MS) - 1 else BUCKETS_MS[-2]
+                return round(lower + (upper - lower) * (rank - seen) / count, 3)
+            seen += count
+        return BUCKETS_MS[-2]
+
+
+class Metrics:
+    """In-memory controller metrics.
+
+    Calls only append an event to a deque, which is thread safe without a
+    lock. Readers fold the pending events into one `Series` per store and
+    method, so a slow store doesn't hide behind the others' calls. Snapshots
+    of every store go to the process-wide database (database.path.db_path)."""
+
+    def __init__(self, snapshot_seconds=SNAPSHOT_SECONDS, prom_file=PROM_FILE):
+        self.snapshot_seconds = snapshot_seconds
+        self.prom_file = prom_file
+        self.started_at = datetime.now()
+        self._events = deque()
+        self._series = {}
+        self._fold_lock = threading.Lock()
+        self._snapshotter = None
+        self._snapshots_disabled = False
+
+
+    def record(self, store, controller, method, ms, ok, rows):
+        self._events.append((store, controller, method, ms, ok, rows))
+
+
+    def _fold(self):
+        with self._fold_lock:
+            while self._events:
+                store, controller, method, ms, ok, rows = self._events.popleft()
+                key = (store, controller, method)
+                if key not in self._series:
+                    self._series[key] = Series()
+                self._series[key].add(ms, ok, rows)
+            return dict(self._series)
+
+
+    def summary(self):
+        """One row per method, slowest p95 first."""
+        rows = []
+        for (store, controller, method), series in self._fold().items():
+            function_type, action = mapping_controller_functions.get(method, ('', ''))
+            rows.append({"store": store, "controller": controller, "method": method,
+                         "function_type": function_type, "action": action,
+                         "calls": series.calls, "errors": series.errors, "rows_returned": series.rows,
+                         "mean_ms": round(series.total_ms / series.calls, 3),
+                         "p50_ms": series.quantile(0.50), "p95_ms": series.quantile(0.95),
+                         "p99_ms": series.quantile(0.99)})
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+
+    def prometheus(self):
+        lines = ["# HELP bakery_controller_calls_total Controller method calls.",
+                 "# TYPE bakery_controller_calls_total counter"]
+        series = sorted(self._fold().items())
+        labels = {key: f'store="{key[0]}",controller="{key[1]}",method="{key[2]}"' for key, _ in series}
+        lines += [f"bakery_controller_calls_total{{{labels[key]}}} {s.calls}" for key, s in series]
+        lines += ["# HELP bakery_controller_errors_total Controller calls that failed.",
+                  "# TYPE bakery_controller_errors_total counter"]
+        lines += [f"bakery_controller_errors_total{{{labels[key]}}} {s.errors}" for key, s in series]
+        lines += ["# HELP bakery_controller_rows_returned_total Rows returned by controller calls.",
+                  "# TYPE bakery_controller_rows_returned_total counter"]
+        lines += [f"bakery_controller_rows_returned_total{{{labels[key]}}} {s.rows}" for key, s in series]
+        lines += ["# HELP bakery_controller_latency_seconds Controller call latency.",
+                  "# TYPE bakery_controller_latency_seconds histogram"]
+        for key, s in series:
+            cumulative = 0
+            for bound, count in zip(BUCKETS_MS, s.buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound / 1000:g}"
+                lines.append(f'bakery_controller_latency_seconds_bucket{{{labels[key]},le="{le}"}} {cumulative}')
+            lines.append(f"bakery_controller_latency_seconds_sum{{{labels[key]}}} {s.total_ms / 1000:.6f}")
+            lines.append(f"bakery_controller_latency_seconds_count{{{labels[key]}}} {s.calls}")
+        return "\n".join(lines) + "\n"
+
+
+    def export_prometheus(self):
+        # Written aside and renamed so a scraper never reads half a file
+        partial = f"{self.prom_file}.tmp"
+        with open(partial, 'w', encoding='utf-8') as file:
+            file.write(self.prometheus())
+        os.replace(partial, self.prom_file)
+
+
+    def snapshot(self):
+        """Stores the current summary in `metrics_snapshots` and refreshes
+        the Prometheus file."""
+        taken_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(taken_at, row["store"], row["controller"], row["method"], row["calls"], row["errors"], row["rows_returned"],
+                 row["p50_ms"], row["p95_ms"], row["p99_ms"]) for row in self.summary()]
+        try:
+            if rows:
+                with get_pool().transaction() as conn:
+                    conn.executemany(INSERT_SNAPSHOT, rows)
+                get_cache().invalidate(('metrics_snapshots',))
+            self.export_prometheus()
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Metrics Snapshot -> {str(e)}")
+
+
+    def _run(self):
+        while True:
+            time.sleep(self.snapshot_seconds)
+            self.snapshot()
+
+
+    def start(self):
+        """Starts the snapshot thread once."""
+        with self._fold_lock:
+            if self._snapshotter is not None or self._snapshots_disabled:
+                return
+            self._snapshotter = threading.Thread(target=self._run, name="metrics-snapshots", daemon=True)
+            self._snapshotter.start()
+
+
+    def disable_snapshots(self):
+        """Keeps this process from writing snapshots and the Prometheus file,
+        for worker processes whose calls aren't the app's own."""
+        with self._fold_lock:
+            self._snapshots_disabled = True
+
+
+    def history(self, store, method, limit=200):
+        with get_pool().connection() as conn:
+            return conn.execute("""SELECT taken_at, calls, errors, p50_ms, p95_ms, p99_ms FROM metrics_snapshots
+                                   WHERE method = ? AND store = ? ORDER BY id DESC LIMIT ?""",
+                                (method, store, limit)).fetchall()
+
+
+metrics = Metrics()
+
+
+def _timed(controller, method, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if metrics._snapshotter is None and not metrics._snapshots_disabled:
+            metrics.start()
+        result = None
+        started = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+            return result
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            metrics.record(store_name(self.pool.path), controller, method, ms, call_succeeded(result), _rows(result))
+    return wrapper
+
+
+def instrumented(cls):
+    """Class decorator recording every public method of a controller."""
+    for name, attr in list(vars(cls).items()):
+        if callable(attr) and not name.startswith('_'):
+            setattr(cls, name, _timed(cls.__name__, name, attr))
+    return cls
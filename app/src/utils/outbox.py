@@ -0,0 +1,168 @@
+import atexit
+import smtplib
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from html import escape
+from database.cache import get_cache
+from database.connection import get_pool
+from utils.logger import logger
+from utils.sendmail import SmtpSession
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+INSERT_EMAIL = """INSERT INTO email_outbox (kind, subject, body, created_at, next_attempt_at)
+                  VALUES (?, ?, ?, ?, ?)"""
+
+SELECT_DUE = """SELECT id, kind, subject, body, attempts FROM email_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id LIMIT ?"""
+
+# Seconds a new email waits before it can be sent, so closings saved close
+# together go out as one digest
+DIGEST_WINDOW = 60
+
+
+def _utc(moment):
+    return moment.strftime(TIME_FORMAT)
+
+
+def enqueue(conn, kind, subject, body, digest_window=DIGEST_WINDOW):
+    """Queues an email on `conn`, inside the caller's transaction."""
+    now = datetime.now(timezone.utc)
+    conn.execute(INSERT_EMAIL, (kind, subject, body, _utc(now), _utc(now + timedelta(seconds=digest_window))))
+
+
+def digest(emails):
+    """One subject and body for several queued emails of the same kind."""
+    if len(emails) == 1:
+        return emails[0][2], emails[0][3]
+    subject = f"{emails[0][2]} e mais {len(emails) - 1}"
+    body = "<hr>".join(f"<h3>{escape(email[2])}</h3>{email[3]}" for email in emails)
+    return subject, body
+
+
+class EmailOutbox:
+    """Sends the emails queued in `email_outbox` from a daemon thread.
+
+    Every `poll_interval` seconds the due pending emails are grouped by kind
+    and each group goes out as one digest over `session`, an SmtpSession kept
+    open between sends. A failed group is retried after base_delay * 2 **
+    (attempts - 1) seconds, capped at max_delay, and marked failed after
+    `max_attempts`. Delivery is at least once: an email sent right before
+    the process dies may go out again."""
+
+    def __init__(self, pool, session, poll_interval=5, max_batch=20, base_delay=30, max_delay=3600, max_attempts=10):
+        self.pool = pool
+        self.session = session
+        self.poll_interval = poll_interval
+        self.max_batch = max_batch
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._stop = threading.Event()
+        self._send_lock = threading.Lock()
+        self._thread = None
+
+
+    def start(self):
+        if self._thread is None and self.session is not None:
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.process()
+            except sqlite3.Error as e:
+                logger.error(f"Email Outbox -> {str(e)}")
+
+
+    def enqueue(self, conn, kind, subject, body):
+        """Queues an email on `conn`, inside the caller's transaction. Without
+        email configured nothing would ever send it, so it isn't queued."""
+        if self.session is not None:
+            enqueue(conn, kind, subject, body)
+
+
+    def _update(self, sql, rows):
+        with self.pool.transaction() as conn:
+            conn.executemany(sql, rows)
+        # A local write: only email_outbox reads are stale, not the whole cache
+        get_cache(self.pool.path).invalidate(('email_outbox',))
+
+
+    def backoff(self, attempts):
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+
+
+    def process(self, now=None):
+        """Sends every email due at `now` (default: now) and returns how many
+        went out."""
+        if self.session is None:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        with self._send_lock:
+            with self.pool.connection() as conn:
+                due = conn.execute(SELECT_DUE, (_utc(now), self.max_batch)).fetchall()
+            groups = {}
+            for email in due:
+                groups.setdefault(email[1], []).append(email)
+
+            sent = 0
+            for kind, emails in groups.items():
+                try:
+                    self.session.send(*digest(emails))
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.error(f"Email Outbox - Kind {kind}, {len(emails)} emails -> {str(e)}")
+                    self._failed(emails, now, str(e))
+                    continue
+                self._update("UPDATE email_outbox SET status = 'sent', attempts = attempts + 1, sent_at = ? WHERE id = ?",
+                             [(_utc(now), email[0]) for email in emails])
+                sent += len(emails)
+            return sent
+
+
+    def _failed(self, emails, now, error):
+        rows = []
+        for id, _, _, _, attempts in emails:
+            attempts += 1
+            status = 'failed' if attempts >= self.max_attempts else 'pending'
+            rows.append((status, attempts, _utc(now + timedelta(seconds=self.backoff(attempts))), error, id))
+        self._update("""UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+                        WHERE id = ?""", rows)
+
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+        if self.session is not None:
+            self.session.close()
+
+
+    def stats(self):
+        with self.pool.connection() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall())
+        stats = {status: counts.get(status, 0) for status in ('pending', 'sent', 'failed')}
+        stats["running"] = self._thread is not None
+        if self.session is not None:
+            stats.update(smtp_connections=self.session.connections, smtp_messages=self.session.messages)
+        return stats
+
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+
+def get_outbox(path=None):
+    """Returns the process-wide outbox of a database file, with its worker
+    started when email is configured in secrets.toml."""
+    pool = get_pool(path)
+    with _outboxes_lock:
+        if pool.path not in _outboxes:
+            _outboxes[pool.path] = EmailOutbox(pool, SmtpSession.from_secrets())
+            _outboxes[pool.path].start()
+            atexit.register(_outboxes[pool.path].close)
+        return _outboxes[pool.path]
@@ -0,0 +1,129 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from utils.logger import logger
+
+PROFILE_ALL = os.getenv("STREAMLIT_PROFILE") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", '../logs/profiles')
+PROFILE_WINDOW = int(os.getenv("PROFILE_WINDOW", "20"))
+SAMPLE_INTERVAL = 0.005
+
+
+class StackSampler:
+    """Samples the stack of one thread every `interval` seconds and counts
+    them root first, the input format of flamegraph.pl and speedscope."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Run:
+    def __init__(self, started_at, duration_ms, profile, stacks):
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.profile = profile
+        self.stacks = stacks
+
+
+class PageProfiler:
+    """Profiles page dispatches and keeps the last `window` runs of each page.
+
+    After every run the page's collapsed stacks over the window are written
+    to `directory`/<page>.folded."""
+
+    def __init__(self, window=PROFILE_WINDOW, directory=PROFILE_DIR):
+        self.window = window
+        self.directory = directory
+        self._runs = {}
+        self._lock = threading.Lock()
+
+
+    def run(self, page, func, *args):
+        profile = cProfile.Profile()
+        started_at = datetime.now()
+        started = time.perf_counter()
+        sampler = StackSampler(threading.get_ident())
+        try:
+            with sampler:
+                profile.enable()
+                try:
+                    return func(*args)
+                finally:
+                    profile.disable()
+        finally:
+            # st.stop() and st.rerun() leave by exception, the run is kept anyway
+            self._keep(page, Run(started_at, (time.perf_counter() - started) * 1000, profile, sampler.stacks))
+
+
+    def _keep(self, page, run):
+        with self._lock:
+            runs = self._runs.setdefault(page, deque(maxlen=self.window))
+            runs.append(run)
+            stacks = sum((run.stacks for run in runs), Counter())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.folded_path(page), 'w', encoding='utf-8') as file:
+                for stack, count in stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.error(f"Profiler [{page}] -> {str(e)}")
+
+
+    def folded_path(self, page):
+        return os.path.join(self.directory, re.sub(r'[^\w]+', '_', page).strip('_') + '.folded')
+
+
+    def runs(self, page):
+        with self._lock:
+            return list(self._runs.get(page, ()))
+
+
+    def top(self, page, n=25):
+        """Hot functions over the window, by own time."""
+        runs = self.runs(page)
+        if not runs:
+            return []
+        stats = pstats.Stats(runs[0].profile)
+        for run in runs[1:]:
+            stats.add(run.profile)
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({"function": function, "file": f"{os.path.basename(filename)}:{line}",
+                         "calls": calls, "own_ms": round(own * 1000, 3), "cumulative_ms": round(cumulative * 1000, 3)})
+        rows.sort(key=lambda row: row["own_ms"], reverse=True)
+        return rows[:n]
+
+
+page_profiler = PageProfiler()
@@ -1,51 +1,120 @@
+import os
 import smtplib
-
+import time
 from datetime import datetime
-from streamlit import secrets, error
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from html import escape
 
+# Point these at a local stand-in to test the outbox without a real mailbox,
+# e.g. SMTP_HOST=localhost SMTP_PORT=8025 SMTP_STARTTLS=0
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.office365.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
 
-def sendmail_closing_balance(date, card_value, pix_value, money_value, observation):
-    portuguese_date = datetime.strftime(datetime.strptime(date, '%Y-%m-%d'), '%d-%m-%Y')
 
-    #Mail
-    msg = MIMEMultipart()
-    msg['From'] = str(secrets['email'])
-    msg['To'] =  str(secrets['email'])
-    msg['Subject'] = f"Fechamento de Caixa {portuguese_date}"
-
-    # HTML body for the email
-    html_body = f"""
-    <html>
-    <body>
+def closing_balance_email(date, card_value, pix_value, money_value, observation):
+    """Subject and HTML body of a closing, as queued in email_outbox."""
+    portuguese_date = datetime.strftime(datetime.strptime(date, '%Y-%m-%d'), '%d-%m-%Y')
+    subject = f"Fechamento de Caixa {portuguese_date}"
+    body = f"""
         <p>Segue o fechamento de caixa:</p>
         <ul>
             <li>Data: {date}</li>
             <li>Valor no Cartão: {card_value}</li>
             <li>Valor no PIX: {pix_value}</li>
             <li>Valor em Dinheiro: {money_value}</li>
-            <li>Observação: {observation}</li>
-        </ul>
-    </body>
-    </html>
-    """
-    # Attach HTML content to the email
-    msg.attach(MIMEText(html_body, 'html'))
-
-    try:
-        server = smtplib.SMTP('smtp.office365.com', 587)
-        server.starttls()
-        server.login(msg['From'], str(secrets['email-pass']))
-        text = msg.as_string()
-        server.sendmail(msg['From'], msg['To'], text)
-        server.quit()
-        return 1
-    except smtplib.SMTPException as e:
-        print(f"SMTPException: {e}")
-        error(f'SMTPException: {e} Falha ao enviar o email: {e}')
-        return 0
-    except Exception as e:
-        print(f"Exception: {e}")
-        error(f'Exception: {e} ao enviar o email: {e}')
-        return 0
\ No newline at end of file
+            <li>Observação: {escape(observation or '')}</li>
+        </ul>"""
+    return subject, body
+
+
+def build_message(address, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = address
+    msg['To'] = address
+    msg['Subject'] = subject
+    msg.attach(MIMEText(f"<html><body>{body}</body></html>", 'html'))
+    return msg
+
+
+class SmtpSession:
+    """One SMTP connection kept open between sends.
+
+    The connection (and STARTTLS and login, when the server offers AUTH) is
+    opened on the first send and reused until it has been idle for
+    `idle_timeout` seconds. A connection the server dropped is reopened once
+    before the error is raised."""
+
+    def __init__(self, address, password, host=SMTP_HOST, port=SMTP_PORT, starttls=SMTP_STARTTLS,
+                 idle_timeout=120, timeout=30):
+        self.address = address
+        self.password = password
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections = 0
+        self.messages = 0
+        self._server = None
+        self._last_used = 0.0
+
+
+    @classmethod
+    def from_secrets(cls):
+        """Session for `email`/`email-pass` in secrets.toml, or None when
+        email isn't configured."""
+        from streamlit import secrets
+        try:
+            if 'email' not in secrets:
+                return None
+        except FileNotFoundError:
+            return None
+        return cls(str(secrets['email']), str(secrets.get('email-pass', '')))
+
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            server.ehlo()
+            if server.has_extn('auth'):
+                server.login(self.address, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections += 1
+        return server
+
+
+    def send(self, subject, body):
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        msg = build_message(self.address, subject, body)
+        try:
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._server = None
+                self._server = self._connect()
+                self._server.send_message(msg)
+        except (smtplib.SMTPException, OSError):
+            # The next send starts over on a fresh connection
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+        self.messages += 1
+
+
+    def close(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
@@ -1,11 +1,11 @@
 import streamlit as st
-import pandas as pd
 import sqlite3
 from streamlit_extras.let_it_rain import rain
 from datetime import datetime
 from utils.authentication import has_default_permission
-from utils.formatting import brazilian_date
 from utils.correctperiods import moving_months
+from utils.formatting import hours_minutes
+from controllers.timesheet import PUNCH_COLUMNS
 from dateutil.relativedelta import relativedelta
 from pytz import timezone
 from enum import Enum
@@ -20,7 +20,6 @@ class AttendanceceOptions(Enum):
 
 class AttendanceView:
     options = [option.value for option in AttendanceceOptions]
-    select_info_columns = ['numero_identificacao','complete_name','status']
     month_translation = {'January': 'Janeiro', 'February': 'Fevereiro','March': 'Março','April': 'Abril',
                         'May': 'Maio','June': 'Junho','July': 'Julho','August': 'Agosto',
                         'September': 'Setembro','October': 'Outubro','November': 'Novembro','December': 'Dezembro'}
@@ -33,8 +32,7 @@ class AttendanceView:
 
     def create_attendance(self):
         st.markdown('<h4 style="color:white;">Registrar Ponto</h4>', unsafe_allow_html=True)
-        users = self.user_controller.select_info_employees(AttendanceView.select_info_columns)
-        active_users = [user for user in users if user.status == "Ativo"]
+        active_users = self.user_controller.employees.active()
         selected_user = st.selectbox("Funcionários Ativos", options=active_users, format_func=lambda value: f"{value.complete_name}")
         
         current_datetime = datetime.now(timezone('America/Sao_Paulo'))
@@ -83,8 +81,7 @@ class AttendanceView:
 
     def change_attendance(self):
         st.markdown('<h4 style="color:white;">Alteração de Ponto', unsafe_allow_html=True)
-        users = self.user_controller.select_info_employees(['numero_identificacao','complete_name','status'])
-        active_users = [user for user in users if user.status == "Ativo"]
+        active_users = self.user_controller.employees.active()
         selected_user = st.selectbox("Funcionários Ativos", options=active_users, format_func=lambda value: f"{value.complete_name}")
 
         point_type = st.selectbox("Tipo de Ponto", AttendanceView.options)
@@ -134,44 +131,30 @@ class AttendanceView:
         selected_months_pt = st.multiselect("Período", options=list(months_options.keys())[::-1])  
 
         if len(selected_months_pt) >= 1:
-            all_month_attendances = []  
+            ranges = []
             for month_pt in selected_months_pt:
                 month_english = months_options[month_pt]
                 selected_month_datetime = datetime.strptime(month_english, '%B %Y')
                 next_month_datetime = selected_month_datetime + relativedelta(months=1)
-
-                selected_month_start = selected_month_datetime.strftime('%Y-%m-%d')
-                selected_month_end = next_month_datetime.strftime('%Y-%m-%d')
-
-                attendances = self.attendance_controller.get_attendance_by_periods(selected_month_start, selected_month_end)
-                attendance_data = {
-                        "User_Id": [attendance.user_id for attendance in attendances],
-                        "Data": [attendance.date for attendance in attendances],
-                        "Time": [attendance.time for attendance in attendances],
-                        "Type": [attendance.type for attendance in attendances]
-                    }
-                
-                month_attendances = pd.DataFrame(attendance_data)
-                all_month_attendances.append(month_attendances) 
-
-            all_df = pd.concat(all_month_attendances)
-            all_df = all_df.pivot_table(index=['User_Id', 'Data'], columns='Type', values='Time', aggfunc='first').reset_index()
-            all_df['Data'] = pd.to_datetime(all_df['Data'],format='%Y-%m-%d')
-            all_df = all_df.sort_values(by="Data", ascending=False)
-            all_df = brazilian_date(all_df, ['Data'])
-            all_df = all_df.fillna('')
-  
-
-            users = self.user_controller.select_info_employees(['numero_identificacao','complete_name','role','status','date_admissao'])
+                ranges.append((selected_month_datetime.strftime('%Y-%m-%d'), next_month_datetime.strftime('%Y-%m-%d')))
+
+            report = self.attendance_controller.get_attendance_report(ranges)
+            if report is None:
+                st.error('Erro ao consultar registros!')
+                return
+            columns = ['Data'] + AttendanceView.options
+            frequencies = {}
+            for user_id, days in report.items():
+                days = days.set_axis(columns, axis=1)
+                days['Data'] = days['Data'].dt.strftime('%d-%m-%Y')
+                frequencies[user_id] = days.fillna('')
+
+            users = self.user_controller.employees.all()
             for user in users:
                 with st.expander(f"{user.complete_name} (ID: {user.numero_identificacao:06d})"):
-                    user_frequencies = all_df[all_df['User_Id'] == user.numero_identificacao]
-                    if not user_frequencies.empty:
-                        columns_to_include = ['Data']
-                        for option in AttendanceceOptions:
-                            if option.value in user_frequencies.columns:
-                                columns_to_include.append(option.value)
-                        st.dataframe(user_frequencies[columns_to_include], hide_index=True, use_container_width=True)
+                    user_frequencies = frequencies.get(user.numero_identificacao)
+                    if user_frequencies is not None:
+                        st.dataframe(user_frequencies, hide_index=True, use_container_width=True)
                     else: 
                         st.info(f'Sem dados no(s) período(s)!')
                     
@@ -180,7 +163,19 @@ class AttendanceView:
             if app_pass != '' and not is_correct_password:
                 st.error('Senha Incorreta!')
             if is_correct_password:
-                csv = all_df.to_csv().encode('utf-8')
+                timesheet = self.attendance_controller.get_timesheet(ranges)
+                if timesheet is None:
+                    st.error('Erro ao calcular horas!')
+                    return
+                minutes = ['worked_minutes', 'regular_minutes', 'overtime_50_minutes', 'overtime_100_minutes',
+                           'night_minutes', 'sunday_holiday_minutes']
+                all_df = timesheet[['user_id', 'date', *PUNCH_COLUMNS, *minutes]].copy()
+                all_df['date'] = all_df['date'].dt.strftime('%d-%m-%Y')
+                all_df = hours_minutes(all_df, [*PUNCH_COLUMNS, *minutes])
+                all_df['open_day'] = (~timesheet['is_closed']).map({True: 'Sim', False: ''})
+                all_df = all_df.set_axis(['User_Id'] + columns + ['Horas Trabalhadas', 'Horas Normais', 'Extras 50%', 'Extras 100%',
+                                                                  'Adicional Noturno', 'Domingo/Feriado', 'Ponto Incompleto'], axis=1)
+                csv = all_df.to_csv(index=False).encode('utf-8')
                 st.download_button(
                                     label="Exportar Frequências",
                                     data=csv,
@@ -190,8 +185,7 @@ class AttendanceView:
 
     def delete_attendance(self):
         st.markdown('<h4 style="color:white;">Deletar Registros', unsafe_allow_html=True)
-        users = self.user_controller.select_info_employees(AttendanceView.select_info_columns)
-        active_users = [user for user in users if user.status == "Ativo"]
+        active_users = self.user_controller.employees.active()
         selected_user = st.selectbox("Funcionários Ativos", options=active_users, format_func=lambda value: f"{value.complete_name}")
 
         point_type = st.selectbox("Tipo de Ponto", AttendanceView.options)
@@ -0,0 +1,52 @@
+import io
+import streamlit as st
+from utils.authentication import has_default_permission
+from controllers.bulk_controller import IMPORT_COLUMNS, REQUIRED_COLUMNS
+
+
+class BulkView:
+    def __init__(self, bulk_controller):
+        self.bulk_controller = bulk_controller
+        self.kinds = {"Produtos": ("products", bulk_controller.import_products, bulk_controller.export_products),
+                      "Preços de Fornecedores": ("supplier_prices", bulk_controller.import_supplier_prices,
+                                                 bulk_controller.export_supplier_prices),
+                      "Contagem de Estoque": ("stock_counts", bulk_controller.import_stock_counts,
+                                              bulk_controller.export_stock_counts)}
+
+
+    def import_export(self):
+        st.markdown('<h4 style="color:white;">Importar / Exportar</h4>', unsafe_allow_html=True)
+        label = st.selectbox("Dados", options=list(self.kinds))
+        kind, import_file, export_file = self.kinds[label]
+        tab_import, tab_export = st.tabs(["Importar", "Exportar"])
+
+        with tab_import:
+            required = REQUIRED_COLUMNS[kind]
+            st.caption("Colunas: " + ", ".join(f"**{column}**" if column in required else column
+                                               for column in IMPORT_COLUMNS[kind]) + " (em negrito, obrigatórias)")
+            uploaded = st.file_uploader("Arquivo .csv ou .xlsx", type=["csv", "xlsx"], key=f"bulk_{kind}")
+            app_pass = st.text_input(label=":red[Senha]", type="password", key=f"bulk_pass_{kind}")
+            is_correct_password = has_default_permission(app_pass)
+            if app_pass != '' and not is_correct_password:
+                st.error('Senha Incorreta!')
+            if uploaded is not None and is_correct_password and st.button("Importar"):
+                report = import_file(uploaded, uploaded.name, log_call=True)
+                if report["error"]:
+                    st.error(f"Importação interrompida: {report['error']}")
+                st.success(f"{report['written']} de {report['rows']} linhas importadas em {report['chunks']} lotes.")
+                rejected = report["rejected"]
+                if not rejected.empty:
+                    st.warning(f"{len(rejected)} linhas rejeitadas")
+                    st.dataframe(rejected, hide_index=True, use_container_width=True)
+                    st.download_button("Baixar linhas rejeitadas", data=rejected.to_csv(index=False),
+                                       file_name=f"{kind}_rejeitadas.csv", mime="text/csv")
+
+        with tab_export:
+            if st.button("Gerar CSV"):
+                buffer = io.StringIO()
+                count = export_file(buffer)
+                if count is None:
+                    st.error("Não foi possível realizar a operação!")
+                else:
+                    st.download_button(f"Baixar {count} linhas", data=buffer.getvalue(),
+                                       file_name=f"{kind}.csv", mime="text/csv")
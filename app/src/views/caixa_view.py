@@ -1,10 +1,11 @@
 import streamlit as st
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from pytz import timezone
 from utils.validation import is_money_format_ok
 from utils.authentication import has_balance_update_permission, has_default_permission
-from utils.formatting import print_balance_html_table
+from utils.formatting import print_balance_html_table, BALANCE_TABLE_STYLE
+from controllers.caixa_controller import REPORT_PAGE_SIZE
 
 
 class CaixaView:
@@ -34,8 +35,7 @@ class CaixaView:
 
         st.markdown(f'<h3><span style="color:#d05573;">{current_date_dmy} [{brazilian_day_week}]</span></h3>', unsafe_allow_html=True)
 
-        users = self.user_controller.select_info_employees(['numero_identificacao','complete_name','role','status'])
-        active_caixa_users = [user for user in users if user.role  == "Atendente de Caixa" and user.status == 'Ativo']
+        active_caixa_users = self.user_controller.employees.by_role("Atendente de Caixa")
         selected_user = st.selectbox("Funcionário", options=active_caixa_users, format_func=lambda value: f"{value.complete_name}")
 
         #card_value = st.text_input("💳 Cartão de Crédito", max_chars=7, placeholder="0000,00")
@@ -173,8 +173,41 @@ class CaixaView:
             st.error('Senha Incorreta!')
 
         if is_correct_password:
+            today = datetime.now(timezone('America/Sao_Paulo'))
+            tomorrow = (today + timedelta(days=1)).strftime('%Y-%m-%d')
+            month_totals = self.caixa_controller.get_balance_totals(today.strftime('%Y-%m-01'), tomorrow)
+            year_totals = self.caixa_controller.get_balance_totals(today.strftime('%Y-01-01'), tomorrow)
+            if month_totals and year_totals:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("💵 Dinheiro no Mês", f"R$ {month_totals['money_value']:.2f}".replace('.', ','))
+                col2.metric("💵 Dinheiro no Ano", f"R$ {year_totals['money_value']:.2f}".replace('.', ','))
+                col3.metric("Fechamentos no Ano", year_totals['closings'])
+
             date  = st.date_input(label="Data Inicial", format='DD/MM/YYYY', max_value=datetime.now()).strftime('%Y-%m-%d')
             if st.button("Consultar"):
-                data = self.caixa_controller.get_reporting_balance(date, log_call=True)
-                html_data = print_balance_html_table(data)
-                st.markdown(html_data, unsafe_allow_html=True)
+                st.session_state["balance_report"] = {"date": date, "pages": [], "after": None, "done": False}
+                self.load_report_page(st.session_state["balance_report"], log_call=True)
+            report = st.session_state.get("balance_report")
+            if report is None or report["date"] != date:
+                return
+
+            st.markdown(BALANCE_TABLE_STYLE, unsafe_allow_html=True)
+            for html_page in report["pages"]:
+                st.markdown(html_page, unsafe_allow_html=True)
+            if not report["pages"]:
+                st.info("Sem dados no período selecionado!")
+            elif not report["done"]:
+                st.button("Carregar mais", on_click=self.load_report_page, args=(report,))
+
+
+    def load_report_page(self, report, log_call=False):
+        """Fetches the next keyset page of `report` and keeps its HTML, so a
+        rerun redraws the loaded pages without querying them again."""
+        page = self.caixa_controller.get_reporting_balance_page(report["date"], report["after"], log_call=log_call)
+        if page is None:
+            st.error("Não foi possível realizar a operação!")
+            return
+        report["done"] = len(page) < REPORT_PAGE_SIZE
+        if not page.empty:
+            report["after"] = (page["date"].iat[-1], page["period"].iat[-1])
+            report["pages"].append(print_balance_html_table(page, header=not report["pages"]))
@@ -0,0 +1,85 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+from pytz import timezone
+from utils.authentication import has_default_permission
+
+
+class ConsolidatedView:
+    def __init__(self, consolidated_controller):
+        self.consolidated_controller = consolidated_controller
+
+
+    @staticmethod
+    def _with_total(totals):
+        return pd.concat([totals, totals.sum().to_frame("Total").T]).astype(totals.dtypes)
+
+
+    @staticmethod
+    def _warn_missing(frame):
+        missing = frame.attrs.get("missing_stores")
+        if missing:
+            st.warning(f"Sem resposta de: {', '.join(missing)}. Os totais não incluem essas lojas.")
+
+
+    def reports(self):
+        st.markdown('<h4 style="color:white;">Relatório Consolidado</h4>', unsafe_allow_html=True)
+        app_pass = st.text_input(label=":red[Senha]", type="password", key="consolidated_pass")
+        is_correct_password = has_default_permission(app_pass)
+        if app_pass != '' and not is_correct_password:
+            st.error('Senha Incorreta!')
+        if not is_correct_password:
+            return
+
+        today = datetime.now(timezone('America/Sao_Paulo'))
+        col1, col2 = st.columns(2)
+        start_date = col1.date_input("Data Inicial", value=today.date().replace(day=1), format='DD/MM/YYYY').strftime('%Y-%m-%d')
+        end_date = (col2.date_input("Data Final", value=today.date(), format='DD/MM/YYYY') + timedelta(days=1)).strftime('%Y-%m-%d')
+        if st.button("Consultar"):
+            # Every store is queried in parallel, see ConsolidatedController
+            st.session_state["consolidated"] = {
+                "dates": (start_date, end_date),
+                "balance": self.consolidated_controller.get_reporting_balance(start_date),
+                "attendance": self.consolidated_controller.get_attendance_totals(start_date, end_date),
+                "stock": self.consolidated_controller.get_stock_valuation()}
+        report = st.session_state.get("consolidated")
+        if report is None or report["dates"] != (start_date, end_date):
+            return
+
+        tab_balance, tab_attendance, tab_stock = st.tabs(["Caixa", "Frequência", "Estoque"])
+        with tab_balance:
+            balance = report["balance"]
+            self._warn_missing(balance)
+            if not balance.empty:
+                balance = balance[balance["date"] < end_date]
+                totals = balance.groupby("store")[["card_value", "pix_value", "money_value", "total"]].sum()
+                totals.insert(0, "Fechamentos", balance.groupby("store").size())
+                st.dataframe(self._with_total(totals).set_axis(["Fechamentos", "Cartão", "PIX", "Dinheiro", "Total"], axis=1),
+                             use_container_width=True)
+                st.dataframe(balance.drop(columns="AccDinheiro").set_axis(
+                                 ["Loja", "Data", "Cartão", "Dinheiro", "PIX", "Total"], axis=1),
+                             hide_index=True, use_container_width=True)
+
+        with tab_attendance:
+            attendance = report["attendance"]
+            self._warn_missing(attendance)
+            if not attendance.empty:
+                totals = attendance.groupby("store").agg(employees=("user_id", "size"), days=("days", "sum"),
+                                                         worked_minutes=("worked_minutes", "sum"))
+                totals["worked_minutes"] = (totals["worked_minutes"] / 60).round(1)
+                st.dataframe(self._with_total(totals).set_axis(["Funcionários", "Dias", "Horas Trabalhadas"], axis=1),
+                             use_container_width=True)
+                attendance = attendance.assign(worked_minutes=(attendance["worked_minutes"] / 60).round(1),
+                                               break_minutes=(attendance["break_minutes"] / 60).round(1))
+                st.dataframe(attendance.set_axis(["Loja", "Id", "Funcionário", "Dias", "Horas Trabalhadas",
+                                                  "Horas de Intervalo", "Dias Incompletos"], axis=1),
+                             hide_index=True, use_container_width=True)
+
+        with tab_stock:
+            stock = report["stock"]
+            self._warn_missing(stock)
+            if not stock.empty:
+                totals = stock.groupby("store").agg(products=("id", "size"), stock_value=("stock_value", "sum"))
+                st.dataframe(self._with_total(totals).set_axis(["Produtos", "Valor em Estoque"], axis=1), use_container_width=True)
+                st.dataframe(stock.set_axis(["Loja", "Id", "Produto", "Estoque", "Preço", "Valor"], axis=1),
+                             hide_index=True, use_container_width=True)
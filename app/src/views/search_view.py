@@ -0,0 +1,27 @@
+import streamlit as st
+from controllers.search_controller import SEARCH_KINDS
+
+# Label shown next to each kind of result
+KIND_LABELS = {"products": "📦 Produto", "suppliers": "🚚 Fornecedor",
+               "users": "👤 Funcionário", "balance": "💰 Fechamento"}
+
+
+class SearchView:
+    def __init__(self, search_controller):
+        self.search_controller = search_controller
+
+
+    def sidebar(self):
+        query = st.sidebar.text_input("🔎 Buscar", placeholder="Produto, fornecedor, funcionário, observação")
+        if not query:
+            return
+        kinds = st.sidebar.multiselect("Em", options=SEARCH_KINDS, default=SEARCH_KINDS,
+                                       format_func=lambda kind: KIND_LABELS[kind])
+        results = self.search_controller.search(query, kinds)
+        if results is None:
+            st.sidebar.error("Não foi possível realizar a busca!")
+        elif not results:
+            st.sidebar.caption("Nenhum resultado.")
+        for kind, ref_id, title, snippet in results or []:
+            details = f"  \n{' '.join(snippet.split())}" if snippet else ""
+            st.sidebar.markdown(f"{KIND_LABELS[kind]} · {ref_id}  \n{title}{details}")
@@ -1,9 +1,11 @@
 import streamlit as st
-import pandas as pd
 import sqlite3
-from datetime import datetime
 from utils.authentication import has_default_permission
 from time import sleep
+from datetime import datetime, timedelta
+import pandas as pd
+from pytz import timezone, utc
+from controllers.stock_controller import HISTORY_PAGE_SIZE
 
 
 class StockView:
@@ -49,7 +51,7 @@ class StockView:
             id_column, desc_column, min_stock_colum, status_column = ('Id','Descrição','Estoque Minimo','Status')
 
             # Display product information in a table
-            database_info = pd.DataFrame(products, columns=[id_column, desc_column, min_stock_colum, status_column])
+            database_info = products.set_axis([id_column, desc_column, min_stock_colum, status_column], axis=1)
             update_dataframe = st.data_editor(database_info, 
                                         hide_index=True, 
                                         use_container_width=True,
@@ -58,7 +60,7 @@ class StockView:
                             column_config={
                                             id_column: st.column_config.NumberColumn(width=5),
                                             desc_column: st.column_config.TextColumn(width="medium"),
-                                            min_stock_colum: st.column_config.NumberColumn(width="small"),                  
+                                            min_stock_colum: st.column_config.NumberColumn(width="small", format="%d"),                  
                                             status_column: st.column_config.TextColumn(width="small")
                                         })
 
@@ -77,20 +79,14 @@ class StockView:
     def update_stock_and_pending_orders(self):
         #Related to update_order_status
         st.markdown('<h4 style="color:#d93d3d;">Pedidos Pendentes</h4>', unsafe_allow_html=True)
-        orders_items = self.stock_controller.get_pending_orders_items()
-
-        orders_df = pd.DataFrame(orders_items, columns=['order_id','order_date','supp_desc','Produtos'])
-        orders_df['order_date'] = pd.to_datetime(orders_df['order_date']).dt.strftime('%d/%m')
-        unique_combinations = orders_df.groupby(['order_id','order_date', 'supp_desc'])
-
-        for (order_id, order_date, supp_desc), group in unique_combinations:
-            with st.expander(f"{order_id} 🔖 {supp_desc} 📦 {order_date}"):
+        for order in self.stock_controller.get_pending_orders() or []:
+            with st.expander(self._order_label(order)):
                 col1, col2 = st.columns([3,1])
                 with col1:
-                    st.dataframe(group[['Produtos']], hide_index=True,)
+                    st.dataframe(self._order_items(order), hide_index=True,)
                 with col2:
-                    if st.button("Confirmar Entrega",key={f'{order_id}_confirm'}):
-                        retorno = self.stock_controller.update_order_status(str(order_id), log_call=True)
+                    if st.button("Confirmar Entrega",key={f'{order.id}_confirm'}):
+                        retorno = self.stock_controller.update_order_status(str(order.id), log_call=True)
                         if retorno:
                             st.success("Entrega confirmada!")
                         else:
@@ -101,20 +97,15 @@ class StockView:
                         
         #Related to update stock
         products_info = self.stock_controller.get_product_info()
-        updated_stock_time = products_info[0][-1]
-        # Convert string to datetime object
-        datetime_object = datetime.strptime(updated_stock_time, '%Y-%m-%d %H:%M:%S.%f')
-        formatted_time = datetime_object.strftime("%d/%m %H:%M:%S")
+        formatted_time = products_info['last_update_stock'].max().strftime("%d/%m %H:%M:%S")
     
         st.write('')
         st.write('')
         st.markdown(f'<h4 style="color: #5cb4f2; display: inline;">Estoque</h4> <h4 style="font-size: 16px; color: #FFFFFF; display: inline;">Última Att. [{formatted_time}]</h4>', unsafe_allow_html=True)
         st.write('')
         id_column, desc_column, stock_colum, new_stock_column = ('ID','Descrição','Último Estoque','Estoque Atual')
-        product_without_date_package = [item[:-2] for item in products_info]
-
         # Display product information in a table
-        database_info = pd.DataFrame(product_without_date_package, columns=[id_column, desc_column, stock_colum])
+        database_info = products_info[['id', 'description', 'current_stock_in_units']].set_axis([id_column, desc_column, stock_colum], axis=1)
         database_info[new_stock_column] = None
 
         update_dataframe = st.data_editor(database_info, 
@@ -158,6 +149,8 @@ class StockView:
            
 
         with tab_create_order:
+            if "orders_created" in st.session_state:
+                st.success(f"Pedidos realizados com sucesso! ({', '.join(map(str, st.session_state.pop('orders_created')))})")
             recommended_products_to_buy = self.stock_controller.calculate_recommended_orders_items(log_call=True)
             prod_id_column, prod_desc_column, supplier_id_column, supp_desc_column, order_date_column, unit_price_column, current_price_column  = ('prod_id',
                                                                                                                         'prod_desc',
@@ -166,20 +159,21 @@ class StockView:
                                                                                                                         'order_date',
                                                                                                                         'unit_price',
                                                                                                                         'current_price')
-            df_recommended_products_to_buy = pd.DataFrame(recommended_products_to_buy, columns=[prod_id_column,
-                                                                                                prod_desc_column,
-                                                                                                supplier_id_column,
-                                                                                                supp_desc_column,
-                                                                                                order_date_column,
-                                                                                                unit_price_column,
-                                                                                                current_price_column
-                                                                                                ])
-            df_recommended_products_to_buy[order_date_column] = pd.to_datetime(df_recommended_products_to_buy[order_date_column],format='ISO8601').dt.strftime('%d/%m')
+            df_recommended_products_to_buy = recommended_products_to_buy.set_axis([prod_id_column,
+                                                                                   prod_desc_column,
+                                                                                   supplier_id_column,
+                                                                                   supp_desc_column,
+                                                                                   order_date_column,
+                                                                                   unit_price_column,
+                                                                                   current_price_column
+                                                                                   ], axis=1)
+            df_recommended_products_to_buy[order_date_column] = df_recommended_products_to_buy[order_date_column].dt.strftime('%d/%m')
             df_recommended_products_to_buy[order_date_column].fillna('-', inplace=True)
             
             # Group by supplier_id and iterate over groups
             colors = iter(['blue','green','orange','red','violet'])
             total_price_suppliers = []
+            basket = []
             for supplier_id, group in df_recommended_products_to_buy.groupby('supplier_id'):
                 color = next(colors)
                 with st.expander(f":{color}[{group['supp_desc'].iloc[0]}]"):
@@ -208,31 +202,34 @@ class StockView:
                             products.append((supplier_id, row[prod_id_column], quantity, unit_price))
 
                     total_amount_order = round(sum(qt*price for _, _, qt, price in products),2)
-                    total_price_suppliers.append(total_amount_order)
                     st.write(f"<h4 style='text-align: right;'>💵 • R$ {total_amount_order:.2f}</h4>", unsafe_allow_html=True)
-        
-                    if st.button("Solicitar", key=f"button_{index}"):
-                        retorno = self.stock_controller.create_order(products, log_call=True)
-                        if retorno:
-                            st.success("Pedido realizado com sucesso!")
-                            sleep(1.5)
-                            st.rerun()
-                        else:
-                            st.error("Não foi possível realizar a operação!")
+                    if st.checkbox("Incluir no pedido", value=True, key=f"include_{supplier_id}"):
+                        total_price_suppliers.append(total_amount_order)
+                        basket.extend(products)
             st.write(f"<h3 style='text-align: left;'>💵 • R$ {sum(total_price_suppliers):.2f}</h3>", unsafe_allow_html=True)
+
+            # Every included supplier is ordered in one transaction
+            if st.button("Solicitar", disabled=not basket):
+                order_ids = self.stock_controller.create_orders(basket, log_call=True)
+                if order_ids:
+                    st.session_state["orders_created"] = order_ids
+                    st.rerun()
+                else:
+                    st.error("Não foi possível realizar a operação!")
                         
         with tab_associate_products_suppliers:
             products = self.stock_controller.get_product_info()  
 
             emoji = {"Fardo":'📦', "Unidade":'ⓤ'} 
 
+            # The selectbox needs one option per product, only here rows are built
             selected_product = st.selectbox("Selecionar Produto", 
-                                            options=products,
+                                            options=list(products.itertuples(index=False, name=None)),
                                             format_func=lambda value: f"{value[1]} {emoji.get(value[3])}")  
             selected_product_id = selected_product[0]
             association_prod_supp = self.stock_controller.get_stock_product_association(selected_product_id) 
             supp_id_column, supp_desc_column, current_price_column, status_column  = ('ID', 'Fornecedor', 'Preco Atual','Status')
-            df_association_prod_supp = pd.DataFrame(association_prod_supp, columns=[supp_id_column, supp_desc_column, current_price_column, status_column])
+            df_association_prod_supp = association_prod_supp.set_axis([supp_id_column, supp_desc_column, current_price_column, status_column], axis=1)
             st.write('')
             update_dataframe = st.data_editor(df_association_prod_supp,
                                             use_container_width=False,
@@ -253,20 +250,14 @@ class StockView:
 
         with tab_cancel_order:
             st.markdown('<h4 style="color:#d93d3d;">Cancelar Pedidos</h4>', unsafe_allow_html=True)
-            orders_items = self.stock_controller.get_pending_orders_items()
-
-            orders_df = pd.DataFrame(orders_items, columns=["order_id","order_date","supp_desc","Produtos"])
-            orders_df['order_date'] = pd.to_datetime(orders_df['order_date']).dt.strftime('%d/%m')
-
-            unique_combinations = orders_df.groupby(['order_id','order_date', 'supp_desc'])
-            for (order_id, order_date, supp_desc), group in unique_combinations:
-                with st.expander(f"{order_id} 🔖 {supp_desc} 📦 {order_date}"):
+            for order in self.stock_controller.get_pending_orders() or []:
+                with st.expander(self._order_label(order)):
                     col1, col2 = st.columns([3,1])
                     with col1:
-                        st.dataframe(group[['Produtos']], hide_index=True,)
+                        st.dataframe(self._order_items(order), hide_index=True,)
                     with col2:
-                        if st.button("Cancelar",key={f'{order_id}_cancel'}):
-                            retorno = self.stock_controller.cancel_order(str(order_id), log_call=True)
+                        if st.button("Cancelar",key={f'{order.id}_cancel'}):
+                            retorno = self.stock_controller.cancel_order(str(order.id), log_call=True)
                             if retorno:
                                 st.success("Pedido cancelado com sucesso!")
                             else:
@@ -275,10 +266,107 @@ class StockView:
                             st.rerun()
 
 
+    @staticmethod
+    def _order_label(order):
+        return f"{order.id} 🔖 {order.supplier} 📦 {order.order_date:%d/%m} 💲 {order.total:.2f}"
+
+
+    @staticmethod
+    def _order_items(order):
+        return pd.DataFrame([(item.product, item.quantity, item.unit_price, item.total_price) for item in order.items],
+                            columns=["Produtos", "Qtd.", "Preço", "Total"])
+
+
     def show_products_history(self) -> None:
         st.markdown('<h4 style="color:white; text-align: center;">Histórico do Estoque</h4>', unsafe_allow_html=True)
-        records = self.stock_controller.get_product_history(log_call=True)
-        st.dataframe(data=pd.DataFrame(records,columns=['ID','Descrição','Estoque','Data de Término']),
+        tab_history, tab_as_of = st.tabs(["Alterações", "Estoque em"])
+        with tab_history:
+            self.browse_products_history()
+
+            app_pass = st.text_input(label=":red[Senha]", type="password", key="history_pass")
+            if has_default_permission(app_pass) and st.button("Compactar Histórico"):
+                removed = self.stock_controller.compact_stock_history(log_call=True)
+                if removed is not None:
+                    st.success(f"{removed} registros redundantes removidos.")
+                else:
+                    st.error("Não foi possível realizar a operação!")
+
+        with tab_as_of:
+            now = datetime.now(timezone('America/Sao_Paulo'))
+            col1, col2 = st.columns(2)
+            with col1:
+                day = st.date_input(label="Data", format='DD/MM/YYYY', value=now.date(), max_value=now.date())
+            with col2:
+                moment = st.time_input("Horário", value=now.time().replace(second=0, microsecond=0), step=300)
+            at = timezone('America/Sao_Paulo').localize(datetime.combine(day, moment))
+            stock = self.stock_controller.stock_as_of(at)
+            if stock is not None:
+                # products_history is kept in UTC
+                stock['valid_from'] = stock['valid_from'].dt.tz_localize('UTC').dt.tz_convert('America/Sao_Paulo').dt.tz_localize(None)
+                st.dataframe(data=stock[['id', 'description', 'stock_in_units', 'valid_from']]
+                                  .set_axis(['ID','Descrição','Estoque','Contado em'], axis=1),
+                             hide_index=True,
+                             use_container_width=True)
+
+
+    def browse_products_history(self) -> None:
+        products = self.stock_controller.get_product_info()
+        today = datetime.now(timezone('America/Sao_Paulo')).date()
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            product = st.selectbox("Produto", options=[None] + products[["id", "description"]].values.tolist(),
+                                   format_func=lambda value: "Todos" if value is None else value[1])
+        with col2:
+            period = st.date_input("Período", value=(today - timedelta(days=30), today), max_value=today, format='DD/MM/YYYY')
+        with col3:
+            min_change = st.number_input("Variação mínima", min_value=0, value=0)
+        if len(period) != 2:
+            return
+
+        # products_history is kept in UTC, the period is picked in local days
+        start_date, end_date = (timezone('America/Sao_Paulo').localize(datetime.combine(day, datetime.min.time()))
+                                .astimezone(utc).strftime('%Y-%m-%d %H:%M:%S')
+                                for day in (period[0], period[1] + timedelta(days=1)))
+        filters = (product and product[0], start_date, end_date, min_change)
+        history = st.session_state.get("product_history")
+        if history is None or history["filters"] != filters:
+            history = st.session_state["product_history"] = {"filters": filters, "pages": [], "after": None, "done": False}
+            self.load_history_page(history, log_call=True)
+
+        if not history["pages"]:
+            st.info("Nenhuma alteração no período selecionado!")
+            return
+        records = pd.concat(history["pages"], ignore_index=True).drop(columns="history_id")
+        for column in ("valid_from", "valid_to"):
+            records[column] = (pd.to_datetime(records[column]).dt.tz_localize('UTC')
+                               .dt.tz_convert('America/Sao_Paulo').dt.tz_localize(None))
+
+        sparklines = self.stock_controller.get_product_history_sparklines(records["id"].unique(), start_date, end_date)
+        if sparklines is not None and not sparklines.empty:
+            names = records.drop_duplicates("id").set_index("id")["description"]
+            sparklines.insert(1, "description", sparklines["id"].map(names))
+            st.dataframe(data=sparklines.set_axis(['ID','Descrição','Tendência','Mínimo','Máximo','Atual','Alterações'], axis=1),
+                         column_config={"Tendência": st.column_config.LineChartColumn("Tendência")},
+                         hide_index=True,
+                         use_container_width=True)
+
+        st.dataframe(data=records.set_axis(['ID','Descrição','Estoque','Anterior','Variação','Contado em','Válido até'], axis=1),
                      hide_index=True,
                      use_container_width=True)
-        
\ No newline at end of file
+        if not history["done"]:
+            st.button("Carregar mais", on_click=self.load_history_page, args=(history,))
+
+
+    def load_history_page(self, history, log_call=False):
+        """Fetches the next keyset page of `history` with its filters, so a
+        rerun redraws the loaded pages without querying them again."""
+        product_id, start_date, end_date, min_change = history["filters"]
+        page = self.stock_controller.get_product_history(product_id, start_date, end_date, min_change,
+                                                         history["after"], log_call=log_call)
+        if page is None:
+            st.error("Não foi possível realizar a operação!")
+            return
+        history["done"] = len(page) < HISTORY_PAGE_SIZE
+        if not page.empty:
+            history["after"] = (page["valid_from"].iat[-1], int(page["id"].iat[-1]), int(page["history_id"].iat[-1]))
+            history["pages"].append(page)
@@ -0,0 +1,77 @@
+import pandas as pd
+import streamlit as st
+from database.cache import get_cache
+from database.connection import get_pool
+from utils.audit import get_audit_queue
+from utils.authentication import has_default_permission
+from utils.outbox import get_outbox
+from utils.metrics import metrics
+from utils.profiler import page_profiler
+
+
+class SystemView:
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+
+    def performance(self):
+        st.markdown('<h3><span style="color:#d05573;">Desempenho</span></h3>', unsafe_allow_html=True)
+        app_pass = st.text_input(label=":red[Senha]", type="password", key="performance_pass")
+        is_correct_password = has_default_permission(app_pass)
+        if app_pass != '' and not is_correct_password:
+            st.error('Senha Incorreta!')
+        if not is_correct_password:
+            return
+
+        st.caption(f"Desde {metrics.started_at.strftime('%d-%m-%Y %H:%M')}")
+
+        summary = metrics.summary()
+        if not summary:
+            st.info("Nenhuma chamada registrada ainda.")
+            return
+
+        df = pd.DataFrame(summary).rename(columns={"store": "Loja", "controller": "Controller", "method": "Método",
+                                                   "function_type": "Módulo", "action": "Ação",
+                                                   "calls": "Chamadas", "errors": "Erros",
+                                                   "rows_returned": "Linhas", "mean_ms": "Média (ms)",
+                                                   "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "p99_ms": "p99 (ms)"})
+        st.dataframe(df, hide_index=True, use_container_width=True)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.write("Conexões")
+            st.json(get_pool(self.db_path).stats())
+        with col2:
+            st.write("Cache de consultas")
+            st.json(get_cache(self.db_path).stats())
+        with col3:
+            st.write("Fila de logs")
+            st.json(get_audit_queue(self.db_path).stats())
+        with col4:
+            st.write("Fila de emails")
+            st.json(get_outbox(self.db_path).stats())
+
+        series = list(df[["Loja", "Método"]].itertuples(index=False, name=None))
+        store, method = st.selectbox("Histórico", options=series, format_func=lambda key: f"{key[0]} - {key[1]}")
+        history = metrics.history(store, method)
+        if history:
+            history_df = pd.DataFrame(history, columns=["Data", "Chamadas", "Erros", "p50", "p95", "p99"])
+            st.line_chart(history_df.iloc[::-1], x="Data", y=["p50", "p95", "p99"])
+
+        if st.button("Exportar Prometheus"):
+            metrics.export_prometheus()
+            st.success(f"Métricas escritas em {metrics.prom_file}")
+
+
+    def page_profile(self, page):
+        runs = page_profiler.runs(page)
+        if not runs:
+            return
+        with st.expander(f"⏱️ Profiler - {runs[-1].duration_ms:.0f} ms"):
+            durations = [run.duration_ms for run in runs]
+            st.caption(f"Últimas {len(runs)} execuções: média {sum(durations) / len(durations):.0f} ms, "
+                       f"máx. {max(durations):.0f} ms. Flame graph: {page_profiler.folded_path(page)}")
+            top = pd.DataFrame(page_profiler.top(page)).rename(columns={"function": "Função", "file": "Arquivo",
+                                                                        "calls": "Chamadas", "own_ms": "Próprio (ms)",
+                                                                        "cumulative_ms": "Acumulado (ms)"})
+            st.dataframe(top, hide_index=True, use_container_width=True)
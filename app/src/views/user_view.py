@@ -88,7 +88,7 @@ class UserView:
 
         if choosen_columns:
             if st.button("Consultar"):
-                users = self.user_controller.select_info_employees(database_columns)
+                users = self.user_controller.employees.all()
                 user_struct = {}
                 for column in database_columns:
                     user_struct[column] = [getattr(user, column) for user in users]
@@ -116,7 +116,7 @@ class UserView:
             st.error('Senha Incorreta!')
 
         if is_correct_password:
-            users = self.user_controller.select_info_employees(['numero_identificacao','complete_name','role','status','date_admissao'])
+            users = self.user_controller.employees.all()
             for user in users:
                 user_key = f"User {user.numero_identificacao}"
                 with st.expander(f"{user.complete_name} (ID: {user.numero_identificacao:06d})"):
@@ -134,7 +134,7 @@ class UserView:
 
     def update_user(self):
         st.markdown('<h4 style="color:white;">Alteração de Cadastro</h4>', unsafe_allow_html=True)
-        users = self.user_controller.select_info_employees(['numero_identificacao','complete_name'])
+        users = self.user_controller.employees.all()
         selected_user = st.selectbox("Funcionário", options=users, format_func=lambda value: f"{value.complete_name}")
         user_id = selected_user.numero_identificacao
         choosen_columns = st.multiselect("Campos", options=[
@@ -0,0 +1,74 @@
+"""Snapshot time and stored bytes per day of incremental backups.
+
+    python benchmarks/backup.py --tier large --days 7
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, time, timedelta, timezone
+from pathlib import Path
+import bench_env  # noqa: F401 - puts app/src on sys.path
+import synthetic
+
+
+def simulate_day(conn, rnd, sizes, day):
+    """A working day of writes: every punch, both closings and a stock count
+    of a third of the products."""
+    with conn:
+        conn.executemany("INSERT INTO attendance (user_id, date, type, time) VALUES (?, ?, ?, ?)",
+                         synthetic._attendance(rnd, sizes, [day]))
+        conn.executemany("""INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value, observation)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", synthetic._balance(rnd, [day]))
+        counted = rnd.sample(range(1, sizes["products"] + 1), sizes["products"] // 3)
+        conn.executemany("""UPDATE products SET current_stock_in_units = ?, last_update_stock = ? WHERE id = ?""",
+                         ((rnd.randint(0, 60), f"{day.isoformat()} 18:00:00.000000", product_id) for product_id in counted))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tier", choices=synthetic.tiers, default="medium")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from database.backup import LocalTarget, restore, snapshot
+
+    sizes = synthetic.tiers[args.tier]
+    rnd = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / f"{args.tier}.db")
+        conn = synthetic.generate(path, sizes, args.seed)
+        target = LocalTarget(Path(tmp) / "backups")
+
+        taken = []
+        for i in range(args.days + 1):
+            day = synthetic.END_DATE + timedelta(days=i)
+            if i:
+                simulate_day(conn, rnd, sizes, day)
+            manifest = snapshot(target, path, now=datetime.combine(day, time(23, 0), timezone.utc))
+            taken.append((day, manifest))
+            label = "full" if i == 0 else day.isoformat()
+            print(f"[{args.tier}] {label:<10} {manifest['duration_ms']:9.1f} ms  {manifest['new_pages']:5d} new pages  "
+                  f"{manifest['stored_bytes'] / 1024:10.1f} KiB stored  ({manifest['size'] / 1024:10.1f} KiB database)")
+
+        incremental = [manifest["stored_bytes"] for _, manifest in taken[1:]]
+        if incremental:
+            print(f"[{args.tier}] {sum(incremental) / len(incremental) / 1024:.1f} KiB stored per day, "
+                  f"a full compressed copy is {taken[0][1]['stored_bytes'] / 1024:.1f} KiB")
+
+        # Point in time: the snapshot of the middle day holds that day's closings and none after
+        day, manifest = taken[len(taken) // 2]
+        restored = str(Path(tmp) / "restored.db")
+        restore(target, restored, at=datetime.combine(day, time(23, 30), timezone.utc))
+        check = sqlite3.connect(restored)
+        last_closing = check.execute("SELECT MAX(date) FROM balance").fetchone()[0]
+        check.close()
+        conn.close()
+        if last_closing != day.isoformat():
+            raise SystemExit(f"Restore at {day} has closings up to {last_closing}")
+        print(f"[{args.tier}] restored {manifest['name']}, verified, last closing {last_closing}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+from pathlib import Path
+
+# The app modules are imported the same way the container runs them: from
+# app/src as working directory, with the error log in ../logs.
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+APP_SRC = BENCHMARKS_DIR.parent / "app" / "src"
+INVOKED_FROM = Path.cwd()
+
+(APP_SRC.parent / "logs").mkdir(exist_ok=True)
+os.chdir(APP_SRC)
+sys.path.insert(0, str(APP_SRC))
+
+
+def resolve(path):
+    """Command line paths are relative to where the script was started."""
+    return str(path) if str(path).startswith("file:") else str(INVOKED_FROM / path)
+
+
+def use_database(path):
+    """Points database.path at `path`. Must run before any app module is imported."""
+    os.environ["DATABASE_STREAMLIT_PATH"] = str(path)
@@ -0,0 +1,57 @@
+"""Purchase recommendations over product_supplier_last_price against the old
+query, which rescanned every order on each call, for growing order histories.
+
+    python benchmarks/recommendations.py --tier large --orders 2000 20000 50000 200000
+"""
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+import bench_env
+import synthetic
+
+LEGACY = bench_env.BENCHMARKS_DIR / "legacy" / "get_lowest_current_price.sql"
+
+
+def timed(conn, sql, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(sql).fetchall()
+        durations.append((time.perf_counter() - started) * 1000)
+    return rows, statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tier", choices=synthetic.tiers, default="medium")
+    parser.add_argument("--orders", type=int, nargs="+", default=[2000, 20000, 50000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from sql.catalog import catalog
+
+    legacy = LEGACY.read_text()
+    current = catalog["stock.get_lowest_current_price"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for orders in args.orders:
+            sizes = dict(synthetic.tiers[args.tier], orders=orders)
+            path = str(Path(tmp) / f"{args.tier}-{orders}.db")
+            synthetic.generate(path, sizes, args.seed).close()
+            conn = sqlite3.connect(path)
+            old_rows, old_ms = timed(conn, legacy, args.repeat)
+            new_rows, new_ms = timed(conn, current, args.repeat)
+            conn.close()
+
+            # The suppliers recommended must not change, only how the last order is found
+            if {row[:3] for row in old_rows} != {row[:3] for row in new_rows}:
+                raise SystemExit(f"[{args.tier}] {orders} orders: recommended products differ")
+            print(f"[{args.tier}] {orders:7d} orders  {len(new_rows):4d} products  "
+                  f"old {old_ms:9.1f} ms  new {new_ms:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""Times every public controller method on synthetic databases of each size tier.
+
+    python benchmarks/run.py                  # compare with benchmarks/baseline.json, exit 1 on regression
+    python benchmarks/run.py --save           # record a new baseline
+    python benchmarks/run.py --tiers large --memory
+"""
+import argparse
+import inspect
+import io
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+import bench_env
+import synthetic
+
+BASELINE = bench_env.BENCHMARKS_DIR / "baseline.json"
+
+
+class Context:
+    """Ids taken from the generated database so every case hits real rows.
+    Arguments are built outside the timed region."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.user_id = synthetic.FIRST_EMPLOYEE_ID
+        self.last_day = synthetic.END_DATE.isoformat()
+        self.month_start = synthetic.END_DATE.replace(day=1).isoformat()
+        self.year_start = synthetic.END_DATE.replace(month=1, day=1).isoformat()
+        self.supplier_id, self.product_id = conn.execute(
+            "SELECT supplier_id, product_id FROM suppliers_products WHERE status = 'Ativo' ORDER BY id LIMIT 1").fetchone()
+        self.supplier_products = [row[0] for row in conn.execute(
+            "SELECT product_id FROM suppliers_products WHERE supplier_id = ? AND status = 'Ativo' LIMIT 6", (self.supplier_id,))]
+        # A day's basket: six products from each of five suppliers
+        self.basket = [(supplier_id, product_id, 2.0, 10.0) for supplier_id, product_id in conn.execute(
+            """SELECT supplier_id, product_id FROM (
+                   SELECT supplier_id, product_id, ROW_NUMBER() OVER (PARTITION BY supplier_id ORDER BY id) AS n
+                   FROM suppliers_products WHERE status = 'Ativo')
+               WHERE n <= 6 AND supplier_id IN (SELECT DISTINCT supplier_id FROM suppliers_products LIMIT 5)""")]
+
+
+    def future_day(self, i):
+        return (date(2100, 1, 1) + timedelta(days=i)).isoformat()
+
+
+    def last_months(self, count):
+        """[start, end) ranges of the `count` months up to END_DATE."""
+        ranges = []
+        end = synthetic.END_DATE.replace(day=1) + timedelta(days=32)
+        for _ in range(count):
+            end = end.replace(day=1)
+            start = (end - timedelta(days=1)).replace(day=1)
+            ranges.append((start.isoformat(), end.isoformat()))
+            end = start
+        return ranges
+
+
+    def balance_page(self, i):
+        """The (date, period) cursor of the i-th page of this year's balance
+        report, wrapping around after the last page; None is the first."""
+        from controllers.caixa_controller import REPORT_PAGE_SIZE
+        if not hasattr(self, "balance_cursors"):
+            keys = self.conn.execute("SELECT date, period FROM balance WHERE date >= ? ORDER BY date DESC, period DESC",
+                                     (self.year_start,)).fetchall()
+            self.balance_cursors = [None] + keys[REPORT_PAGE_SIZE - 1:-1:REPORT_PAGE_SIZE]
+        return self.balance_cursors[i % len(self.balance_cursors)]
+
+
+    def next_pending_order(self):
+        return str(self.conn.execute("SELECT MIN(id) FROM orders WHERE status = 'Pendente'").fetchone()[0])
+
+
+    def products_frame(self):
+        import pandas as pd
+        rows = self.conn.execute("SELECT id, description, current_stock_in_units, min_stock, status FROM products").fetchall()
+        frame = pd.DataFrame(rows, columns=["ID", "Descrição", "Estoque", "Estoque Minimo", "Status"])
+        frame["Id"] = frame["ID"]
+        frame["Estoque Atual"] = frame["Estoque"] + 1
+        return frame
+
+
+    def association_frame(self):
+        import pandas as pd
+        rows = self.conn.execute("""SELECT s.id, s.description, COALESCE(sp.current_price, 0), sp.status = 'Ativo'
+                                    FROM suppliers s LEFT JOIN suppliers_products sp
+                                    ON sp.supplier_id = s.id AND sp.product_id = ?""", (self.product_id,)).fetchall()
+        return pd.DataFrame(rows, columns=["ID", "Fornecedor", "Preco Atual", "Status"]).fillna(False)
+
+
+    def catalog_file(self, i, rows=2000):
+        """A supplier catalog of `rows` new products as an uploaded CSV."""
+        lines = ["description,min_stock,package_type,current_stock"]
+        lines += [f"CATALOGO {i} ITEM {n:05d},{n % 20 + 1},{('Fardo', 'Unidade')[n % 2]},{n % 50}" for n in range(rows)]
+        return io.BytesIO("\n".join(lines).encode()), "catalog.csv"
+
+
+    def prices_file(self, i, rows=2000):
+        lines = ["supplier_id,product,current_price"]
+        lines += [f"{self.supplier_id},CATALOGO 0 ITEM {n:05d},{n % 30 + i}.50" for n in range(rows)]
+        return io.BytesIO("\n".join(lines).encode()), "prices.csv"
+
+
+    def counts_file(self, i):
+        rows = self.conn.execute("SELECT id FROM products").fetchall()
+        lines = ["product_id,current_stock"] + [f"{product_id},{(product_id + i) % 60}" for product_id, in rows]
+        return io.BytesIO("\n".join(lines).encode()), "counts.csv"
+
+
+# "Controller.method": function(ctx, i) -> positional arguments of call number i.
+# Cases run in this order, so writes that need earlier rows come after them.
+cases = {
+    "UserController.insert_employee": lambda ctx, i: ({"numero_identificacao": 900000 + i, "complete_name": f"BENCH {i}",
+                                                       "date_nascimento": "1990-01-01", "date_admissao": "2024-01-01",
+                                                       "role": "Padeiro", "telephone_number": "85999999999", "observation": "-"},),
+    "EmployeeDirectory.all": lambda ctx, i: (),
+    "EmployeeDirectory.get": lambda ctx, i: (ctx.user_id,),
+    "EmployeeDirectory.active": lambda ctx, i: (),
+    "EmployeeDirectory.by_role": lambda ctx, i: ("Atendente de Caixa",),
+    "UserController.update_employees_status": lambda ctx, i: (900000, i % 2 == 0),
+    "UserController.update_employee": lambda ctx, i: ([("observation", f"bench {i}")], 900000),
+
+    "AttendanceController.create_attendance": lambda ctx, i: (ctx.user_id, ctx.future_day(i), "Entrada", "07:00"),
+    "AttendanceController.get_attendance_by_type_and_date": lambda ctx, i: (ctx.user_id, ctx.last_day, "Entrada"),
+    "AttendanceController.modify_attendance": lambda ctx, i: (ctx.user_id, ctx.future_day(i), "07:10", "Entrada"),
+    "AttendanceController.get_attendance_by_periods": lambda ctx, i: (ctx.month_start, ctx.last_day),
+    "AttendanceController.get_attendance_report": lambda ctx, i: (ctx.last_months(12),),
+    "AttendanceController.get_worked_hours_summary": lambda ctx, i: (ctx.year_start, ctx.last_day),
+    "AttendanceController.get_timesheet": lambda ctx, i: (ctx.last_months(1),),
+    "AttendanceController.delete_attendance": lambda ctx, i: (ctx.user_id, ctx.future_day(i), "Entrada"),
+
+    "CaixaController.create_closing_balance": lambda ctx, i: (ctx.user_id, ctx.future_day(i), "Dia", "0.00", "0.00", "150.00", "bench"),
+    "CaixaController.update_closing_balance": lambda ctx, i: (ctx.future_day(i), "Dia", "175.00", "bench 2"),
+    "CaixaController.get_closing_values": lambda ctx, i: (ctx.last_day, "Dia"),
+    "CaixaController.get_reporting_balance": lambda ctx, i: (ctx.year_start,),
+    "CaixaController.get_reporting_balance_page": lambda ctx, i: (ctx.year_start, ctx.balance_page(i)),
+    "CaixaController.get_balance_totals": lambda ctx, i: (ctx.year_start, ctx.last_day),
+
+    "StockController.create_product": lambda ctx, i: (f"BENCH {i}", 1, 5, "Unidade", [ctx.supplier_id]),
+    "StockController.create_order": lambda ctx, i: ([(ctx.supplier_id, product_id, 2.0, 10.0) for product_id in ctx.supplier_products],),
+    "StockController.create_orders": lambda ctx, i: (ctx.basket,),
+    "StockController.get_stock_product_association": lambda ctx, i: (ctx.product_id,),
+    "StockController.update_stock_product_association": lambda ctx, i: (ctx.association_frame(), ctx.product_id),
+    "StockController.update_stock_qt": lambda ctx, i: (ctx.products_frame(),),
+    "StockController.get_product_info": lambda ctx, i: (),
+    "StockController.update_product_info": lambda ctx, i: (ctx.products_frame(),),
+    "StockController.get_product_update_info": lambda ctx, i: (),
+    "StockController.get_suppliers_info": lambda ctx, i: (),
+    "StockController.get_suppliers_products_info": lambda ctx, i: (ctx.product_id,),
+    "StockController.get_pending_orders": lambda ctx, i: (),
+    "StockController.update_order_status": lambda ctx, i: (ctx.next_pending_order(),),
+    "StockController.cancel_order": lambda ctx, i: (ctx.next_pending_order(),),
+    "StockController.calculate_recommended_orders_items": lambda ctx, i: (),
+    "StockController.get_stock_valuation": lambda ctx, i: (),
+    "StockController.get_product_history": lambda ctx, i: (),
+    "StockController.get_product_history_sparklines": lambda ctx, i: ([ctx.product_id], ctx.year_start, ctx.last_day),
+    "StockController.stock_as_of": lambda ctx, i: (f"{ctx.month_start} 12:00:00",),
+    "StockController.compact_stock_history": lambda ctx, i: (),
+
+    "BulkController.import_products": lambda ctx, i: ctx.catalog_file(i),
+    "BulkController.import_supplier_prices": lambda ctx, i: ctx.prices_file(i),
+    "BulkController.import_stock_counts": lambda ctx, i: ctx.counts_file(i),
+    "BulkController.export_products": lambda ctx, i: (io.StringIO(),),
+    "BulkController.export_supplier_prices": lambda ctx, i: (io.StringIO(),),
+    "BulkController.export_stock_counts": lambda ctx, i: (io.StringIO(),),
+    "SearchController.search": lambda ctx, i: (("produto 01", "fornecedor", "padeiro", "pa")[i % 4],),
+}
+
+
+def controllers(path):
+    from controllers.user_controller import UserController
+    from controllers.attendance_controller import AttendanceController
+    from controllers.caixa_controller import CaixaController
+    from controllers.stock_controller import StockController
+    from controllers.bulk_controller import BulkController
+    from controllers.search_controller import SearchController
+    instances = {cls.__name__: cls(path) for cls in (UserController, AttendanceController, CaixaController, StockController,
+                                                     BulkController, SearchController)}
+    instances["EmployeeDirectory"] = instances["UserController"].employees
+    return instances
+
+
+def uncovered(instances):
+    public = {f"{name}.{method}" for name, instance in instances.items()
+              for method, _ in inspect.getmembers(type(instance), inspect.isfunction) if not method.startswith("_")}
+    return sorted(public - set(cases))
+
+
+def run_tier(tier, args):
+    from database.connection import get_pool
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = synthetic.memory_uri(tier) if args.memory else str(Path(tmp) / f"{tier}.db")
+        started = time.perf_counter()
+        conn = synthetic.generate(path, synthetic.tiers[tier], args.seed)
+        print(f"[{tier}] generated in {time.perf_counter() - started:.1f}s")
+
+        instances = controllers(path)
+        ctx = Context(conn)
+        results = {}
+        for case, build_args in cases.items():
+            controller, method = case.split(".")
+            call = getattr(instances[controller], method)
+            timings = []
+            for i in range(args.repeat + 1):
+                call_args = build_args(ctx, i)
+                started = time.perf_counter()
+                result = call(*call_args)
+                timings.append((time.perf_counter() - started) * 1000)
+            # the first call warms the pool and the statement cache
+            results[case] = round(statistics.median(timings[1:]), 3)
+            # controllers report failures by returning None or the exception
+            failed = result is None or isinstance(result, Exception)
+            print(f"[{tier}] {case:<55}{results[case]:>10.3f} ms{'  FAILED: ' + str(result) if failed else ''}")
+
+        for case in uncovered(instances):
+            print(f"[{tier}] no benchmark case for {case}")
+        get_pool(path).close_all()
+        conn.close()
+        return results
+
+
+def compare(baseline, current, tolerance, min_delta_ms):
+    regressions = []
+    for tier, results in current.items():
+        for case, now in results.items():
+            before = baseline.get("tiers", {}).get(tier, {}).get("results_ms", {}).get(case)
+            if before is None:
+                continue
+            if now > before * (1 + tolerance) and now - before > min_delta_ms:
+                regressions.append((tier, case, before, now))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiers", nargs="+", choices=synthetic.tiers, default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", action="store_true", help="use shared in-memory databases instead of temp files")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio before failing")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+    baseline_path = Path(bench_env.resolve(args.baseline))
+
+    current = {tier: run_tier(tier, args) for tier in args.tiers}
+
+    if args.save:
+        report = {"meta": {"seed": args.seed, "repeat": args.repeat, "memory": args.memory,
+                           "python": platform.python_version(), "sqlite": sqlite3.sqlite_version},
+                  "tiers": {tier: {"sizes": synthetic.tiers[tier], "results_ms": results} for tier, results in current.items()}}
+        baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, run with --save first")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline["meta"]["memory"] != args.memory or baseline["meta"]["seed"] != args.seed:
+        print("Warning: baseline was recorded with a different --memory/--seed setting")
+    regressions = compare(baseline, current, args.tolerance, args.min_delta_ms)
+    for tier, case, before, now in regressions:
+        print(f"REGRESSION [{tier}] {case}: {before:.3f} ms -> {now:.3f} ms ({now / before:.2f}x)")
+    if not regressions:
+        print("No regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Deterministic synthetic data for the real schema.
+
+    python benchmarks/synthetic.py /tmp/bakery.db --tier large --seed 7
+"""
+import argparse
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+import bench_env
+
+tiers = {
+    "small":  {"employees": 10, "days": 365,     "products": 60,  "suppliers": 5,  "orders": 2000},
+    "medium": {"employees": 25, "days": 3 * 365, "products": 250, "suppliers": 15, "orders": 20000},
+    "large":  {"employees": 40, "days": 5 * 365, "products": 550, "suppliers": 30, "orders": 50000},
+}
+
+END_DATE = date(2024, 12, 31)
+ROLES = ["Padeiro", "Auxiliar de Padeiro", "Atendente de Caixa", "Cozinheira"]
+# "Entrada Almoço" starts the lunch break and "Saída Almoço" ends it
+PUNCHES = [("Entrada", 6 * 60), ("Entrada Almoço", 11 * 60), ("Saída Almoço", 12 * 60), ("Saída", 15 * 60)]
+FIRST_EMPLOYEE_ID = 100000
+
+
+def memory_uri(name="bench"):
+    """Shared-cache in-memory database that every pooled connection sees.
+    It lives while at least one connection to it stays open."""
+    return f"file:{name}?mode=memory&cache=shared"
+
+
+def _hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _users(rnd, sizes):
+    for i in range(sizes["employees"]):
+        yield (FIRST_EMPLOYEE_ID + i, f"FUNCIONARIO {i:03d}",
+               f"{rnd.randint(1960, 2004)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+               (END_DATE - timedelta(days=sizes["days"])).isoformat(),
+               ROLES[i % len(ROLES)], f"859{rnd.randint(10**7, 10**8 - 1)}", "-",
+               "Ativo" if rnd.random() > 0.1 else "Inativo")
+
+
+def _attendance(rnd, sizes, days):
+    for user in range(sizes["employees"]):
+        user_id = FIRST_EMPLOYEE_ID + user
+        for day in days:
+            if day.weekday() == 6 and rnd.random() < 0.8:
+                continue
+            for type, minute in PUNCHES:
+                if rnd.random() < 0.02:
+                    continue
+                yield (user_id, day.isoformat(), type, _hhmm(minute + rnd.randint(-20, 25)))
+
+
+def _balance(rnd, days):
+    for day in days:
+        for period in ("Dia", "Tarde"):
+            yield (FIRST_EMPLOYEE_ID + 2, day.isoformat(), period,
+                   round(rnd.uniform(200, 900), 2), round(rnd.uniform(100, 600), 2), round(rnd.uniform(50, 700), 2),
+                   f"{rnd.randint(1, 5)} gelo {rnd.randint(1, 99)},00\nfornecedor {rnd.randint(1, 9)} {rnd.randint(10, 999)},{rnd.randint(10, 99)}")
+
+
+def _suppliers_products(rnd, sizes):
+    associations = {}
+    for product_id in range(1, sizes["products"] + 1):
+        suppliers = rnd.sample(range(1, sizes["suppliers"] + 1), k=min(sizes["suppliers"], rnd.randint(1, 3)))
+        for supplier_id in suppliers:
+            price = round(rnd.uniform(2, 250), 2)
+            associations.setdefault(supplier_id, []).append((product_id, price))
+    return associations
+
+
+def _orders(rnd, sizes, associations, start):
+    suppliers = sorted(associations)
+    span = sizes["days"] * 24 * 3600
+    orders, items = [], []
+    for order_id in range(1, sizes["orders"] + 1):
+        supplier_id = rnd.choice(suppliers)
+        ordered_at = datetime.combine(start, datetime.min.time()) + timedelta(seconds=span * order_id // (sizes["orders"] + 1))
+        if order_id > sizes["orders"] - 5:
+            status, delivered_at = "Pendente", None
+        elif rnd.random() < 0.05:
+            status, delivered_at = "Cancelado", None
+        else:
+            status, delivered_at = "Entregue", ordered_at + timedelta(hours=rnd.randint(4, 48))
+        orders.append((order_id, str(ordered_at), supplier_id, delivered_at and str(delivered_at), status,
+                       str(delivered_at or ordered_at)))
+        catalog = associations[supplier_id]
+        for product_id, price in rnd.sample(catalog, k=min(len(catalog), rnd.randint(1, 8))):
+            items.append((order_id, product_id, float(rnd.randint(1, 10)), round(price * rnd.uniform(0.9, 1.1), 2)))
+    return orders, items
+
+
+def _products_history(rnd, sizes, days, stock):
+    for product_id in range(1, sizes["products"] + 1):
+        previous = None
+        for day in days:
+            counted = max(0, stock[product_id] + rnd.randint(-5, 5))
+            valid_from = f"{day.isoformat()} 18:00:00"
+            if previous is not None:
+                yield (*previous, valid_from)
+            previous = (product_id, f"PRODUTO {product_id:04d}", counted, valid_from)
+        if previous is not None:
+            yield (*previous, None)
+
+
+def generate(path, sizes, seed=42):
+    """Creates the schema at `path` through the migration runner and fills it.
+    Returns an open connection, which keeps a :memory: database alive."""
+    from database.migrate import migrate
+
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path, uri=True)
+    migrate(path)
+    start = END_DATE - timedelta(days=sizes["days"] - 1)
+    days = [start + timedelta(days=i) for i in range(sizes["days"])]
+
+    conn.execute("PRAGMA synchronous = OFF")
+    with conn:
+        conn.executemany("""INSERT INTO users (numero_identificacao, complete_name, date_nascimento, date_admissao,
+                            role, telephone_number, observation, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                         _users(rnd, sizes))
+        conn.executemany("INSERT INTO attendance (user_id, date, type, time) VALUES (?, ?, ?, ?)",
+                         _attendance(rnd, sizes, days))
+        conn.executemany("""INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value, observation)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", _balance(rnd, days))
+        conn.executemany("INSERT INTO suppliers (id, description) VALUES (?, ?)",
+                         ((i, f"FORNECEDOR {i:03d}") for i in range(1, sizes["suppliers"] + 1)))
+
+        stock = {i: rnd.randint(0, 60) for i in range(1, sizes["products"] + 1)}
+        last_count = f"{END_DATE.isoformat()} 18:00:00.000000"
+        conn.executemany("""INSERT INTO products (id, description, current_stock_in_units, min_stock, status,
+                            package_type, last_update_stock) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                         ((i, f"PRODUTO {i:04d}", stock[i], rnd.randint(5, 40),
+                           "Ativo" if rnd.random() > 0.05 else "Inativo", rnd.choice(["Fardo", "Unidade"]), last_count)
+                          for i in stock))
+
+        associations = _suppliers_products(rnd, sizes)
+        conn.executemany("""INSERT INTO suppliers_products (supplier_id, product_id, initial_price, status, current_price)
+                            VALUES (?, ?, ?, ?, ?)""",
+                         ((supplier_id, product_id, price, "Ativo" if rnd.random() > 0.1 else "Inativo", price)
+                          for supplier_id, products in sorted(associations.items()) for product_id, price in products))
+
+        orders, items = _orders(rnd, sizes, associations, start)
+        conn.executemany("""INSERT INTO orders (id, order_date, supplier_id, delivery_date, status, last_update)
+                            VALUES (?, ?, ?, ?, ?, ?)""", orders)
+        conn.executemany("INSERT INTO orders_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)", items)
+        conn.executemany("""INSERT INTO products_history (id, description, stock_in_units, valid_from, valid_to)
+                            VALUES (?, ?, ?, ?, ?)""", _products_history(rnd, sizes, days, stock))
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("ANALYZE")
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="database file, created if missing")
+    parser.add_argument("--tier", choices=tiers, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    for key in tiers["small"]:
+        parser.add_argument(f"--{key}", type=int, help=f"override the tier's {key}")
+    args = parser.parse_args()
+
+    sizes = {key: getattr(args, key) or value for key, value in tiers[args.tier].items()}
+    conn = generate(bench_env.resolve(args.path), sizes, args.seed)
+    for table in ("users", "attendance", "balance", "products", "orders", "orders_items", "products_history"):
+        print(f"{table:<18}{conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]:>10}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Vectorized timesheet engine against a per-row Python loop over Attendance objects.
+
+    python benchmarks/timesheet.py --tier large
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+import bench_env  # noqa: F401 - puts app/src on sys.path
+import synthetic
+
+TYPES = {"Entrada": "entrada", "Entrada Almoço": "entrada_almoco", "Saída Almoço": "saida_almoco", "Saída": "saida"}
+
+
+def _night(start, end, timesheet):
+    return (max(0, min(end, timesheet.NIGHT_END) - max(start, 0))
+            + max(0, min(end, 24 * 60) - max(start, timesheet.NIGHT_START)))
+
+
+def naive_totals(attendances, holidays):
+    """The same rules as timesheet.compute_timesheet, one day at a time."""
+    from controllers import timesheet
+
+    days = {}
+    for attendance in attendances:
+        hours, minutes = attendance.time.split(":")
+        days.setdefault((attendance.user_id, attendance.date), {})[TYPES[attendance.type]] = int(hours) * 60 + int(minutes)
+
+    holidays = {str(holiday) for holiday in holidays}
+    totals = {}
+    for (user_id, day), punches in days.items():
+        entrada, saida = punches.get("entrada"), punches.get("saida")
+        entrada_almoco, saida_almoco = punches.get("entrada_almoco"), punches.get("saida_almoco")
+        worked = night = 0
+        if None not in (entrada, entrada_almoco, saida_almoco, saida):
+            worked = max(0, entrada_almoco - entrada) + max(0, saida - saida_almoco)
+            night = _night(entrada, entrada_almoco, timesheet) + _night(saida_almoco, saida, timesheet)
+        elif entrada is not None and saida is not None and entrada_almoco is None and saida_almoco is None:
+            worked = max(0, saida - entrada)
+            night = _night(entrada, saida, timesheet)
+        rest_day = date.fromisoformat(day).weekday() == 6 or day in holidays
+        overtime = 0 if rest_day else max(0, worked - timesheet.WORKDAY_MINUTES)
+        total = totals.setdefault(user_id, [0, 0, 0, 0])
+        total[0] += worked
+        total[1] += overtime
+        total[2] += night
+        total[3] += worked if rest_day else 0
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tier", choices=synthetic.tiers, default="medium")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from controllers.attendance_controller import AttendanceController
+    from controllers.timesheet import brazilian_holidays, summarize
+
+    sizes = synthetic.tiers[args.tier]
+    start = synthetic.END_DATE - timedelta(days=sizes["days"] - 1)
+    end = synthetic.END_DATE + timedelta(days=1)
+    holidays = brazilian_holidays(range(start.year, end.year + 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / f"{args.tier}.db")
+        synthetic.generate(path, sizes, args.seed).close()
+        controller = AttendanceController(path)
+
+        vectorized, naive = [], []
+        for _ in range(args.repeat):
+            controller.cache.clear()
+            started = time.perf_counter()
+            totals = summarize(controller.get_timesheet([(start.isoformat(), end.isoformat())], holidays))
+            vectorized.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            expected = naive_totals(controller.get_attendance_by_periods(start.isoformat(), synthetic.END_DATE.isoformat()), holidays)
+            naive.append((time.perf_counter() - started) * 1000)
+
+    for row in totals.itertuples():
+        overtime = row.overtime_50_minutes + row.overtime_100_minutes
+        if [row.worked_minutes, overtime, row.night_minutes, row.sunday_holiday_minutes] != expected[row.user_id]:
+            raise SystemExit(f"Totals differ for employee {row.user_id}")
+
+    days = int(totals["days"].sum())
+    print(f"[{args.tier}] {days} employee-days, totals match")
+    print(f"[{args.tier}] vectorized {statistics.median(vectorized):10.1f} ms  (load + compute + summarize)")
+    print(f"[{args.tier}] naive loop {statistics.median(naive):10.1f} ms  (load Attendance objects + loop)")
+
+
+if __name__ == '__main__':
+    main()
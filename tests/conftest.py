@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+# The app modules are imported the same way the container runs them: from
+# app/src as working directory, with the error log in ../logs. The synthetic
+# data generator of the benchmarks fills the test databases.
+ROOT = Path(__file__).resolve().parents[1]
+APP_SRC = ROOT / "app" / "src"
+
+(APP_SRC.parent / "logs").mkdir(exist_ok=True)
+os.chdir(APP_SRC)
+sys.path.insert(0, str(APP_SRC))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+os.environ.setdefault("DATABASE_STREAMLIT_PATH", str(Path(tempfile.mkdtemp()) / "default.db"))
+
+SIZES = {"employees": 4, "days": 90, "products": 30, "suppliers": 4, "orders": 300}
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Path of a migrated database filled with seeded synthetic data, and an
+    open connection to it."""
+    import synthetic
+    path = str(tmp_path / "bakery.db")
+    conn = synthetic.generate(path, SIZES, seed=7)
+    yield path, conn
+    conn.close()
@@ -0,0 +1,76 @@
+"""Snapshots restore to the exact database of their time, and only store the
+pages that changed since the previous one."""
+import sqlite3
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+import pytest
+
+MORNING = datetime(2025, 1, 2, 8, 0, tzinfo=timezone.utc)
+EVENING = datetime(2025, 1, 2, 20, 0, tzinfo=timezone.utc)
+
+
+def dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return list(conn.iterdump())
+    finally:
+        conn.close()
+
+
+def test_point_in_time_restore(db, tmp_path):
+    from database.backup import LocalTarget, restore, snapshot
+    path, conn = db
+    target = LocalTarget(tmp_path / "backups")
+
+    first = snapshot(target, path, pack_bytes=64 * 1024, now=MORNING)
+    morning = dump(path)
+    with conn:
+        conn.execute("""INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value)
+                        VALUES (NULL, '2025-01-02', 'Dia', 100, 50, 25)""")
+        conn.execute("UPDATE products SET current_stock_in_units = current_stock_in_units + 5 WHERE id <= 3")
+    second = snapshot(target, path, pack_bytes=64 * 1024, now=EVENING)
+
+    assert first["new_packs"] > 1
+    assert 0 < second["new_pages"] < first["new_pages"] / 4
+
+    restored = tmp_path / "morning.db"
+    assert restore(target, restored, at=datetime(2025, 1, 2, 12, 0, tzinfo=timezone.utc))["name"] == first["name"]
+    assert dump(restored) == morning
+
+    latest = tmp_path / "latest.db"
+    assert restore(target, latest, threads=2)["name"] == second["name"]
+    assert dump(latest) == dump(path)
+    check = sqlite3.connect(latest)
+    assert check.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    check.close()
+
+
+def test_same_second_snapshots_are_kept(db, tmp_path):
+    from database.backup import LocalTarget, manifests, snapshot
+    path, _ = db
+    target = LocalTarget(tmp_path / "backups")
+    snapshot(target, path, now=MORNING)
+    snapshot(target, path, now=MORNING)
+    assert len(manifests(target)) == 2
+
+
+def test_corrupt_pack_is_not_restored(db, tmp_path):
+    from database.backup import BackupError, LocalTarget, restore, snapshot
+    path, _ = db
+    target = LocalTarget(tmp_path / "backups")
+    manifest = snapshot(target, path, now=MORNING)
+    digest, pack, start, end = manifest["pages"][0]
+    # Another page, compressed and of the same length, so only the hash check can tell
+    pack_path = tmp_path / "backups" / pack
+    data = bytearray(pack_path.read_bytes())
+    replacement = zlib.compress(b"\0" * manifest["page_size"], 9)
+    assert len(replacement) <= end - start
+    data[start:end] = replacement.ljust(end - start, b"\0")
+    pack_path.write_bytes(bytes(data))
+
+    output = tmp_path / "restored.db"
+    with pytest.raises(BackupError):
+        restore(target, output)
+    assert not output.exists()
+    assert not Path(f"{output}.restoring").exists()
@@ -0,0 +1,53 @@
+"""Cached reads are dropped by the writes that make them stale, and only by those."""
+import sqlite3
+import pytest
+
+
+def test_controller_write_invalidates_its_tables(db):
+    from controllers.caixa_controller import CaixaController
+    path, conn = db
+    caixa = CaixaController(path)
+    date, period, money_value = conn.execute("SELECT date, period, money_value FROM balance ORDER BY id DESC LIMIT 1").fetchone()
+    products = "SELECT COUNT(*) FROM products"
+
+    before = caixa.get_balance_totals("2000-01-01", "2100-01-01")
+    assert caixa.get_balance_totals("2000-01-01", "2100-01-01") == before
+    assert caixa.cache.fetchall(products) == caixa.cache.fetchall(products)
+    hits = caixa.cache.stats()["hits"]
+    assert hits == 2
+
+    assert caixa.update_closing_balance(date, period, money_value + 100, "corrigido") is True
+    after = caixa.get_balance_totals("2000-01-01", "2100-01-01")
+    assert after["money_value"] == pytest.approx(before["money_value"] + 100)
+    assert after["acc_money"] == pytest.approx(before["acc_money"] + 100)
+    # products isn't written by a closing, its entry survives
+    caixa.cache.fetchall(products)
+    assert caixa.cache.stats()["hits"] == hits + 1
+
+
+def test_external_write_clears_the_cache(db):
+    from database.cache import get_cache
+    path, _ = db
+    cache = get_cache(path)
+    count = "SELECT COUNT(*) FROM suppliers"
+    suppliers = cache.fetchall(count)[0][0]
+
+    # Another process, as far as the cache can tell
+    other = sqlite3.connect(path)
+    with other:
+        other.execute("INSERT INTO suppliers (description) VALUES ('FORNECEDOR NOVO')")
+    other.close()
+
+    assert cache.fetchall(count)[0][0] == suppliers + 1
+
+
+def test_version_moves_only_for_written_tables(db):
+    from database.cache import get_cache
+    path, _ = db
+    cache = get_cache(path)
+    orders, users = cache.version(("orders",)), cache.version(("users",))
+
+    cache.invalidate(("orders", "orders_items"))
+
+    assert cache.version(("orders",)) != orders
+    assert cache.version(("users",)) == users
@@ -0,0 +1,106 @@
+"""The trigger-maintained tables match a recomputation from their base tables
+after every kind of write the app makes."""
+import pytest
+
+BALANCE_DAILY = """SELECT date, SUM(COALESCE(card_value, 0)), SUM(COALESCE(pix_value, 0)), SUM(COALESCE(money_value, 0)),
+                          COUNT(*), SUM(SUM(COALESCE(money_value, 0))) OVER (ORDER BY date)
+                   FROM balance WHERE date IS NOT NULL GROUP BY date ORDER BY date"""
+
+BALANCE_MONTHLY = """SELECT substr(date, 1, 7), SUM(COALESCE(card_value, 0)), SUM(COALESCE(pix_value, 0)),
+                            SUM(COALESCE(money_value, 0)), COUNT(*),
+                            SUM(SUM(COALESCE(money_value, 0))) OVER (ORDER BY substr(date, 1, 7))
+                     FROM balance WHERE date IS NOT NULL GROUP BY substr(date, 1, 7) ORDER BY 1"""
+
+# Same definition as the backfill of migration 0010
+LAST_PRICE = """SELECT product_id, supplier_id, order_date, unit_price, last_delivery_date, pending_orders
+                FROM (
+                    SELECT oi.product_id, o.supplier_id, o.order_date, oi.unit_price,
+                           MAX(CASE WHEN o.status = 'Entregue' THEN o.delivery_date END) OVER pair AS last_delivery_date,
+                           SUM(o.status = 'Pendente') OVER pair AS pending_orders,
+                           ROW_NUMBER() OVER (pair ORDER BY o.order_date DESC, o.id DESC) AS rn
+                    FROM orders_items oi
+                    JOIN orders o ON o.id = oi.order_id
+                    WHERE o.status != 'Cancelado'
+                    WINDOW pair AS (PARTITION BY oi.product_id, o.supplier_id)
+                )
+                WHERE rn = 1
+                ORDER BY product_id, supplier_id"""
+
+
+def assert_rollup(conn, table, key, recompute):
+    stored = conn.execute(f"SELECT * FROM {table} ORDER BY {key}").fetchall()
+    expected = conn.execute(recompute).fetchall()
+    assert [row[0] for row in stored] == [row[0] for row in expected]
+    for row, expected_row in zip(stored, expected):
+        assert row[1:] == pytest.approx(expected_row[1:]), row[0]
+
+
+def test_attendance_daily_follows_punches(db):
+    _, conn = db
+    user_id, day = conn.execute("SELECT user_id, MAX(date) FROM attendance GROUP BY user_id LIMIT 1").fetchone()
+    with conn:
+        conn.executemany("INSERT INTO attendance (user_id, date, type, time) VALUES (?, '2025-01-02', ?, ?)",
+                         [(user_id, "Entrada", "06:00"), (user_id, "Saída", "14:30")])
+        conn.execute("UPDATE attendance SET time = '05:45' WHERE user_id = ? AND date = ? AND type = 'Entrada'", (user_id, day))
+        # A punch moved to another day changes both days
+        conn.execute("UPDATE attendance SET date = '2025-01-03' WHERE user_id = ? AND date = ? AND type = 'Saída'",
+                     (user_id, day))
+        conn.execute("""DELETE FROM attendance WHERE id = (SELECT MIN(id) FROM attendance WHERE type = 'Entrada Almoço')""")
+
+    assert conn.execute("SELECT * FROM attendance_daily EXCEPT SELECT * FROM attendance_daily_view").fetchall() == []
+    assert conn.execute("SELECT * FROM attendance_daily_view EXCEPT SELECT * FROM attendance_daily").fetchall() == []
+
+
+def test_balance_rollups_follow_closings(db):
+    _, conn = db
+    first, last = conn.execute("SELECT MIN(id), MAX(id) FROM balance").fetchone()
+    with conn:
+        # In the past, so acc_money of every later day and month moves
+        conn.execute("""INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value)
+                        SELECT user_id, date, 'Extra', 10.5, 2.25, 99.75 FROM balance WHERE id = ?""", (first + 3,))
+        conn.execute("""INSERT INTO balance (user_id, date, period, card_value, pix_value, money_value)
+                        VALUES (NULL, '2025-02-01', 'Dia', 1, 2, 3)""")
+        conn.execute("UPDATE balance SET money_value = money_value + 40 WHERE id = ?", (first + 10,))
+        conn.execute("UPDATE balance SET date = '2025-02-01', period = 'Noite' WHERE id = ?", (last,))
+        conn.execute("UPDATE balance SET money_value = NULL WHERE id = ?", (first + 20,))
+        conn.execute("DELETE FROM balance WHERE id = ?", (first + 30,))
+
+    assert_rollup(conn, "balance_daily", "date", BALANCE_DAILY)
+    assert_rollup(conn, "balance_monthly", "month", BALANCE_MONTHLY)
+
+
+def test_last_price_follows_orders(db):
+    _, conn = db
+    pending = [row[0] for row in conn.execute("SELECT id FROM orders WHERE status = 'Pendente' ORDER BY id LIMIT 3")]
+    supplier_id, product_id = conn.execute("SELECT supplier_id, product_id FROM suppliers_products LIMIT 1").fetchone()
+    with conn:
+        order_id = conn.execute("INSERT INTO orders (order_date, supplier_id) VALUES ('2025-01-05', ?)",
+                                (supplier_id,)).lastrowid
+        conn.execute("INSERT INTO orders_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, 3, 7.35)",
+                     (order_id, product_id))
+        conn.execute("UPDATE orders SET status = 'Entregue', delivery_date = '2025-01-06' WHERE id = ?", (pending[0],))
+        conn.execute("UPDATE orders SET status = 'Cancelado' WHERE id = ?", (pending[1],))
+        conn.execute("UPDATE orders SET status = 'Cancelado' WHERE id = ?", (order_id,))
+        conn.execute("UPDATE orders SET order_date = '2025-01-07' WHERE id = ?", (pending[2],))
+
+    stored = conn.execute("SELECT * FROM product_supplier_last_price ORDER BY product_id, supplier_id").fetchall()
+    assert stored == conn.execute(LAST_PRICE).fetchall()
+
+
+def test_stock_history_records_only_changes(db):
+    _, conn = db
+    history_rows = conn.execute("SELECT COUNT(*) FROM products_history").fetchone()[0]
+    with conn:
+        # update_stock_qt writes the whole grid, unchanged counts included
+        conn.execute("UPDATE products SET current_stock_in_units = current_stock_in_units")
+    assert conn.execute("SELECT COUNT(*) FROM products_history").fetchone()[0] == history_rows
+
+    with conn:
+        conn.execute("UPDATE products SET current_stock_in_units = current_stock_in_units + 1 WHERE id IN (1, 2)")
+    assert conn.execute("SELECT COUNT(*) FROM products_history").fetchone()[0] == history_rows + 2
+    # A changed product has exactly one open interval, holding its new count
+    assert conn.execute("""SELECT p.id FROM products p
+                           LEFT JOIN products_history h ON h.id = p.id AND h.valid_to IS NULL
+                           WHERE p.id IN (1, 2)
+                           GROUP BY p.id
+                           HAVING COUNT(h.id) != 1 OR MAX(h.stock_in_units) IS NOT p.current_stock_in_units""").fetchall() == []